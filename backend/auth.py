@@ -7,8 +7,10 @@ from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 from database import get_db
 from models import User
+from services.principal_cache import principal_cache, Principal
 
 import os
+import time
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -19,36 +21,69 @@ if not SECRET_KEY:
     raise ValueError("No SECRET_KEY set for Flask application")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 3000
+# Set AUTH_ROLE_CLAIMS=true to sign id, role and state into tokens, so role
+# checks (get_current_principal) need no user lookup at all
+AUTH_ROLE_CLAIMS = os.getenv("AUTH_ROLE_CLAIMS", "false").lower() == "true"
 
-import bcrypt
+from services.password_hasher import password_hasher, HasherBusy
 
 # pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
+# bcrypt runs on a bounded pool (see services/password_hasher.py); when its
+# queue is full, sign-ins get a 503 instead of piling up behind each other
+def _busy():
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many sign-ins right now. Please try again in a moment.",
+        headers={"Retry-After": "2"},
+    )
+
 def verify_password(plain_password, hashed_password):
-    # Ensure bytes for bcrypt
-    if isinstance(plain_password, str):
-        plain_password = plain_password.encode('utf-8')
-    if isinstance(hashed_password, str):
-        hashed_password = hashed_password.encode('utf-8')
-    return bcrypt.checkpw(plain_password, hashed_password)
+    try:
+        return password_hasher.verify(plain_password, hashed_password)
+    except HasherBusy:
+        raise _busy()
 
 def get_password_hash(password):
-    if isinstance(password, str):
-        password = password.encode('utf-8')
-    return bcrypt.hashpw(password, bcrypt.gensalt()).decode('utf-8')
+    try:
+        return password_hasher.hash(password)
+    except HasherBusy:
+        raise _busy()
+
+async def verify_password_async(plain_password, hashed_password):
+    try:
+        return await password_hasher.verify_async(plain_password, hashed_password)
+    except HasherBusy:
+        raise _busy()
+
+async def get_password_hash_async(password):
+    try:
+        return await password_hasher.hash_async(password)
+    except HasherBusy:
+        raise _busy()
+
+def password_needs_rehash(hashed_password):
+    """True if the stored hash was made with a different BCRYPT_ROUNDS."""
+    return password_hasher.needs_rehash(hashed_password)
 
-def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
+def create_access_token(data: dict, expires_delta: Optional[timedelta] = None, user: Optional[User] = None):
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(minutes=15)
     to_encode.update({"exp": expire})
+    if AUTH_ROLE_CLAIMS and user is not None:
+        # "issued" is precise (unlike iat), so a token reissued right after a role change still counts;
+        # after "claims_exp" the claims are ignored and the user is looked up again
+        issued = time.time()
+        to_encode.update({"uid": user.id, "role": user.role, "state": user.state, "issued": issued,
+                          "claims_exp": principal_cache.claims_expires_at(issued)})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+def _decode_token(token: str):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -61,8 +96,34 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
             raise credentials_exception
     except JWTError:
         raise credentials_exception
-    
-    user = db.query(User).filter(User.email == email).first()
-    if user is None:
-        raise credentials_exception
-    return user
+    return payload, credentials_exception
+
+def _load_user(email: str, db: Session, credentials_exception):
+    # Resolved users are cached briefly (see services/principal_cache.py); the
+    # returned User is detached, so load the row again before changing it
+    snapshot = principal_cache.get(email)
+    if snapshot is None:
+        user = db.query(User).filter(User.email == email).first()
+        if user is None:
+            raise credentials_exception
+        snapshot = {c.name: getattr(user, c.name) for c in User.__table__.columns}
+        principal_cache.put(email, snapshot)
+    return User(**snapshot)
+
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    payload, credentials_exception = _decode_token(token)
+    return _load_user(payload["sub"], db, credentials_exception)
+
+def get_current_principal(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    """Id, email, role and state of the caller; straight from the token when it carries them."""
+    payload, credentials_exception = _decode_token(token)
+    email = payload["sub"]
+    if AUTH_ROLE_CLAIMS and "role" in payload and principal_cache.claims_valid(
+            email, payload.get("issued"), payload.get("claims_exp")):
+        principal_cache.record_claim_hit()
+        return Principal(payload.get("uid"), email, payload["role"], payload.get("state"))
+    return Principal.from_user(_load_user(email, db, credentials_exception))
+
+def invalidate_user(email: str):
+    """Call after changing a user's profile or role."""
+    principal_cache.invalidate(email)
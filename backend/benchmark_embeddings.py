@@ -0,0 +1,71 @@
+import time
+import random
+import argparse
+import numpy as np
+from dotenv import load_dotenv
+from services.embedding_backends import BACKENDS, build_backend
+from services.lexical_index import load_chroma_documents
+
+load_dotenv()
+
+DB_PATH = "chroma_db"
+
+# Compares embedding backends on this corpus: single-query latency, batch
+# throughput, and a retrieval-quality proxy (recall@k of finding a chunk from
+# one of its own sentences). Calls the raw backends, so nothing is cached.
+# Example: python benchmark_embeddings.py --backends hashing openai
+def sample_queries(chunks, n, seed=0):
+    rng = random.Random(seed)
+    queries = []
+    for chunk_id in rng.sample(range(len(chunks)), min(n, len(chunks))):
+        sentences = [s.strip() for s in chunks[chunk_id].split(".") if len(s.split()) >= 6]
+        if sentences:
+            queries.append((rng.choice(sentences), chunk_id))
+    return queries
+
+
+def benchmark(name, chunks, queries, batch_size, k):
+    try:
+        backend = build_backend(name)
+        backend.embed_query("warm up")
+    except Exception as e:
+        print(f"{name:12} skipped ({type(e).__name__}: {e})")
+        return
+
+    latencies = []
+    for query, _ in queries:
+        started = time.perf_counter()
+        backend.embed_query(query)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    vectors = []
+    for i in range(0, len(chunks), batch_size):
+        vectors.extend(backend.embed_documents(chunks[i:i + batch_size]))
+    throughput = len(chunks) / (time.perf_counter() - started)
+
+    corpus = np.asarray(vectors, dtype=np.float32)
+    corpus /= np.linalg.norm(corpus, axis=1, keepdims=True) + 1e-9
+    query_vectors = np.asarray(backend.embed_documents([q for q, _ in queries]), dtype=np.float32)
+    query_vectors /= np.linalg.norm(query_vectors, axis=1, keepdims=True) + 1e-9
+    top = np.argsort(-(query_vectors @ corpus.T), axis=1)[:, :k]
+    recall = np.mean([chunk_id in row for (_, chunk_id), row in zip(queries, top)])
+
+    print(f"{name:12} query p50 {np.percentile(latencies, 50):7.2f} ms  p95 {np.percentile(latencies, 95):7.2f} ms  "
+          f"batch {throughput:8.0f} chunks/s  recall@{k} {recall:.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark embedding backends on the stored corpus.")
+    parser.add_argument("--backends", nargs="+", default=sorted(BACKENDS), choices=sorted(BACKENDS))
+    parser.add_argument("--collection", default="langchain")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+
+    chunks = [text for text, _ in load_chroma_documents(DB_PATH, args.collection)]
+    queries = sample_queries(chunks, args.queries)
+    print(f"{len(chunks)} chunks, {len(queries)} queries")
+    for name in args.backends:
+        benchmark(name, chunks, queries, args.batch_size, args.k)
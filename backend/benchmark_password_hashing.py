@@ -0,0 +1,53 @@
+import time
+import argparse
+import threading
+import numpy as np
+from services.password_hasher import PasswordHasher, HasherBusy, BCRYPT_WORKERS, BCRYPT_MAX_QUEUE
+
+# Login throughput per bcrypt cost factor: concurrent clients verify a password
+# through the bounded hasher, as the /auth/login route does. Reports logins/s,
+# latency and how many requests were shed (503). Example:
+# python benchmark_password_hashing.py --rounds 10 11 12 --clients 32 --seconds 5
+def run(rounds, workers, max_queue, clients, seconds):
+    hasher = PasswordHasher(rounds=rounds, workers=workers, max_queue=max_queue)
+    hashed = hasher.hash("password123")
+    latencies, shed = [], [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def client():
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                hasher.verify("password123", hashed)
+            except HasherBusy:
+                with lock:
+                    shed[0] += 1
+                time.sleep(0.01)  # a real client would back off on Retry-After
+                continue
+            with lock:
+                latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    p50, p95 = np.percentile(latencies, [50, 95]) if latencies else (0.0, 0.0)
+    print(f"rounds {rounds:2}  workers {workers}  queue {max_queue:3}  {len(latencies) / elapsed:8.1f} logins/s  "
+          f"p50 {p50:8.1f} ms  p95 {p95:8.1f} ms  shed {shed[0]}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark login throughput for each bcrypt cost factor.")
+    parser.add_argument("--rounds", type=int, nargs="+", default=[10, 11, 12])
+    parser.add_argument("--workers", type=int, default=BCRYPT_WORKERS)
+    parser.add_argument("--max-queue", type=int, default=BCRYPT_MAX_QUEUE)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=3)
+    args = parser.parse_args()
+
+    for rounds in args.rounds:
+        run(rounds, args.workers, args.max_queue, args.clients, args.seconds)
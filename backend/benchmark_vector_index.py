@@ -0,0 +1,76 @@
+import os
+import time
+import argparse
+import tempfile
+import numpy as np
+from services.embedding_backends import collection_name
+from services.vector_index import VectorIndex, DTYPES
+
+DB_PATH = "chroma_db"
+
+# Compares the memory-mapped vector index (for each storage type) against Chroma:
+# resident memory added by loading, single and batched query latency, and recall@k
+# against Chroma's own results. Queries are blends of stored vectors, so no
+# embedding calls are made. Example: python benchmark_vector_index.py --queries 200
+def rss_mb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def timed_ms(fn, repeat):
+    samples = []
+    for i in range(repeat):
+        started = time.perf_counter()
+        fn(i)
+        samples.append((time.perf_counter() - started) * 1000)
+    return np.percentile(samples, 50), np.percentile(samples, 95)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the mmap vector index against Chroma.")
+    parser.add_argument("--collection", default=collection_name())
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--batch", type=int, default=32)
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+
+    import chromadb
+    before = rss_mb()
+    collection = chromadb.PersistentClient(path=DB_PATH).get_collection(args.collection)
+    data = collection.get(include=["embeddings", "documents", "metadatas"])
+    vectors = np.asarray(data["embeddings"], dtype=np.float32)
+    documents = list(zip(data["documents"], data["metadatas"] or [{}] * len(data["documents"])))
+    print(f"{len(documents)} chunks, dim {vectors.shape[1]}")
+
+    rng = np.random.default_rng(0)
+    pick = rng.integers(0, len(vectors), size=(args.queries, 2))
+    queries = 0.7 * vectors[pick[:, 0]] + 0.3 * vectors[pick[:, 1]]
+    k = min(args.k, len(documents))
+
+    collection.query(query_embeddings=queries[:1].tolist(), n_results=k)
+    chroma_rss = rss_mb() - before
+    p50, p95 = timed_ms(lambda i: collection.query(query_embeddings=queries[i:i + 1].tolist(), n_results=k), len(queries))
+    truth = collection.query(query_embeddings=queries.tolist(), n_results=k, include=[])["ids"]
+    id_to_row = {doc_id: row for row, doc_id in enumerate(data["ids"])}
+    truth = [{id_to_row[i] for i in ids} for ids in truth]
+    print(f"{'chroma':8} rss +{chroma_rss:7.1f} MB  query p50 {p50:6.2f} ms  p95 {p95:6.2f} ms")
+
+    for dtype in DTYPES:
+        with tempfile.TemporaryDirectory() as path:
+            VectorIndex.build(vectors, documents, dtype).save(path)
+            before = rss_mb()
+            index = VectorIndex.load(path)
+            index.search(queries[0], k)
+            loaded_rss = rss_mb() - before
+            p50, p95 = timed_ms(lambda i: index.search(queries[i], k), len(queries))
+            batches = max(1, len(queries) // args.batch)
+            b50, _ = timed_ms(lambda i: index.search_batch(queries[i * args.batch:(i + 1) * args.batch], k), batches)
+            found = index.search_batch(queries, k)
+            recall = np.mean([len(truth[i] & {d for d, _ in row}) / k for i, row in enumerate(found)])
+            print(f"{dtype:8} rss +{loaded_rss:7.1f} MB  query p50 {p50:6.2f} ms  p95 {p95:6.2f} ms  "
+                  f"batch/query {b50 / args.batch:6.3f} ms  file {os.path.getsize(os.path.join(path, 'vectors.npy')) / 2**20:6.2f} MB  "
+                  f"recall@{k} {recall:.3f}")
+            del index
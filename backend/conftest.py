@@ -0,0 +1,46 @@
+import os
+import sys
+import subprocess
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import models  # noqa: F401 (registers every table on Base)
+from database import Base
+
+
+@pytest.fixture
+def session_factory():
+    """sessionmaker bound to a fresh in-memory SQLite database with every table created."""
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def run_with_dotenv():
+    """
+    Runs Python code in a fresh interpreter in backend/ with the given
+    settings written to backend/.env (and not set in the environment), the
+    way a deployment configures them. Returns the code's stdout.
+    """
+    backend = os.path.dirname(os.path.abspath(__file__))
+    path = os.path.join(backend, ".env")
+    if os.path.exists(path):
+        pytest.skip("backend/.env already exists")
+
+    def run(settings: dict, code: str):
+        with open(path, "w", encoding="utf-8") as f:
+            f.writelines(f"{key}={value}\n" for key, value in settings.items())
+        env = {k: v for k, v in os.environ.items() if k not in settings}
+        env.setdefault("SECRET_KEY", "test")
+        result = subprocess.run([sys.executable, "-c", code], cwd=backend, env=env,
+                                capture_output=True, text=True, timeout=120)
+        assert result.returncode == 0, result.stderr
+        return result.stdout.strip()
+
+    yield run
+    if os.path.exists(path):
+        os.remove(path)
@@ -1,5 +1,7 @@
 import os
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.schema import CreateIndex
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
@@ -33,3 +35,42 @@ def get_db():
         yield db
     finally:
         db.close()
+
+def add_missing_columns(base=None, bind=None):
+    """
+    Lightweight migration: create_all only creates missing tables, so columns
+    (and their indexes) added to existing models are created here. Returns
+    the "table.column" names that were added.
+
+    Every worker runs this at startup, so a column may be added by another
+    worker between the inspection and the ALTER: Postgres skips it with
+    IF NOT EXISTS, and SQLite's "duplicate column" error is ignored.
+    """
+    base = base or Base
+    bind = bind or engine
+    inspector = inspect(bind)
+    postgres = bind.dialect.name == "postgresql"
+    added = []
+    with bind.begin() as conn:
+        for table in base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {c["name"] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                column_type = column.type.compile(dialect=bind.dialect)
+                if postgres:
+                    conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN IF NOT EXISTS {column.name} {column_type}'))
+                else:
+                    try:
+                        conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+                    except OperationalError as e:
+                        if "duplicate column" not in str(e).lower():
+                            raise
+                        continue
+                added.append(f"{table.name}.{column.name}")
+            for index in table.indexes:
+                if any(f"{table.name}.{c.name}" in added for c in index.columns):
+                    conn.execute(CreateIndex(index, if_not_exists=True))
+    return added
@@ -1,58 +1,137 @@
 import os
+import time
 from dotenv import load_dotenv
-from langchain_community.document_loaders import PyPDFLoader, TextLoader, DirectoryLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_openai import OpenAIEmbeddings
-from langchain_community.vectorstores import Chroma
 
-# 1. Load Environment Variables (API Key)
+# 1. Load Environment Variables (API Key) before the services read their settings
 load_dotenv()
 
+from services.ingest_manifest import IngestManifest, INGEST_MANIFEST_PATH, scan_sources, file_sha256, chunk_id
+from services.embedding_backends import EMBEDDING_BACKEND, collection_name
+from services.ingest_pipeline import IngestFile, run_pipeline, INGEST_WORKERS
+
+# LangChain, Chroma and the index builders are imported only when something
+# actually changed, so a no-op run finishes in a fraction of a second.
+
 # Define where the data is and where the database will be
 DATA_PATH = "nysc_documents"
 DB_PATH = "chroma_db"
 
+def rebuild_indexes():
+    from services.lexical_index import build_from_chroma, LEXICAL_INDEX_PATH
+    from services.vector_index import export_from_chroma, VECTOR_INDEX_PATH
+    from services.faq_service import build_faq_index, FAQ_INDEX_PATH
+
+    # 5. Build the BM25 index over the same chunks for exact-term lookups
+    index = build_from_chroma(DB_PATH, LEXICAL_INDEX_PATH, collection_name())
+    print(f"Lexical index with {len(index)} chunks saved to '{LEXICAL_INDEX_PATH}'.")
+
+    # 5b. Export the vectors to a memory-mapped matrix the API workers can share
+    vector_index = export_from_chroma(DB_PATH, collection_name(), VECTOR_INDEX_PATH)
+    print(f"Vector index with {len(vector_index)} chunks ({vector_index.meta['dtype']}) saved to '{VECTOR_INDEX_PATH}'.")
+
+    # 6. Extract the curated FAQ into a Q&A index for the no-LLM fast path
+    faq_index = build_faq_index(DATA_PATH, FAQ_INDEX_PATH)
+    print(f"FAQ index with {len(faq_index)} entries saved to '{FAQ_INDEX_PATH}'.")
+
 def create_vector_db():
-    print(f"Loading documents from {DATA_PATH}...")
-    
-    # 2. Load the Documents (PDFs and TXT files)
-    # We use DirectoryLoader to grab everything in the folder
-    loader = DirectoryLoader(DATA_PATH, glob="**/*.pdf", loader_cls=PyPDFLoader)
-    documents = loader.load()
-    
-    # If you also have text files, you can uncomment this:
-    txt_loader = DirectoryLoader(DATA_PATH, glob="**/*.txt", loader_cls=TextLoader)
-    documents.extend(txt_loader.load())
-
-    if not documents:
+    started = time.perf_counter()
+    collection = collection_name()
+    print(f"Checking documents in {DATA_PATH} against {INGEST_MANIFEST_PATH}...")
+
+    hashes = {path: file_sha256(os.path.join(DATA_PATH, path)) for path in scan_sources(DATA_PATH)}
+    if not hashes:
         print("No documents found! Please check your nysc_documents folder.")
         return
 
-    print(f"Loaded {len(documents)} documents. Splitting text...")
+    manifest = IngestManifest.load()
+    fresh_start = not manifest.has_collection(collection)
+    changes = manifest.diff(collection, hashes)
+    # Files that dropped a passage as a repeat of a changed or removed file's copy
+    # must be re-ingested, or the passage would vanish with that copy
+    dependents = manifest.dependents(collection, changes["changed"] + changes["removed"])
+    for path in dependents:
+        for kind in ("unchanged", "resumed"):
+            if path in changes[kind]:
+                changes[kind].remove(path)
+                changes["changed"].append(path)
+    if dependents:
+        print(f"Re-ingesting {len(dependents)} files whose duplicate passages were stored under a changed file.")
+    if not fresh_start and not (changes["added"] or changes["changed"] or changes["resumed"] or changes["removed"]):
+        print(f"Nothing changed ({len(changes['unchanged'])} files up to date) in {time.perf_counter() - started:.2f}s.")
+        return
 
-    # 3. Split Text into Chunks
-    # AI can't read a whole book at once. We cut it into smaller pieces.
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=1000,
-        chunk_overlap=200
-    )
-    chunks = text_splitter.split_documents(documents)
-    print(f"Split into {len(chunks)} chunks.")
+    from langchain_community.vectorstores import Chroma
+    from services.embedding_cache import CachedEmbeddings
+    from services.embedding_backends import build_backend
 
     # 4. Save to ChromaDB (The Vector Database)
-    print("Saving to Vector Database (this may take a moment)...")
-    
-    # This sends text to OpenAI to turn into numbers (embeddings)
-    embedding_function = OpenAIEmbeddings()
-    
-    # Create the database on your disk
-    Chroma.from_documents(
-        documents=chunks, 
-        embedding=embedding_function, 
-        persist_directory=DB_PATH
-    )
-    
-    print(f"Success! Database created at '{DB_PATH}'.")
+    # This turns text into numbers (embeddings) with EMBEDDING_BACKEND (OpenAI by default)
+    # Chunks embedded on a previous run come from the local cache instead
+    embedding_function = CachedEmbeddings(build_backend())
+    vector_db = Chroma(persist_directory=DB_PATH, embedding_function=embedding_function, collection_name=collection)
+    if fresh_start and vector_db._collection.count():
+        # Chunks from before the manifest existed can't be matched to files; start clean
+        print(f"No manifest for '{collection}' yet; rebuilding it from scratch.")
+        vector_db.delete_collection()
+        vector_db = Chroma(persist_directory=DB_PATH, embedding_function=embedding_function, collection_name=collection)
+
+    # Old chunks of changed and deleted files go first
+    stale_ids = manifest.chunk_ids(collection, changes["changed"] + changes["removed"])
+    if stale_ids:
+        vector_db.delete(ids=stale_ids)
+    for path in changes["removed"]:
+        manifest.forget(collection, path)
+
+    # 2 + 3. Parse files in a process pool and split pages as they arrive,
+    # embedding and writing in bounded batches (see services/ingest_pipeline.py)
+    files = []
+    for path in changes["added"] + changes["changed"] + changes["resumed"]:
+        pages_done, chunks_done = manifest.progress(collection, path)
+        if path in changes["changed"]:
+            manifest.forget(collection, path)
+            pages_done, chunks_done = 0, 0
+        files.append(IngestFile(os.path.join(DATA_PATH, path), path, hashes[path], pages_done, chunks_done))
+    if changes["resumed"]:
+        print(f"Resuming {len(changes['resumed'])} partly ingested files.")
+
+    def write_batch(batch):
+        vector_db.add_texts([text for _, text, _ in batch], metadatas=[metadata for _, _, metadata in batch],
+                            ids=[chunk_id for chunk_id, _, _ in batch])
+
+    def checkpoint(file, new_ids, pages_done, complete, chunks_numbered):
+        # Saved after every batch, so an interrupted run resumes where it stopped
+        previous = manifest.chunk_ids(collection, [file.key])
+        deduped_against = manifest.deduped_against(collection, file.key) | dedupe.depends_on.get(file.key, set())
+        manifest.record(collection, file.key, file.sha, previous + new_ids, pages_done, complete, chunks_numbered,
+                        deduped_against)
+        manifest.save()
+
+    # Near-duplicate chunks (repeated passages across the decree, bye-laws, FAQ) are
+    # dropped before embedding; chunks already stored count as seen, owned by their file
+    from services.chunk_dedupe import ChunkDeduplicator
+    dedupe = ChunkDeduplicator()
+    if dedupe.enabled and changes["unchanged"] + changes["resumed"]:
+        owner_of = {i: path for path, entry in manifest.files(collection).items() for i in entry["chunk_ids"]}
+        stored = vector_db.get(include=["documents"])
+        for stored_id, text in zip(stored["ids"], stored["documents"]):
+            dedupe.add(text, owner_of.get(stored_id))
+
+    print(f"Embedding {len(files)} files with {INGEST_WORKERS} parser processes...")
+    stats = run_pipeline(files, write_batch, checkpoint, dedupe=dedupe)
+    manifest.save()
+
+    print(f"Success! '{DB_PATH}' updated with {EMBEDDING_BACKEND} embeddings: "
+          f"{len(changes['added'])} added, {len(changes['changed'])} replaced, {len(changes['resumed'])} resumed, "
+          f"{len(changes['removed'])} removed, {len(changes['unchanged'])} unchanged "
+          f"({stats['chunks']} chunks embedded, {len(stale_ids)} deleted).")
+    print(f"Throughput: {stats['pages_per_second']} pages/s, {stats['chunks_per_second']} chunks/s "
+          f"over {stats['seconds']}s.")
+    report = dedupe.report()
+    print(f"Dedupe (threshold {report['threshold']}): {report['duplicates']} of {report['checked']} chunks "
+          f"dropped as near-duplicates ({report['reduction']:.1%} fewer to embed).")
+
+    rebuild_indexes()
+    print(f"Done in {time.perf_counter() - started:.1f}s.")
 
 if __name__ == "__main__":
-    create_vector_db()
\ No newline at end of file
+    create_vector_db()
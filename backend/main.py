@@ -1,22 +1,36 @@
 import os
-import requests
+import json
+import time
+import asyncio
 import datetime
-from fastapi import FastAPI, HTTPException, Request
-from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from dotenv import load_dotenv
+from services import startup_timing
 
-# Imports for AI
-from langchain_openai import OpenAIEmbeddings, ChatOpenAI
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_community.vectorstores import Chroma
-from langchain_core.messages import SystemMessage, HumanMessage
-from tavily import TavilyClient
-from apscheduler.schedulers.background import BackgroundScheduler
-from services.news_service import fetch_and_store_news
+with startup_timing.timed("fastapi", "import"):
+    from fastapi import FastAPI, HTTPException, Request
+    from fastapi.middleware.cors import CORSMiddleware
+    from fastapi.responses import StreamingResponse
+    from pydantic import BaseModel
+    from dotenv import load_dotenv
 
+# Before any services import: their settings are read at import time
 load_dotenv()
 
+# Imports for AI
+# The heavy SDKs (LangChain, Chroma, Tavily) are loaded lazily by ai_service
+with startup_timing.timed("ai services (lazy)", "import"):
+    from services import ai_service, retrieval
+    from services.news_service import fetch_and_store_news
+    from services.answer_cache import answer_cache
+    from services.web_search_cache import web_search_cache
+    from services.response_cache import response_cache
+    from services.principal_cache import principal_cache
+    from services.password_hasher import password_hasher
+    from services.telegram_service import TelegramDispatcher
+    from services.embedding_batcher import EmbeddingBatcher
+    from services.faq_service import format_answer as format_faq_answer
+    from services import context_packer, news_index
+    from services.job_scheduler import LeaderScheduler, leader_lock_for
+
 app = FastAPI()
 
 # CORS
@@ -29,14 +43,18 @@ app.add_middleware(
 )
 
 # --- SETUP TOOLS ---
-from database import engine, Base, SessionLocal
-import models
-from routers import auth, data, admin, clearance, resources
-from fastapi.staticfiles import StaticFiles
-from auth import get_password_hash
+with startup_timing.timed("database + routers", "import"):
+    from database import engine, Base, SessionLocal, add_missing_columns
+    import models
+    from routers import auth, data, admin, clearance, resources
+    from fastapi.staticfiles import StaticFiles
+    from auth import get_password_hash
 
 # Create Database Tables
-Base.metadata.create_all(bind=engine)
+with startup_timing.timed("create_all", "init"):
+    Base.metadata.create_all(bind=engine)
+    for column in add_missing_columns():
+        print(f"Added column {column}")
 
 # Include Routers
 app.include_router(auth.router)
@@ -115,81 +133,108 @@ app.include_router(data.router)
 app.include_router(admin.router)
 app.include_router(resources.router)
 
-DB_PATH = "chroma_db"
-embedding_function = None
-vector_db = None
-llm = None
-
-try:
-    llm_openai = None
-    llm_gemini = None
-    
-    # Initialize OpenAI
-    if os.getenv("OPENAI_API_KEY") and not os.getenv("OPENAI_API_KEY").startswith("sk-placeholder"):
-        print("Initializing OpenAI...")
-        embedding_function = OpenAIEmbeddings()
-        vector_db = Chroma(persist_directory=DB_PATH, embedding_function=embedding_function)
-        llm_openai = ChatOpenAI(temperature=0.2, model="gpt-3.5-turbo")
-    
-    # Initialize Gemini
-    if os.getenv("GEMINI_API_KEY") or os.getenv("GOOGLE_API_KEY"):
-        print("Initializing Gemini...")
-        gemini_key = os.getenv("GEMINI_API_KEY") or os.getenv("GOOGLE_API_KEY")
-        # Note: If reusing ChromaDB embedded with OpenAI, switching LLMs is fine, but embeddings must match DB.
-        llm_gemini = ChatGoogleGenerativeAI(model="gemini-pro", google_api_key=gemini_key, temperature=0.2)
-        
-    # Set default LLM (Prioritize OpenAI if both exist, or use whichever is available)
-    if llm_openai:
-        llm = llm_openai
-        print("Using OpenAI as primary LLM.")
-    elif llm_gemini:
-        llm = llm_gemini
-        print("Using Gemini as primary LLM.")
-    else:
-        print("WARNING: No valid API Key found (OpenAI or Gemini). AI features disabled.")
-except Exception as e:
-    print(f"WARNING: Failed to initialize AI components: {e}")
-
-tavily = None
-try:
-    if os.getenv("TAVILY_API_KEY"):
-        tavily = TavilyClient(api_key=os.getenv("TAVILY_API_KEY"))
-except Exception:
-    pass
+# Set AI_WARMUP=false to load the AI stack only when the first question arrives
+AI_WARMUP = os.getenv("AI_WARMUP", "true").lower() != "false"
 
 TELEGRAM_TOKEN = os.getenv("TELEGRAM_TOKEN")
 
+# Background jobs run in one worker at a time (see services/job_scheduler.py)
+NEWS_FETCH_HOURS = float(os.getenv("NEWS_FETCH_HOURS", "4"))
+scheduler = LeaderScheduler(leader_lock_for(engine))
+
+# Max number of LLM calls allowed in flight at once (per worker).
+# Retrieval and web search are cheap to overlap; the LLM is the expensive part.
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+llm_semaphore = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+
+# Passages retrieved per question; the context packer keeps as many as fit the token budget
+RETRIEVAL_K = int(os.getenv("RETRIEVAL_K", "5"))
+
+TRUSTED_NEWS_DOMAINS = ["nysc.gov.ng", "nyscselfservice.com.ng", "legit.ng" , "punchng.com", "vanguardngr.com", "dailypost.ng", "thecable.ng"]
+
+# Concurrent questions share one upstream embedding call (see services/embedding_batcher.py)
+query_embedder = EmbeddingBatcher(lambda texts: ai_service.get_embedding_function().embed_queries(texts))
+
 # --- CORE AI LOGIC FUNCTION ---
-def get_nysc_answer(question: str):
+async def embed_question(question: str):
+    embedding_function = ai_service.get_embedding_function()
+    if not embedding_function or retrieval.RETRIEVAL_MODE == "lexical":
+        return None
     try:
-        # 0. Get Today's Date (Crucial for "Current Batch" questions)
-        today = datetime.date.today().strftime("%B %d, %Y")
-
-        # 1. Search Internal Database (Prioritize your "standard_procedures.txt")
-        internal_knowledge = ""
-        if vector_db:
-            db_results = vector_db.similarity_search(question, k=3)
-            internal_knowledge = "\n".join([doc.page_content for doc in db_results])
-        
-        # 2. Search Web (Refined Query)
-        # We add "Official" to filter out random Facebook comments
-        web_context = ""
-        if tavily:
-            print(f"Searching web for: NYSC Nigeria official news {question}")
-            try:
-                web_response = tavily.search(
-                    query=f"NYSC Nigeria official news {question}", 
-                    search_depth="basic", 
-                    max_results=2,
-                    include_domains=["nysc.gov.ng", "nyscselfservice.com.ng", "legit.ng" , "punchng.com", "vanguardngr.com", "dailypost.ng", "thecable.ng"] 
-                    # (Optional: You can restrict to trusted news sites if Tavily allows, or just use general better queries)
-                )
-                web_context = "\n".join([result["content"] for result in web_response["results"]])
-            except Exception as e:
-                print(f"Tavily Search Error: {e}")
-        
-        # 3. Construct System Prompt
-        system_prompt = f"""
+        return await asyncio.wait_for(query_embedder.embed(question), timeout=retrieval.VECTOR_SEARCH_TIMEOUT)
+    except Exception as e:
+        print(f"Embedding Error: {e!r}")
+        return None
+
+async def search_internal_knowledge(question: str, query_embedding=None):
+    # Vector + BM25 retrieval fused by rank (see services/retrieval.py)
+    return await retrieval.retrieve(question, query_embedding, k=RETRIEVAL_K)
+
+async def search_web_news(question: str, query_embedding=None):
+    # Recent news we already fetched and indexed answers most questions without a live search
+    local_news = await news_index.search_local_news(question, query_embedding)
+    if local_news:
+        print(f"Using {len(local_news)} local news items; skipping live web search.")
+        news_index.record_answer_source(local=True)
+        return local_news
+
+    # We add "Official" to filter out random Facebook comments
+    tavily = ai_service.get_tavily()
+    if not tavily:
+        return []
+    news_index.record_answer_source(local=False)
+    print(f"Searching web for: NYSC Nigeria official news {question}")
+    try:
+        # Identical searches within the TTL (or already in flight) share one Tavily call
+        web_response = await web_search_cache.search(
+            tavily.search,
+            query=f"NYSC Nigeria official news {question}",
+            search_depth="basic",
+            max_results=2,
+            include_domains=TRUSTED_NEWS_DOMAINS
+        )
+        return web_response["results"]
+    except Exception as e:
+        print(f"Tavily Search Error: {e}")
+        return []
+
+async def gather_context(question: str, query_embedding=None, on_progress=None):
+    """
+    Runs internal retrieval and web search concurrently.
+    Returns (documents, web_results, timings_ms). `on_progress` is called
+    with a small dict as each stage starts and finishes.
+    """
+    timings = {}
+
+    async def timed(stage, coro):
+        if on_progress:
+            on_progress({"stage": stage, "status": "started"})
+        start = time.perf_counter()
+        result = await coro
+        timings[stage] = round((time.perf_counter() - start) * 1000, 1)
+        if on_progress:
+            on_progress({"stage": stage, "status": "done", "results": len(result), "ms": timings[stage]})
+        return result
+
+    documents, web_results = await asyncio.gather(
+        timed("retrieval", search_internal_knowledge(question, query_embedding)),
+        timed("web_search", search_web_news(question, query_embedding))
+    )
+    return documents, web_results, timings
+
+def build_sources(documents, web_results):
+    sources = []
+    for doc in documents:
+        sources.append({"type": "document", "source": doc.metadata.get("source"), "page": doc.metadata.get("page")})
+    for result in web_results:
+        sources.append({"type": "news" if result.get("local") else "web", "title": result.get("title"), "url": result.get("url")})
+    return sources
+
+def build_system_prompt(internal_knowledge: str, web_context: str):
+    # 0. Get Today's Date (Crucial for "Current Batch" questions)
+    today = datetime.date.today().strftime("%B %d, %Y")
+
+    return f"""
         You are an NYSC Guidance Assistant, designed to provide accurate, professional, and supportive information to all categories of users: Corps Members (CMs), Prospective Corps Members (PCMs), NYSC officials, and the general public.
         
         CURRENT DATE: {today}
@@ -216,17 +261,173 @@ def get_nysc_answer(question: str):
         {web_context}
         </WEB_NEWS>
         """
-        
-        if llm:
-            messages = [SystemMessage(content=system_prompt), HumanMessage(content=question)]
-            response = llm.invoke(messages)
-            return response.content
-        else:
+
+def model_name_of(llm):
+    # The provider router and ChatOpenAI expose `model_name`, ChatGoogleGenerativeAI `model`
+    return getattr(llm, "model_name", None) or getattr(llm, "model", None)
+
+def build_messages(question: str, documents, web_results, model_name: str = None):
+    """
+    Packs the retrieved passages into the model's context budget and builds
+    the chat messages. Returns (messages, packed) so callers can cite only
+    the passages that made it into the prompt.
+    """
+    from langchain_core.messages import SystemMessage, HumanMessage
+    packed = context_packer.pack(documents, web_results, model_name)
+    system_prompt = build_system_prompt(packed.internal_text, packed.web_text)
+    return [SystemMessage(content=system_prompt), HumanMessage(content=question)], packed
+
+async def answer_from_faq(question: str):
+    """
+    FAQ fast path: a confident match against the curated FAQ is answered
+    directly, without retrieval, web search or the LLM. Returns
+    (answer, entry) or None when the question should fall through.
+    """
+    await ai_service.ensure_loaded("faq_index")
+    faq_index = ai_service.get_faq_index()
+    if not faq_index:
+        return None
+    match = faq_index.match(question)
+    if not match:
+        return None
+    entry, confidence = match
+    print(f"FAQ fast path ({confidence}): {entry['question']}")
+    return format_faq_answer(entry), entry
+
+async def answer_question(question: str):
+    # FAQ first; only low-confidence questions pay for the full pipeline
+    faq = await answer_from_faq(question)
+    if faq:
+        return faq[0]
+    return await get_nysc_answer(question)
+
+async def get_nysc_answer(question: str):
+    try:
+        await ai_service.ensure_loaded()
+        llm = ai_service.get_llm()
+        if not llm:
             return "I am currently in Maintenance Mode. AI features are temporarily disabled. Please check back later or contact support for assistance."
+
+        # 0. Answer Cache (exact text first, then a paraphrase by embedding)
+        if answer_cache.sync_due():
+            # Picks up invalidations made by other workers (a DB read, so off the event loop)
+            await asyncio.to_thread(answer_cache.sync)
+        cache_generation = answer_cache.generation
+        cached = answer_cache.get(question)
+        if cached:
+            return cached
+        started = time.perf_counter()
+        # Embedded once, reused by the similarity lookup and the vector search
+        query_embedding = await embed_question(question)
+        cached = answer_cache.get_similar(query_embedding)
+        if cached:
+            return cached
+
+        # 1 + 2. Search Internal Database and the Web at the same time
+        documents, web_results, _ = await gather_context(question, query_embedding)
+
+        # 3. Construct System Prompt
+        messages, _ = build_messages(question, documents, web_results, model_name_of(llm))
+
+        # 4. Ask the LLM without blocking the event loop, capped by the semaphore
+        async with llm_semaphore:
+            response = await llm.ainvoke(messages)
+
+        answer_cache.put(question, response.content, query_embedding, time.perf_counter() - started, cache_generation)
+        return response.content
     except Exception as e:
         print(f"Error: {e}")
         return "I am currently upgrading my database to serve you better. Please try again in a moment."
 
+def sse_event(event: str, data: dict):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def stream_nysc_answer(question: str):
+    """
+    Server-sent-events version of get_nysc_answer.
+    Emits `progress` events for each stage, `token` events as the LLM
+    writes, and a final `done` event with sources and per-stage timings.
+    """
+    started = time.perf_counter()
+    timings = {}
+
+    def elapsed_ms():
+        return round((time.perf_counter() - started) * 1000, 1)
+
+    try:
+        faq = await answer_from_faq(question)
+        if faq:
+            answer, entry = faq
+            yield sse_event("token", {"text": answer})
+            timings["total"] = elapsed_ms()
+            sources = [{"type": "faq", "question": entry["question"], "source": entry["source"]}]
+            yield sse_event("done", {"sources": sources, "timings": timings, "cached": False, "faq": True})
+            return
+
+        await ai_service.ensure_loaded()
+        llm = ai_service.get_llm()
+        embedding_function = ai_service.get_embedding_function()
+        if not llm:
+            yield sse_event("token", {"text": "I am currently in Maintenance Mode. AI features are temporarily disabled. Please check back later or contact support for assistance."})
+            yield sse_event("done", {"sources": [], "timings": timings, "cached": False})
+            return
+
+        if answer_cache.sync_due():
+            # Picks up invalidations made by other workers (a DB read, so off the event loop)
+            await asyncio.to_thread(answer_cache.sync)
+        cache_generation = answer_cache.generation
+        cached = answer_cache.get(question)
+        query_embedding = None
+        if not cached:
+            if embedding_function and retrieval.RETRIEVAL_MODE != "lexical":
+                yield sse_event("progress", {"stage": "embedding", "status": "started"})
+                embedding_started = time.perf_counter()
+                query_embedding = await embed_question(question)
+                timings["embedding"] = round((time.perf_counter() - embedding_started) * 1000, 1)
+                yield sse_event("progress", {"stage": "embedding", "status": "done", "ms": timings["embedding"]})
+            cached = answer_cache.get_similar(query_embedding)
+        if cached:
+            yield sse_event("token", {"text": cached})
+            timings["total"] = elapsed_ms()
+            yield sse_event("done", {"sources": [], "timings": timings, "cached": True})
+            return
+
+        # Forward stage progress while retrieval and web search run together
+        events = asyncio.Queue()
+        context_task = asyncio.ensure_future(gather_context(question, query_embedding, events.put_nowait))
+        context_task.add_done_callback(lambda _: events.put_nowait(None))
+        while (event := await events.get()) is not None:
+            yield sse_event("progress", event)
+        documents, web_results, stage_timings = context_task.result()
+        timings.update(stage_timings)
+
+        messages, packed = build_messages(question, documents, web_results, model_name_of(llm))
+        yield sse_event("progress", {"stage": "generation", "status": "started"})
+        parts = []
+        generation_started = time.perf_counter()
+        async with llm_semaphore:
+            async for chunk in llm.astream(messages):
+                if chunk.content:
+                    if not parts:
+                        timings["first_token"] = elapsed_ms()
+                    parts.append(chunk.content)
+                    yield sse_event("token", {"text": chunk.content})
+        timings["generation"] = round((time.perf_counter() - generation_started) * 1000, 1)
+        timings["total"] = elapsed_ms()
+
+        answer = "".join(parts)
+        answer_cache.put(question, answer, query_embedding, time.perf_counter() - started, cache_generation)
+        sources = build_sources(packed.documents, packed.web_results)
+        yield sse_event("done", {"sources": sources, "timings": timings, "cached": False,
+                                 "context_tokens": packed.tokens_out})
+    except Exception as e:
+        print(f"Stream Error: {e}")
+        yield sse_event("error", {"message": "I am currently upgrading my database to serve you better. Please try again in a moment."})
+        yield sse_event("done", {"sources": [], "timings": timings, "cached": False})
+
+# Telegram updates are answered off the request path by a pool of workers
+telegram_dispatcher = TelegramDispatcher(answer_question, TELEGRAM_TOKEN)
+
 # --- API ENDPOINTS ---
 
 class QueryRequest(BaseModel):
@@ -234,35 +435,83 @@ class QueryRequest(BaseModel):
 
 @app.post("/ask")
 async def ask_question(request: QueryRequest):
-    answer = get_nysc_answer(request.question)
+    answer = await answer_question(request.question)
     return {"answer": answer}
 
+@app.post("/ask/stream")
+async def ask_question_stream(request: QueryRequest):
+    # Same pipeline as /ask, but tokens are pushed as they are generated
+    return StreamingResponse(
+        stream_nysc_answer(request.question),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.post("/telegram")
 async def telegram_webhook(request: Request):
+    # Acknowledge straight away; answering happens on the dispatcher's workers
     data = await request.json()
-    if "message" in data:
-        chat_id = data["message"]["chat"]["id"]
-        user_text = data["message"].get("text", "")
-        if user_text:
-            ai_reply = get_nysc_answer(user_text)
-            url = f"https://api.telegram.org/bot{TELEGRAM_TOKEN}/sendMessage"
-            payload = {"chat_id": chat_id, "text": ai_reply}
-            requests.post(url, json=payload)
+    await telegram_dispatcher.start()
+    if not telegram_dispatcher.submit(data):
+        # Queue is full: a non-2xx makes Telegram redeliver the update later
+        raise HTTPException(status_code=503, detail="Busy, retry later")
     return {"status": "ok"}
 
 @app.get("/")
 def home():
     return {"message": "NYSC AI is Live (Fine-Tuned)!"}
 
+@app.get("/metrics")
+def metrics():
+    # Never trigger AI loading from here; report only what is already up
+    embedding_function = ai_service.get_embedding_function() if ai_service.is_loaded("embeddings") else None
+    faq_index = ai_service.get_faq_index() if ai_service.is_loaded("faq_index") else None
+    llm = ai_service.get_llm() if ai_service.is_loaded("llm") else None
+    return {
+        "ai_components": ai_service.status(),
+        "answer_cache": answer_cache.stats(),
+        "embedding_cache": embedding_function.stats() if embedding_function else None,
+        "embedding_batcher": query_embedder.stats(),
+        "web_search_cache": web_search_cache.stats(),
+        "retrieval": retrieval.stats(),
+        "context_packing": context_packer.stats(),
+        "news_index": news_index.stats(),
+        "llm": llm.stats() if llm else None,
+        "faq": faq_index.stats() if faq_index else None,
+        "telegram": telegram_dispatcher.stats(),
+        "scheduler": scheduler.stats(),
+        "response_cache": response_cache.stats(),
+        "auth": principal_cache.stats(),
+        "password_hasher": password_hasher.stats()
+    }
+
+@app.get("/startup")
+def startup_report():
+    return startup_timing.report()
+
 @app.on_event("startup")
 async def startup_event():
-    seed_users()
-    
+    # Seeding may hash passwords on a fresh DB; don't hold up serving for it
+    def timed_seed():
+        with startup_timing.timed("seed_users", "init"):
+            seed_users()
+    asyncio.get_running_loop().run_in_executor(None, timed_seed)
+    await telegram_dispatcher.start()
+
     # Start Background Jobs
-    scheduler = BackgroundScheduler()
-    # Run immediately on startup for demo purposes, then every 4 hours
-    scheduler.add_job(fetch_and_store_news, 'interval', hours=4, next_run_time=datetime.datetime.now())
-    scheduler.start()
+    # Every worker ticks, but only the one holding the leader lock runs jobs
+    with startup_timing.timed("scheduler", "init"):
+        # Runs once per NEWS_FETCH_HOURS slot, starting with the current one
+        if os.getenv("TAVILY_API_KEY"):
+            scheduler.add_job("fetch_news", fetch_and_store_news, NEWS_FETCH_HOURS * 3600)
+        else:
+            print("TAVILY_API_KEY not set; the news fetch job is not scheduled.")
+        scheduler.start()
+
+    startup_timing.mark_ready()
+    if AI_WARMUP:
+        # Load the AI stack in the background; questions that arrive first just wait for it
+        ai_service.warm_up()
 
     print("\n" + "="*50)
     print(" NYSC SMART BOT BACKEND IS RUNNING")
@@ -270,3 +519,8 @@ async def startup_event():
     print(" API Documentation: /docs")
     print(" Frontend API URL:  (Configured via ENV)")
     print("="*50 + "\n")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    scheduler.shutdown()
+    await telegram_dispatcher.stop()
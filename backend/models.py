@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Integer, String, DateTime, Float, Boolean, UniqueConstraint
 from database import Base
 
 class User(Base):
@@ -22,6 +22,8 @@ class User(Base):
     address = Column(String, nullable=True)
     state_residence = Column(String, nullable=True)
     lga_residence = Column(String, nullable=True)
+    # Set for accounts given a temporary password (bulk import); cleared by /auth/change-password
+    must_change_password = Column(Boolean, nullable=True, default=False)
 
 class News(Base):
     __tablename__ = "news"
@@ -32,6 +34,10 @@ class News(Base):
     date = Column(String) # For now keeping string as per frontend request "Today, 10:00 AM" or ISO
     type = Column(String) # Mobilization, Official, Guide
     url = Column(String, nullable=True)
+    # Dedupe keys for fetched news (see services/news_service.py): the normalized
+    # URL (or title, without a URL) and the normalized title
+    fingerprint = Column(String, nullable=True, unique=True, index=True)
+    title_key = Column(String, nullable=True, index=True)
 
 class Clearance(Base):
     __tablename__ = "clearances"
@@ -56,3 +62,25 @@ class Resource(Base):
     date_added = Column(String)
     is_official = Column(String, default="true") # "true" means uploaded by admin
 
+
+class JobRun(Base):
+    __tablename__ = "job_runs"
+    # One row per job per schedule slot, so a run is never repeated by another worker
+    __table_args__ = (UniqueConstraint("job", "slot"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    job = Column(String, index=True) # e.g. "fetch_news"
+    slot = Column(String) # Start of the schedule interval the run belongs to
+    status = Column(String) # running, succeeded, failed
+    worker = Column(String) # host:pid that ran it
+    attempts = Column(Integer, default=1)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime, nullable=True)
+    duration_ms = Column(Float, nullable=True)
+    error = Column(String, nullable=True)
+
+class CacheVersion(Base):
+    __tablename__ = "cache_versions"
+    # Bumped on every invalidation so all workers drop their in-process copies (see services/answer_cache.py)
+    name = Column(String, primary_key=True)
+    version = Column(Integer, default=0)
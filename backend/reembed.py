@@ -0,0 +1,65 @@
+import time
+import argparse
+from dotenv import load_dotenv
+
+# Before the services imports: their settings are read at import time
+load_dotenv()
+
+from langchain_community.vectorstores import Chroma
+from services.embedding_cache import CachedEmbeddings
+from services.embedding_backends import EMBEDDING_BACKEND, BACKENDS, build_backend, collection_name
+from services.lexical_index import load_chroma_documents
+from services.vector_index import export_from_chroma, VECTOR_INDEX_PATH
+from services.ingest_manifest import IngestManifest
+
+DB_PATH = "chroma_db"
+
+# Re-embeds the chunks already in the vector store with another embedding backend,
+# without re-reading the PDFs. Example: python reembed.py --backend hashing
+def reembed(backend: str, source: str, batch_size: int):
+    target = collection_name(backend)
+    if source == target:
+        print(f"Source and target are both '{target}'; nothing to do.")
+        return
+
+    print(f"Reading chunks from collection '{source}'...")
+    chunks = load_chroma_documents(DB_PATH, source, with_ids=True)
+    if not chunks:
+        print("No chunks found! Run ingest.py first.")
+        return
+
+    embedding_function = CachedEmbeddings(build_backend(backend))
+    vector_db = Chroma(persist_directory=DB_PATH, embedding_function=embedding_function, collection_name=target)
+    # Start clean so a re-run never leaves duplicates behind
+    vector_db.delete_collection()
+    vector_db = Chroma(persist_directory=DB_PATH, embedding_function=embedding_function, collection_name=target)
+
+    print(f"Embedding {len(chunks)} chunks with '{backend}' into '{target}'...")
+    started = time.perf_counter()
+    for i in range(0, len(chunks), batch_size):
+        batch = chunks[i:i + batch_size]
+        # Same chunk IDs as the source, so the ingest manifest stays valid for the new collection
+        vector_db.add_texts([text for _, text, _ in batch], metadatas=[metadata or {} for _, _, metadata in batch],
+                            ids=[chunk_id for chunk_id, _, _ in batch])
+        print(f"  {min(i + batch_size, len(chunks))}/{len(chunks)}")
+    elapsed = time.perf_counter() - started
+
+    print(f"Done in {elapsed:.1f}s ({len(chunks) / elapsed:.0f} chunks/s).")
+
+    manifest = IngestManifest.load()
+    if manifest.has_collection(source):
+        manifest.data["collections"][target] = dict(manifest.files(source))
+        manifest.save()
+
+    export_from_chroma(DB_PATH, target, VECTOR_INDEX_PATH)
+    print(f"Vector index re-exported to '{VECTOR_INDEX_PATH}'.")
+    print(f"Set EMBEDDING_BACKEND={backend} to serve from it.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-embed the stored corpus with another backend.")
+    parser.add_argument("--backend", default=EMBEDDING_BACKEND, choices=sorted(BACKENDS))
+    parser.add_argument("--source", default=collection_name("openai"), help="collection to copy chunks from")
+    parser.add_argument("--batch-size", type=int, default=256)
+    args = parser.parse_args()
+    reembed(args.backend, args.source, args.batch_size)
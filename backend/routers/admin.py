@@ -1,13 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, UploadFile, File, status
 from sqlalchemy.orm import Session
 from database import get_db
 from models import User
-from auth import get_current_user
+from auth import get_current_principal
+from services.principal_cache import Principal
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
 
 @router.get("/users")
-def get_all_users(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+def get_all_users(current_user: Principal = Depends(get_current_principal), db: Session = Depends(get_db)):
     if current_user.role != "Official":
         raise HTTPException(status_code=403, detail="Not authorized")
     
@@ -15,7 +16,7 @@ def get_all_users(current_user: User = Depends(get_current_user), db: Session =
     return users
 
 @router.get("/stats")
-def get_stats(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+def get_stats(current_user: Principal = Depends(get_current_principal), db: Session = Depends(get_db)):
     if current_user.role != "Official":
         raise HTTPException(status_code=403, detail="Not authorized")
     
@@ -39,10 +40,18 @@ class NewsCreate(BaseModel):
     url: str | None = None
 
 from models import News
+from services.answer_cache import answer_cache
+from services.news_index import index_news, news_item
+from services.response_cache import response_cache, NEWS_CACHE_KEY
 import datetime
 
+def index_posted_news(items):
+    index_news(items)
+    # Questions answered while the post was being embedded couldn't see it yet
+    answer_cache.invalidate("admin news indexed")
+
 @router.post("/news")
-def create_news(news: NewsCreate, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+def create_news(news: NewsCreate, background_tasks: BackgroundTasks, current_user: Principal = Depends(get_current_principal), db: Session = Depends(get_db)):
     if current_user.role != "Official":
         raise HTTPException(status_code=403, detail="Not authorized")
     
@@ -59,4 +68,39 @@ def create_news(news: NewsCreate, current_user: User = Depends(get_current_user)
     )
     db.add(new_news)
     db.commit()
+    db.refresh(new_news)
+    answer_cache.invalidate("admin news post")
+    response_cache.invalidate(NEWS_CACHE_KEY, reason="admin news post")
+    # Embedding happens after the response is sent
+    background_tasks.add_task(index_posted_news, [news_item(new_news)])
     return {"message": "News posted successfully"}
+
+from fastapi import Response
+from services.member_import import detect_format, import_members, report_csv
+
+@router.post("/import-corps-members")
+def import_corps_members(response: Response, file: UploadFile = File(...), output: str = "json",
+                         current_user: Principal = Depends(get_current_principal)):
+    """
+    Bulk-creates Corps Member accounts from a CSV or NDJSON upload (email, name,
+    state_code, state, lga, ppa, cds_group). Returns per-row errors and the
+    temporary passwords of the accounts created, as JSON or, with
+    ?output=csv, as a CSV download. Only password hashes are stored, so this
+    response is the only copy of the passwords; each account must change its
+    password at first login.
+    """
+    if current_user.role not in ["Official", "Admin"]:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    fmt = detect_format(file.filename, file.content_type)
+    if fmt is None:
+        raise HTTPException(status_code=400, detail="Upload a .csv or .ndjson file")
+    if output not in ("json", "csv"):
+        raise HTTPException(status_code=400, detail="output must be json or csv")
+    # Read, hashed and inserted in chunks (see services/member_import.py)
+    report = import_members(file.file, fmt)
+    headers = {"Cache-Control": "no-store"}
+    if output == "csv":
+        headers["Content-Disposition"] = 'attachment; filename="corps-member-credentials.csv"'
+        return Response(content=report_csv(report), media_type="text/csv", headers=headers)
+    response.headers.update(headers)
+    return report
@@ -1,9 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
-from database import get_db
+from database import get_db, SessionLocal
 from models import User
-from auth import get_password_hash, verify_password, create_access_token, get_current_user
+from auth import (get_password_hash, get_password_hash_async, verify_password_async, password_needs_rehash,
+                  create_access_token, get_current_user, invalidate_user, AUTH_ROLE_CLAIMS)
+from services.password_hasher import password_hasher
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
@@ -51,20 +55,51 @@ class UserResponse(BaseModel):
     phone: str | None = None
     mobilization_date: str | None = None
     pop_date: str | None = None
+    must_change_password: bool = False
     token: str | None = None
 
     class Config:
         orm_mode = True
 
+# signup, login and social-login are async: they await bcrypt on its own pool
+# (auth.py) without holding one of the server's threads, and run their
+# database work in the threadpool
+def normalize_email(email: str):
+    # New accounts (and bulk imports) store emails lowercased
+    return (email or "").strip().lower()
+
+def _find_user(db: Session, email: str):
+    email = normalize_email(email)
+    user = db.query(User).filter(User.email == email).first()
+    if user is None:
+        # Accounts created before emails were normalized may keep their casing
+        user = db.query(User).filter(func.lower(User.email) == email).first()
+    if user is not None:
+        db.expunge(user)
+    # Hand the connection back to the pool before waiting on bcrypt
+    db.rollback()
+    return user
+
+def _save_new_user(db: Session, new_user: User, label: str):
+    try:
+        db.add(new_user)
+        db.commit()
+        db.refresh(new_user)
+    except Exception as e:
+        print(f"------------ {label} ERROR ------------")
+        print(f"Error creating user: {e}")
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
+
 @router.post("/signup", response_model=UserResponse)
-def signup(user: UserCreate, db: Session = Depends(get_db)):
-    db_user = db.query(User).filter(User.email == user.email).first()
+async def signup(user: UserCreate, db: Session = Depends(get_db)):
+    db_user = await run_in_threadpool(_find_user, db, user.email)
     if db_user:
         raise HTTPException(status_code=400, detail="Email already registered")
     
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await get_password_hash_async(user.password)
     new_user = User(
-        email=user.email,
+        email=normalize_email(user.email),
         hashed_password=hashed_password,
         name=user.name,
         role=user.role,
@@ -75,18 +110,10 @@ def signup(user: UserCreate, db: Session = Depends(get_db)):
         mobilization_date=user.mobilization_date,
         pop_date=user.pop_date
     )
-    try:
-        db.add(new_user)
-        db.commit()
-        db.refresh(new_user)
-    except Exception as e:
-        print(f"------------ SIGNUP ERROR ------------")
-        print(f"Error creating user: {e}")
-        db.rollback()
-        raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
+    await run_in_threadpool(_save_new_user, db, new_user, "SIGNUP")
     
     # Auto-login after signup
-    access_token = create_access_token(data={"sub": new_user.email})
+    access_token = create_access_token(data={"sub": new_user.email}, user=new_user)
     
     # Create response object manually since Pydantic/SQLAlchemy mapping can be tricky with extra fields
     return UserResponse(
@@ -98,13 +125,30 @@ def signup(user: UserCreate, db: Session = Depends(get_db)):
         token=access_token
     )
 
+def rehash_password(user_id: int, password: str):
+    # Runs after the login response: moves the stored hash to the current BCRYPT_ROUNDS
+    db = SessionLocal()
+    try:
+        db_user = db.query(User).filter(User.id == user_id).first()
+        if db_user and password_needs_rehash(db_user.hashed_password):
+            db_user.hashed_password = get_password_hash(password)
+            db.commit()
+            invalidate_user(db_user.email)
+            password_hasher.record_rehash()
+    except Exception as e:
+        print(f"Password rehash skipped: {e}")
+    finally:
+        db.close()
+
 @router.post("/login")
-def login(user: UserLogin, db: Session = Depends(get_db)):
-    db_user = db.query(User).filter(User.email == user.email).first()
-    if not db_user or not verify_password(user.password, db_user.hashed_password):
+async def login(user: UserLogin, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+    db_user = await run_in_threadpool(_find_user, db, user.email)
+    if not db_user or not await verify_password_async(user.password, db_user.hashed_password):
         raise HTTPException(status_code=400, detail="Invalid credentials")
+    if password_needs_rehash(db_user.hashed_password):
+        background_tasks.add_task(rehash_password, db_user.id, user.password)
     
-    access_token = create_access_token(data={"sub": db_user.email})
+    access_token = create_access_token(data={"sub": db_user.email}, user=db_user)
     
     return {
         "id": db_user.id,
@@ -112,40 +156,33 @@ def login(user: UserLogin, db: Session = Depends(get_db)):
         "name": db_user.name,
         "role": db_user.role,
         "state": db_user.state,
+        "must_change_password": bool(db_user.must_change_password),
         "token": access_token
     }
 
 @router.post("/social-login", response_model=UserResponse)
-def social_login(user: UserSocialLogin, db: Session = Depends(get_db)):
+async def social_login(user: UserSocialLogin, db: Session = Depends(get_db)):
     # 1. Check if user already exists
-    db_user = db.query(User).filter(User.email == user.email).first()
+    db_user = await run_in_threadpool(_find_user, db, user.email)
     
     if not db_user:
         # 2. If not, create a new user with a random password
         import secrets
         random_password = secrets.token_urlsafe(16)
-        hashed_password = get_password_hash(random_password)
+        hashed_password = await get_password_hash_async(random_password)
         
         new_user = User(
-            email=user.email,
+            email=normalize_email(user.email),
             hashed_password=hashed_password,
             name=user.name or "Social User",
             role="Corps Member",  # Default role
             state="Pending"       # Default state
         )
-        try:
-            db.add(new_user)
-            db.commit()
-            db.refresh(new_user)
-            db_user = new_user
-        except Exception as e:
-            print(f"------------ SOCIAL SIGNUP ERROR ------------")
-            print(f"Error creating social user: {e}")
-            db.rollback()
-            raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
+        await run_in_threadpool(_save_new_user, db, new_user, "SOCIAL SIGNUP")
+        db_user = new_user
     
     # 3. Generate Access Token
-    access_token = create_access_token(data={"sub": db_user.email})
+    access_token = create_access_token(data={"sub": db_user.email}, user=db_user)
     
     return UserResponse(
         id=db_user.id,
@@ -171,6 +208,12 @@ class UserUpdate(BaseModel):
 
 @router.put("/profile", response_model=UserResponse)
 def update_profile(user_update: UserUpdate, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    # get_current_user may come from the principal cache; change the stored row
+    current_user = db.query(User).filter(User.id == current_user.id).first()
+    if current_user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    claims = (current_user.role, current_user.state)
+
     # Update fields if provided
     if user_update.name: current_user.name = user_update.name
     if user_update.role: current_user.role = user_update.role
@@ -190,6 +233,12 @@ def update_profile(user_update: UserUpdate, current_user: User = Depends(get_cur
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Failed to update profile: {str(e)}")
+    invalidate_user(current_user.email)
+
+    # Tokens carrying role/state claims are reissued when those change
+    token = None
+    if AUTH_ROLE_CLAIMS and claims != (current_user.role, current_user.state):
+        token = create_access_token(data={"sub": current_user.email}, user=current_user)
     
     return UserResponse(
         id=current_user.id,
@@ -206,7 +255,7 @@ def update_profile(user_update: UserUpdate, current_user: User = Depends(get_cur
         phone=current_user.phone,
         mobilization_date=current_user.mobilization_date,
         pop_date=current_user.pop_date,
-        token=None # No new token needed
+        token=token
     )
 
 @router.get("/me", response_model=UserResponse)
@@ -227,5 +276,32 @@ def read_users_me(current_user: User = Depends(get_current_user)):
         phone=current_user.phone,
         mobilization_date=current_user.mobilization_date,
         pop_date=current_user.pop_date,
+        must_change_password=bool(current_user.must_change_password),
         token=None # No new token needed
     )
+
+class PasswordChange(BaseModel):
+    current_password: str
+    new_password: str
+
+def _store_password(user_id: int, hashed_password: str):
+    db = SessionLocal()
+    try:
+        db_user = db.query(User).filter(User.id == user_id).first()
+        db_user.hashed_password = hashed_password
+        db_user.must_change_password = False
+        db.commit()
+    finally:
+        db.close()
+
+@router.post("/change-password")
+async def change_password(passwords: PasswordChange, current_user: User = Depends(get_current_user)):
+    # Required after a bulk import, whose temporary passwords are handed out in plain text
+    if not await verify_password_async(passwords.current_password, current_user.hashed_password):
+        raise HTTPException(status_code=400, detail="Current password is incorrect")
+    if len(passwords.new_password) < 8 or passwords.new_password == passwords.current_password:
+        raise HTTPException(status_code=400, detail="Choose a new password of at least 8 characters")
+    hashed_password = await get_password_hash_async(passwords.new_password)
+    await run_in_threadpool(_store_password, current_user.id, hashed_password)
+    invalidate_user(current_user.email)
+    return {"message": "Password changed"}
@@ -5,7 +5,8 @@ import models
 from pydantic import BaseModel
 from typing import List, Optional
 from datetime import datetime
-from auth import get_current_user
+from auth import get_current_user, get_current_principal
+from services.principal_cache import Principal
 from services.upload_service import upload_file
 
 router = APIRouter(
@@ -80,12 +81,12 @@ async def request_clearance(
 
 # 2. CM: View History
 @router.get("/my-history", response_model=List[ClearanceOut])
-async def get_my_history(db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
+async def get_my_history(db: Session = Depends(get_db), current_user: Principal = Depends(get_current_principal)):
     return db.query(models.Clearance).filter(models.Clearance.user_id == current_user.id).all()
 
 # 3. Official: View Pending Requests
 @router.get("/pending", response_model=List[ClearanceOut])
-async def get_pending_requests(db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
+async def get_pending_requests(db: Session = Depends(get_db), current_user: Principal = Depends(get_current_principal)):
     if current_user.role not in ["Official", "Admin"]:
         raise HTTPException(status_code=403, detail="Not authorized")
     
@@ -94,7 +95,7 @@ async def get_pending_requests(db: Session = Depends(get_db), current_user: mode
 
 # 4. Official: Approve/Reject
 @router.put("/{request_id}/action")
-async def action_clearance(request_id: int, action: ClearanceAction, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
+async def action_clearance(request_id: int, action: ClearanceAction, db: Session = Depends(get_db), current_user: Principal = Depends(get_current_principal)):
     if current_user.role not in ["Official", "Admin"]:
         raise HTTPException(status_code=403, detail="Not authorized")
     
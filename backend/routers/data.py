@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
 from models import User, News
 from database import get_db
 from sqlalchemy.orm import Session
@@ -9,9 +9,14 @@ import datetime
 router = APIRouter(prefix="/api", tags=["Data"])
 
 from models import News
+from services.response_cache import response_cache, NEWS_CACHE_KEY
 
 @router.get("/news")
-def get_news(db: Session = Depends(get_db)):
+def get_news(request: Request, db: Session = Depends(get_db)):
+    # Served from memory (with an ETag) until news is written; see services/response_cache.py
+    return response_cache.respond(request, NEWS_CACHE_KEY, lambda: latest_news(db))
+
+def latest_news(db: Session):
     news_items = db.query(News).order_by(News.id.desc()).limit(10).all()
     if not news_items:
         # Fallback for initial load
@@ -24,7 +29,10 @@ def get_news(db: Session = Depends(get_db)):
                 "url": "https://nysc.gov.ng"
             }
         ]
-    return news_items
+    return [
+        {"id": n.id, "title": n.title, "content": n.content, "date": n.date, "type": n.type, "url": n.url}
+        for n in news_items
+    ]
 
 @router.get("/timeline")
 def get_timeline(user: User = Depends(get_current_user)):
@@ -1,11 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.orm import Session
 from database import get_db
 import models
 from pydantic import BaseModel
 from typing import List, Optional
 from datetime import datetime
-from auth import get_current_user
+from auth import get_current_principal
+from services.principal_cache import Principal
+from services.response_cache import response_cache, RESOURCES_CACHE_KEY
 
 router = APIRouter(
     prefix="/resources",
@@ -28,13 +30,16 @@ class ResourceOut(BaseModel):
         from_attributes = True
 
 # 1. Get All Resources
+# Served from memory (with an ETag) until a resource is added
 @router.get("/", response_model=List[ResourceOut])
-async def get_resources(db: Session = Depends(get_db)):
-    return db.query(models.Resource).all()
+def get_resources(request: Request, db: Session = Depends(get_db)):
+    return response_cache.respond(request, RESOURCES_CACHE_KEY, lambda: [
+        ResourceOut.model_validate(r) for r in db.query(models.Resource).all()
+    ])
 
 # 2. Add Resource (Admin Only)
 @router.post("/")
-async def add_resource(res: ResourceCreate, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
+async def add_resource(res: ResourceCreate, db: Session = Depends(get_db), current_user: Principal = Depends(get_current_principal)):
     if current_user.role not in ["Official", "Admin"]:
         raise HTTPException(status_code=403, detail="Not authorized")
     
@@ -46,4 +51,5 @@ async def add_resource(res: ResourceCreate, db: Session = Depends(get_db), curre
     )
     db.add(new_resource)
     db.commit()
+    response_cache.invalidate(RESOURCES_CACHE_KEY, reason="resource added")
     return {"message": "Resource added successfully"}
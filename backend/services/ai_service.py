@@ -0,0 +1,257 @@
+import os
+import asyncio
+import threading
+
+from services import startup_timing
+
+# The AI SDKs (langchain_openai, langchain_google_genai, Chroma, tavily) take
+# seconds to import and initialize. Nothing here is touched until the first
+# question (or the background warm-up), so the rest of the API starts fast.
+
+DB_PATH = "chroma_db"
+DATA_PATH = "nysc_documents"
+
+_lock = threading.RLock()
+_components = {}
+
+
+def _has_openai_key():
+    key = os.getenv("OPENAI_API_KEY")
+    return bool(key) and not key.startswith("sk-placeholder")
+
+
+def _gemini_key():
+    return os.getenv("GEMINI_API_KEY") or os.getenv("GOOGLE_API_KEY")
+
+
+def _build_embeddings():
+    from services import embedding_backends
+    if embedding_backends.EMBEDDING_BACKEND == "openai" and not _has_openai_key():
+        return None
+    with startup_timing.timed(f"import {embedding_backends.EMBEDDING_BACKEND} embeddings", "import"):
+        backend = embedding_backends.build_backend()
+    from services.embedding_cache import CachedEmbeddings
+    return CachedEmbeddings(backend)
+
+
+def _build_vector_db():
+    from services.embedding_backends import collection_name
+    embedding_function = get_embedding_function()
+    if embedding_function is None:
+        return None
+    with startup_timing.timed("import chroma", "import"):
+        from langchain_community.vectorstores import Chroma
+    vector_db = Chroma(persist_directory=DB_PATH, embedding_function=embedding_function,
+                       collection_name=collection_name())
+    if vector_db._collection.count() == 0:
+        print(f"WARNING: Vector collection '{collection_name()}' is empty; run reembed.py or ingest.py.")
+    return vector_db
+
+
+def _build_llm_openai():
+    if not _has_openai_key():
+        return None
+    print("Initializing OpenAI...")
+    with startup_timing.timed("import langchain_openai", "import"):
+        from langchain_openai import ChatOpenAI
+    return ChatOpenAI(temperature=0.2, model="gpt-3.5-turbo")
+
+
+def _build_llm_gemini():
+    gemini_key = _gemini_key()
+    if not gemini_key:
+        return None
+    print("Initializing Gemini...")
+    with startup_timing.timed("import langchain_google_genai", "import"):
+        from langchain_google_genai import ChatGoogleGenerativeAI
+    # Note: If reusing ChromaDB embedded with OpenAI, switching LLMs is fine, but embeddings must match DB.
+    return ChatGoogleGenerativeAI(model="gemini-pro", google_api_key=gemini_key, temperature=0.2)
+
+
+def _build_llm():
+    # Every configured provider goes behind the router. OpenAI is tried first while both are
+    # healthy, until Gemini (reached by failover or hedging) shows a lower median latency
+    from services.llm_router import LLMRouter
+    providers = [(name, get_component(name)) for name in ("llm_openai", "llm_gemini")]
+    providers = [(name.replace("llm_", ""), llm) for name, llm in providers if llm]
+    if not providers:
+        print("WARNING: No valid API Key found (OpenAI or Gemini). AI features disabled.")
+        return None
+    print(f"LLM providers: {', '.join(name for name, _ in providers)}")
+    return LLMRouter(providers)
+
+
+def _build_tavily():
+    if not os.getenv("TAVILY_API_KEY"):
+        return None
+    with startup_timing.timed("import tavily", "import"):
+        from tavily import TavilyClient
+    return TavilyClient(api_key=os.getenv("TAVILY_API_KEY"))
+
+
+def _build_lexical_index():
+    from services.index_files import export_lock
+    from services.lexical_index import LexicalIndex, build_from_chroma, LEXICAL_INDEX_PATH
+    if LexicalIndex.exists():
+        return LexicalIndex.load()
+    if not os.path.isdir(DB_PATH):
+        return None
+    # Older deployments have no saved index yet; one worker builds it from the stored chunks
+    with export_lock(LEXICAL_INDEX_PATH):
+        if LexicalIndex.exists():
+            return LexicalIndex.load()
+        from services.embedding_backends import collection_name
+        print("Lexical index missing, building it from the Chroma store...")
+        return build_from_chroma(DB_PATH, collection_name=collection_name())
+
+
+def _load_vector_index():
+    from services.embedding_backends import collection_name
+    from services.vector_index import VectorIndex
+    if VectorIndex.exists():
+        index = VectorIndex.load()
+        if index.meta.get("collection") == collection_name():
+            return index
+    return None
+
+
+def _build_vector_index():
+    from services.embedding_backends import collection_name
+    from services.index_files import export_lock
+    from services.vector_index import export_from_chroma, VECTOR_INDEX_PATH
+    index = _load_vector_index()
+    if index is not None or not os.path.isdir(DB_PATH):
+        return index
+    # Every worker warms up at once; the first exports, the rest wait and load its result
+    with export_lock(VECTOR_INDEX_PATH):
+        index = _load_vector_index()
+        if index is None:
+            print("Vector index missing or for another embedding backend, exporting it from the Chroma store...")
+            index = export_from_chroma(DB_PATH, collection_name())
+    return index
+
+
+def _build_news_index():
+    from services.embedding_backends import collection_name
+    from services.news_index import NewsIndex
+    embedding_function = get_embedding_function()
+    if embedding_function is None:
+        return None
+    with startup_timing.timed("import chroma", "import"):
+        from langchain_community.vectorstores import Chroma
+    # Small and written incrementally, so it stays in Chroma rather than the mmap export
+    store = Chroma(persist_directory=DB_PATH, embedding_function=embedding_function,
+                   collection_name=f"{collection_name()}_news")
+    return NewsIndex(store)
+
+
+def _build_faq_index():
+    from services.faq_service import FAQIndex, FAQ_INDEX_PATH, build_faq_index
+    if os.path.exists(FAQ_INDEX_PATH):
+        return FAQIndex.load(FAQ_INDEX_PATH)
+    # Not ingested yet: extracting the FAQ PDF directly only takes a moment. The
+    # index is renamed into place under its export lock, so loads never see half a file
+    return build_faq_index(DATA_PATH, FAQ_INDEX_PATH)
+
+
+_FACTORIES = {
+    "embeddings": _build_embeddings,
+    "vector_db": _build_vector_db,
+    "llm_openai": _build_llm_openai,
+    "llm_gemini": _build_llm_gemini,
+    "llm": _build_llm,
+    "tavily": _build_tavily,
+    "lexical_index": _build_lexical_index,
+    "vector_index": _build_vector_index,
+    "news_index": _build_news_index,
+    "faq_index": _build_faq_index,
+}
+
+
+def get_component(name: str):
+    """
+    Returns the named component, building it on first use.
+    A component that fails to build is logged and stays None.
+    """
+    if name in _components:
+        return _components[name]
+    with _lock:
+        if name not in _components:
+            try:
+                with startup_timing.timed(name, "init"):
+                    _components[name] = _FACTORIES[name]()
+            except Exception as e:
+                print(f"WARNING: Failed to initialize AI component '{name}': {e}")
+                _components[name] = None
+        return _components[name]
+
+
+def is_loaded(name: str):
+    return name in _components
+
+
+def get_embedding_function():
+    return get_component("embeddings")
+
+
+def get_vector_db():
+    return get_component("vector_db")
+
+
+def get_llm():
+    return get_component("llm")
+
+
+def get_tavily():
+    return get_component("tavily")
+
+
+def get_lexical_index():
+    return get_component("lexical_index")
+
+
+def get_vector_index():
+    return get_component("vector_index")
+
+
+def get_news_index():
+    return get_component("news_index")
+
+
+def get_faq_index():
+    return get_component("faq_index")
+
+
+def default_components():
+    # Only one vector store is needed; Chroma is still loaded on demand as a fallback
+    from services.vector_index import VECTOR_STORE
+    skip = "vector_db" if VECTOR_STORE == "mmap" else "vector_index"
+    return tuple(name for name in _FACTORIES if name != skip)
+
+
+async def ensure_loaded(*names):
+    """
+    Async-friendly loader: if anything still needs importing, do it on a
+    worker thread so the event loop keeps serving other requests.
+    """
+    names = names or default_components()
+    if not all(is_loaded(n) for n in names):
+        await asyncio.to_thread(lambda: [get_component(n) for n in names])
+
+
+def warm_up():
+    """Loads every component on a background thread."""
+    def run():
+        with startup_timing.timed("ai warm-up (total)", "warmup"):
+            for name in default_components():
+                get_component(name)
+        print("AI components ready.")
+
+    thread = threading.Thread(target=run, name="ai-warm-up", daemon=True)
+    thread.start()
+    return thread
+
+
+def status():
+    return {name: ("ready" if _components.get(name) else "unavailable") if name in _components else "not loaded"
+            for name in _FACTORIES}
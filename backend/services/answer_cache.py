@@ -0,0 +1,241 @@
+import os
+import re
+import time
+import threading
+import unicodedata
+from collections import OrderedDict
+
+import numpy as np
+
+ANSWER_CACHE_TTL_SECONDS = int(os.getenv("ANSWER_CACHE_TTL_SECONDS", "3600"))
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "512"))
+# Cosine similarity needed for a paraphrase to count as the same question.
+# Set above 1.0 to disable the semantic lookup and keep exact matches only.
+ANSWER_CACHE_SIMILARITY = float(os.getenv("ANSWER_CACHE_SIMILARITY", "0.95"))
+# How often a worker checks for invalidations made by other workers (news
+# fetched by the scheduler leader, or posted to another worker)
+ANSWER_CACHE_SYNC_SECONDS = float(os.getenv("ANSWER_CACHE_SYNC_SECONDS", "5"))
+
+
+def normalize_text(text: str):
+    """
+    Lowercases, strips punctuation (keeping '/' for state codes like LA/24A)
+    and collapses whitespace so trivially different questions share a key.
+    """
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    text = re.sub(r"[^\w/\s]", " ", text)
+    return " ".join(text.split())
+
+
+class _Entry:
+    __slots__ = ("answer", "embedding", "created_at", "compute_seconds")
+
+    def __init__(self, answer, embedding, compute_seconds):
+        self.answer = answer
+        self.embedding = embedding
+        self.created_at = time.monotonic()
+        self.compute_seconds = compute_seconds
+
+
+class SharedVersion:
+    """Invalidation counter in the cache_versions table, shared by every worker using the database."""
+
+    def __init__(self, name: str = "answers", session_factory=None):
+        self.name = name
+        self.session_factory = session_factory
+
+    def _session(self):
+        if self.session_factory is None:
+            from database import SessionLocal
+            self.session_factory = SessionLocal
+        return self.session_factory()
+
+    def get(self):
+        import models
+
+        db = self._session()
+        try:
+            version = db.query(models.CacheVersion.version).filter(models.CacheVersion.name == self.name).scalar()
+            return version or 0
+        finally:
+            db.close()
+
+    def bump(self):
+        """Increments the version and returns the new value."""
+        import models
+        from sqlalchemy.exc import IntegrityError
+
+        db = self._session()
+        try:
+            for _ in range(2):
+                row = models.CacheVersion.name == self.name
+                if db.query(models.CacheVersion).filter(row).update(
+                        {"version": models.CacheVersion.version + 1}, synchronize_session=False):
+                    db.commit()
+                    return db.query(models.CacheVersion.version).filter(row).scalar()
+                db.add(models.CacheVersion(name=self.name, version=1))
+                try:
+                    db.commit()
+                    return 1
+                except IntegrityError:
+                    # Another worker created the row first; increment it instead
+                    db.rollback()
+            raise RuntimeError(f"Could not bump cache version '{self.name}'")
+        finally:
+            db.close()
+
+
+class AnswerCache:
+    """
+    In-process LRU cache of generated answers.
+
+    Lookups try the normalized question text first, then fall back to the
+    closest cached question embedding above the similarity threshold. With
+    a SharedVersion, an invalidation in any worker reaches the others at
+    their next sync (every `sync_seconds`).
+    """
+
+    def __init__(self, ttl_seconds=ANSWER_CACHE_TTL_SECONDS, max_entries=ANSWER_CACHE_MAX_ENTRIES,
+                 similarity_threshold=ANSWER_CACHE_SIMILARITY, shared=None, sync_seconds=ANSWER_CACHE_SYNC_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+        self.shared = shared
+        self.sync_seconds = sync_seconds
+        self._shared_seen = None
+        self._next_sync = 0.0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped by invalidate, so an answer built from context read before it isn't stored
+        self._generation = 0
+        self._stats = {
+            "exact_hits": 0,
+            "semantic_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "invalidations": 0,
+            "stale_puts": 0,
+            "remote_invalidations": 0,
+            "saved_seconds": 0.0,
+        }
+
+    @property
+    def generation(self):
+        """Read before the lookup and pass to put()."""
+        return self._generation
+
+    @property
+    def semantic_enabled(self):
+        return self.similarity_threshold <= 1.0
+
+    def _is_fresh(self, entry):
+        return time.monotonic() - entry.created_at < self.ttl_seconds
+
+    def _hit(self, key, entry, kind):
+        self._entries.move_to_end(key)
+        self._stats[kind] += 1
+        self._stats["saved_seconds"] += entry.compute_seconds
+        return entry.answer
+
+    def get(self, question: str):
+        """Exact (normalized text) lookup. Returns the cached answer or None."""
+        key = normalize_text(question)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if self._is_fresh(entry):
+                    return self._hit(key, entry, "exact_hits")
+                del self._entries[key]
+            return None
+
+    def get_similar(self, embedding):
+        """Semantic lookup by question embedding. Counts a miss when nothing is close enough."""
+        with self._lock:
+            if self.semantic_enabled and embedding is not None:
+                # Drop expired entries first so they can't win the comparison
+                for key in [k for k, e in self._entries.items() if not self._is_fresh(e)]:
+                    del self._entries[key]
+
+                candidates = [(k, e) for k, e in self._entries.items() if e.embedding is not None]
+                if candidates:
+                    query = _unit(embedding)
+                    matrix = np.stack([e.embedding for _, e in candidates])
+                    scores = matrix @ query
+                    best = int(np.argmax(scores))
+                    if scores[best] >= self.similarity_threshold:
+                        key, entry = candidates[best]
+                        return self._hit(key, entry, "semantic_hits")
+
+            self._stats["misses"] += 1
+            return None
+
+    def put(self, question: str, answer: str, embedding=None, compute_seconds: float = 0.0, generation: int = None):
+        """Stores an answer; dropped if the cache was invalidated since `generation` was read."""
+        key = normalize_text(question)
+        vector = _unit(embedding) if embedding is not None else None
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                self._stats["stale_puts"] += 1
+                return
+            self._entries[key] = _Entry(answer, vector, compute_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def _clear(self):
+        with self._lock:
+            dropped = len(self._entries)
+            self._entries.clear()
+            self._generation += 1
+            self._stats["invalidations"] += 1
+        return dropped
+
+    def invalidate(self, reason: str = ""):
+        """Drops every cached answer (e.g. when fresh news lands), here and, via the shared version, in other workers."""
+        dropped = self._clear()
+        if self.shared is not None:
+            try:
+                self._shared_seen = self.shared.bump()
+            except Exception as e:
+                print(f"Answer cache: could not publish invalidation to other workers: {e}")
+        print(f"Answer cache invalidated ({reason or 'manual'}): dropped {dropped} entries.")
+
+    def sync_due(self):
+        return self.shared is not None and time.monotonic() >= self._next_sync
+
+    def sync(self):
+        """Drops every cached answer if another worker invalidated since the last sync. Does a DB read."""
+        self._next_sync = time.monotonic() + self.sync_seconds
+        try:
+            version = self.shared.get()
+        except Exception as e:
+            print(f"Answer cache: shared version check failed: {e}")
+            return
+        if self._shared_seen is not None and version != self._shared_seen:
+            dropped = self._clear()
+            self._stats["remote_invalidations"] += 1
+            print(f"Answer cache invalidated by another worker: dropped {dropped} entries.")
+        self._shared_seen = version
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+        hits = stats["exact_hits"] + stats["semantic_hits"]
+        lookups = hits + stats["misses"]
+        stats["hit_rate"] = round(hits / lookups, 4) if lookups else 0.0
+        stats["saved_seconds"] = round(stats["saved_seconds"], 3)
+        stats["similarity_threshold"] = self.similarity_threshold
+        stats["ttl_seconds"] = self.ttl_seconds
+        return stats
+
+
+def _unit(vector):
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+# Shared instance used by the answer pipeline and invalidated by news writers
+answer_cache = AnswerCache(shared=SharedVersion())
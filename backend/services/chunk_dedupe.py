@@ -0,0 +1,103 @@
+import os
+import re
+import zlib
+
+import numpy as np
+
+# Estimated Jaccard similarity (of word 5-gram shingles) at which a chunk counts
+# as a near-duplicate of one already kept; 0 keeps everything
+CHUNK_DEDUPE_THRESHOLD = float(os.getenv("CHUNK_DEDUPE_THRESHOLD", "0.85"))
+
+SHINGLE_WORDS = 5
+NUM_PERMUTATIONS = 64
+# 16 bands of 4 rows: pairs above ~0.5 similarity almost always share a band
+BANDS = 16
+PRIME = (1 << 31) - 1
+WORD_RE = re.compile(r"[a-z0-9]+")
+
+_rng = np.random.default_rng(1)
+_A = _rng.integers(1, PRIME, size=NUM_PERMUTATIONS, dtype=np.uint64)
+_B = _rng.integers(0, PRIME, size=NUM_PERMUTATIONS, dtype=np.uint64)
+
+
+def shingles(text: str, size: int = SHINGLE_WORDS):
+    words = WORD_RE.findall((text or "").lower())
+    if len(words) <= size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def minhash(text: str):
+    """MinHash signature (uint64 array) of the text's shingle set, or None for empty text."""
+    found = shingles(text)
+    if not found:
+        return None
+    hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) & PRIME for s in found), dtype=np.uint64, count=len(found))
+    # Each row is one random permutation h(x) = (a*x + b) mod p; all products fit in 64 bits
+    return ((np.outer(hashes, _A) + _B) % PRIME).min(axis=0)
+
+
+class ChunkDeduplicator:
+    """
+    Streaming near-duplicate filter. Chunks are checked against everything
+    kept so far; LSH banding keeps each check to a handful of candidates
+    instead of the whole corpus.
+
+    Chunks can carry an owner (the source file). When a chunk is dropped as
+    a repeat of another owner's chunk, `depends_on[owner]` records that
+    owner, since the passage now survives only in its copy.
+    """
+
+    def __init__(self, threshold: float = CHUNK_DEDUPE_THRESHOLD):
+        self.threshold = threshold
+        self.rows = NUM_PERMUTATIONS // BANDS
+        self._buckets = [{} for _ in range(BANDS)]
+        self._signatures = []
+        self._owners = []
+        self.depends_on = {}  # owner -> owners whose kept chunks its dropped chunks repeat
+        self.stats = {"checked": 0, "duplicates": 0}
+
+    @property
+    def enabled(self):
+        return self.threshold > 0
+
+    def _bands(self, signature):
+        for band in range(BANDS):
+            yield band, signature[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    def add(self, text: str, owner=None):
+        """Remembers a chunk that is kept regardless (e.g. already stored)."""
+        signature = minhash(text)
+        if signature is None:
+            return
+        index = len(self._signatures)
+        self._signatures.append(signature)
+        self._owners.append(owner)
+        for band, key in self._bands(signature):
+            self._buckets[band].setdefault(key, []).append(index)
+
+    def is_duplicate(self, text: str, owner=None):
+        """True if the text nearly repeats a kept chunk; otherwise keeps it and returns False."""
+        self.stats["checked"] += 1
+        if not self.enabled:
+            return False
+        signature = minhash(text)
+        if signature is None:
+            return False
+        candidates = set()
+        for band, key in self._bands(signature):
+            candidates.update(self._buckets[band].get(key, ()))
+        for index in candidates:
+            if np.mean(self._signatures[index] == signature) >= self.threshold:
+                self.stats["duplicates"] += 1
+                kept_by = self._owners[index]
+                if owner is not None and kept_by is not None and kept_by != owner:
+                    self.depends_on.setdefault(owner, set()).add(kept_by)
+                return True
+        self.add(text, owner)
+        return False
+
+    def report(self):
+        checked = self.stats["checked"]
+        return dict(self.stats, threshold=self.threshold,
+                    reduction=round(self.stats["duplicates"] / checked, 4) if checked else 0.0)
@@ -0,0 +1,185 @@
+import os
+import threading
+
+# Default context budget (tokens) for retrieved + web passages, per model.
+# CONTEXT_TOKEN_BUDGET overrides it for every model.
+MODEL_CONTEXT_BUDGETS = {
+    "gpt-3.5-turbo": 1500,
+    "gpt-4o-mini": 2500,
+    "gemini-pro": 2000,
+}
+DEFAULT_CONTEXT_BUDGET = 1500
+# Blank (as shipped in .env.example) means unset
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET") or 0) or None
+# Share of the budget reserved for web news; unused space goes to the other side
+CONTEXT_WEB_SHARE = float(os.getenv("CONTEXT_WEB_SHARE", "0.35"))
+# Overlaps shorter than this are treated as coincidence, not chunk overlap
+MIN_OVERLAP_CHARS = 40
+# Don't bother squeezing in a truncated passage smaller than this
+MIN_PASSAGE_TOKENS = 40
+
+_encodings = {}
+_lock = threading.Lock()
+_stats = {"requests": 0, "tokens_in": 0, "tokens_out": 0, "overlap_chars_removed": 0, "passages_dropped": 0}
+
+
+def _encoding(model_name: str):
+    """tiktoken encoding for the model, or None if tiktoken can't load (e.g. offline)."""
+    key = model_name or ""
+    if key not in _encodings:
+        try:
+            import tiktoken
+            try:
+                _encodings[key] = tiktoken.encoding_for_model(key)
+            except KeyError:
+                _encodings[key] = tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            print(f"tiktoken unavailable ({type(e).__name__}); estimating tokens from length.")
+            _encodings[key] = None
+    return _encodings[key]
+
+
+def count_tokens(text: str, model_name: str = None):
+    encoding = _encoding(model_name)
+    if encoding is None:
+        # ~4 characters per token for English text
+        return (len(text) + 3) // 4
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def budget_for(model_name: str = None):
+    if CONTEXT_TOKEN_BUDGET:
+        return CONTEXT_TOKEN_BUDGET
+    for prefix, budget in MODEL_CONTEXT_BUDGETS.items():
+        if model_name and model_name.startswith(prefix):
+            return budget
+    return DEFAULT_CONTEXT_BUDGET
+
+
+def _overlap(a: str, b: str):
+    """Length of the longest suffix of `a` that is also a prefix of `b`."""
+    longest = min(len(a), len(b))
+    for size in range(longest, MIN_OVERLAP_CHARS - 1, -1):
+        if a.endswith(b[:size]):
+            return size
+    return 0
+
+
+def remove_overlaps(passages):
+    """
+    Drops passages already contained in a higher-ranked one and trims text
+    shared with a higher-ranked passage at either edge (the splitter's
+    chunk_overlap). `passages` are (text, item) pairs, best first; the kept
+    pairs keep their item, so sources stay attached to the right text.
+    """
+    kept = []
+    removed = 0
+    for text, item in passages:
+        text = text.strip()
+        if any(text in k for k, _ in kept):
+            removed += len(text)
+            continue
+        for k, _ in kept:
+            head = _overlap(k, text)
+            if head:
+                text, removed = text[head:].lstrip(), removed + head
+            tail = _overlap(text, k)
+            if tail:
+                text, removed = text[:-tail].rstrip(), removed + tail
+        kept.append((text, item))
+    return kept, removed
+
+
+def _truncate(text: str, max_tokens: int, model_name: str):
+    # Cut at a sentence end that fits; fall back to a plain character cut
+    approx = text[:max_tokens * 4]
+    while approx and count_tokens(approx, model_name) > max_tokens:
+        approx = approx[:int(len(approx) * 0.9)]
+    cut = max(approx.rfind(". "), approx.rfind("\n"))
+    return approx[:cut + 1] if cut > len(approx) // 2 else approx
+
+
+def _fill(passages, budget, model_name):
+    """Takes passages (best first) until the budget runs out. Returns (kept, tokens_used)."""
+    kept, used = [], 0
+    for text, item in passages:
+        if not text:
+            continue
+        tokens = count_tokens(text, model_name)
+        if used + tokens > budget:
+            remaining = budget - used
+            if remaining >= MIN_PASSAGE_TOKENS:
+                text = _truncate(text, remaining, model_name)
+                tokens = count_tokens(text, model_name)
+                kept.append((text, item))
+                used += tokens
+            break
+        kept.append((text, item))
+        used += tokens
+    return kept, used
+
+
+class PackedContext:
+    def __init__(self, documents, web_results, internal_text, web_text, tokens_in, tokens_out, budget):
+        self.documents = documents
+        self.web_results = web_results
+        self.internal_text = internal_text
+        self.web_text = web_text
+        self.tokens_in = tokens_in
+        self.tokens_out = tokens_out
+        self.budget = budget
+
+
+def pack(documents, web_results, model_name: str = None):
+    """
+    Builds the INTERNAL_KNOWLEDGE and WEB_NEWS blocks within the model's
+    token budget. Documents keep their retrieval order; web results are
+    ordered by their search score. Returns a PackedContext.
+    """
+    budget = budget_for(model_name)
+    web_results = sorted(web_results, key=lambda r: r.get("score") or 0, reverse=True)
+
+    doc_passages, removed = remove_overlaps([(d.page_content, d) for d in documents])
+    web_passages, web_removed = remove_overlaps([(r.get("content", ""), r) for r in web_results])
+    removed += web_removed
+
+    tokens_in = sum(count_tokens(d.page_content, model_name) for d in documents) + \
+        sum(count_tokens(r.get("content", ""), model_name) for r in web_results)
+
+    # Web gets its share first (it's usually short), internal docs take the rest
+    web_budget = int(budget * CONTEXT_WEB_SHARE) if doc_passages else budget
+    web_kept, web_used = _fill(web_passages, web_budget, model_name)
+    doc_kept, doc_used = _fill(doc_passages, budget - web_used, model_name)
+    if doc_used + web_used < budget and len(web_kept) < len(web_passages):
+        # Internal docs left room over: give it back to the web results
+        web_kept, web_used = _fill(web_passages, budget - doc_used, model_name)
+
+    tokens_out = doc_used + web_used
+    dropped = (len(documents) - len(doc_kept)) + (len(web_results) - len(web_kept))
+    with _lock:
+        _stats["requests"] += 1
+        _stats["tokens_in"] += tokens_in
+        _stats["tokens_out"] += tokens_out
+        _stats["overlap_chars_removed"] += removed
+        _stats["passages_dropped"] += dropped
+    print(f"Context packing: {tokens_in} -> {tokens_out} tokens (budget {budget}, "
+          f"{removed} overlap chars removed, {dropped} passages dropped)")
+
+    return PackedContext(
+        documents=[item for _, item in doc_kept],
+        web_results=[item for _, item in web_kept],
+        internal_text="\n\n".join(text for text, _ in doc_kept),
+        web_text="\n\n".join(text for text, _ in web_kept),
+        tokens_in=tokens_in,
+        tokens_out=tokens_out,
+        budget=budget,
+    )
+
+
+def stats():
+    with _lock:
+        stats = dict(_stats)
+    stats["tokens_saved"] = stats["tokens_in"] - stats["tokens_out"]
+    stats["avg_tokens_out"] = round(stats["tokens_out"] / stats["requests"], 1) if stats["requests"] else 0.0
+    stats["budget_override"] = CONTEXT_TOKEN_BUDGET
+    return stats
@@ -0,0 +1,109 @@
+import os
+import hashlib
+from functools import lru_cache
+
+import numpy as np
+
+from services.lexical_index import tokenize
+
+# openai = OpenAI API (default), hashing = local CPU feature hashing (no network),
+# huggingface = local sentence-transformers model (optional dependency)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "openai").lower()
+EMBEDDING_HASH_DIM = int(os.getenv("EMBEDDING_HASH_DIM", "1024"))
+HUGGINGFACE_EMBEDDING_MODEL = os.getenv("HUGGINGFACE_EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+
+
+@lru_cache(maxsize=200_000)
+def _slot(feature: str, dim: int):
+    # Stable across processes (unlike hash()), so stored vectors stay valid
+    h = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+    return h % dim, 1.0 if (h >> 63) & 1 else -1.0
+
+
+class HashingEmbeddings:
+    """
+    Local CPU embeddings by feature hashing: word tokens (the same ones the
+    BM25 index uses) plus character trigrams, hashed into a fixed-size
+    signed vector, log-scaled and L2-normalized. No model download and no
+    network; sub-millisecond per query. Weaker on paraphrases than a neural
+    model, but fine for the keyword-heavy questions this bot gets.
+    """
+
+    trigram_weight = 0.5
+
+    def __init__(self, dim: int = EMBEDDING_HASH_DIM):
+        self.dim = dim
+        self.model = f"hashing-{dim}"
+
+    def _features(self, text: str):
+        features = {}
+        for token in tokenize(text):
+            features[token] = features.get(token, 0.0) + 1.0
+            padded = f"<{token}>"
+            for i in range(len(padded) - 2):
+                gram = "#" + padded[i:i + 3]
+                features[gram] = features.get(gram, 0.0) + self.trigram_weight
+        return features
+
+    def _embed(self, text: str):
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for feature, weight in self._features(text).items():
+            index, sign = _slot(feature, self.dim)
+            vector[index] += sign * weight
+        vector = np.sign(vector) * np.log1p(np.abs(vector))
+        norm = np.linalg.norm(vector)
+        if norm:
+            vector /= norm
+        return vector.tolist()
+
+    def embed_documents(self, texts):
+        return [self._embed(t) for t in texts]
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+
+def _build_openai():
+    from langchain_openai import OpenAIEmbeddings
+    return OpenAIEmbeddings()
+
+
+def _build_hashing():
+    return HashingEmbeddings()
+
+
+def _build_huggingface():
+    try:
+        try:
+            from langchain_huggingface import HuggingFaceEmbeddings
+        except ImportError:
+            from langchain_community.embeddings import HuggingFaceEmbeddings
+        return HuggingFaceEmbeddings(model_name=HUGGINGFACE_EMBEDDING_MODEL,
+                                     encode_kwargs={"normalize_embeddings": True})
+    except ImportError as e:
+        raise RuntimeError("The huggingface backend needs `pip install sentence-transformers`") from e
+
+
+BACKENDS = {
+    "openai": _build_openai,
+    "hashing": _build_hashing,
+    "huggingface": _build_huggingface,
+}
+
+
+def build_backend(name: str = None):
+    """Returns the raw (uncached) embeddings object for a backend."""
+    name = (name or EMBEDDING_BACKEND).lower()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown embedding backend '{name}' (choose from {', '.join(BACKENDS)})")
+    return BACKENDS[name]()
+
+
+def collection_name(name: str = None):
+    """
+    Chroma collection holding the corpus embedded with a backend. Vectors
+    from different backends can't be mixed, so each gets its own; OpenAI
+    keeps LangChain's default name so existing stores keep working.
+    """
+    name = (name or EMBEDDING_BACKEND).lower()
+    return "langchain" if name == "openai" else f"langchain_{name}"
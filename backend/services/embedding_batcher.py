@@ -0,0 +1,101 @@
+import os
+import time
+import asyncio
+import bisect
+
+# How long the first query in a batch waits for others to join (0 disables batching)
+EMBED_BATCH_WINDOW_MS = float(os.getenv("EMBED_BATCH_WINDOW_MS", "5"))
+# A batch is sent as soon as it reaches this many texts
+EMBED_BATCH_MAX_SIZE = int(os.getenv("EMBED_BATCH_MAX_SIZE", "32"))
+
+
+class Histogram:
+    """Counts observations into fixed upper-bound buckets (the last one is open-ended)."""
+
+    def __init__(self, bounds):
+        self.bounds = list(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.total = 0.0
+        self.n = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.total += value
+        self.n += 1
+
+    def snapshot(self):
+        labels = [f"<={b:g}" for b in self.bounds] + [f">{self.bounds[-1]:g}"]
+        return {
+            "buckets": dict(zip(labels, self.counts)),
+            "count": self.n,
+            "mean": round(self.total / self.n, 2) if self.n else 0.0,
+        }
+
+
+class EmbeddingBatcher:
+    """
+    Coalesces concurrent single-text embedding requests.
+
+    The first text to arrive opens a batch; texts arriving within
+    `window_ms` (up to `max_batch_size`) join it, and the whole batch goes
+    upstream in one `embed_many(texts)` call on a worker thread. Each
+    caller gets back its own vector.
+    """
+
+    def __init__(self, embed_many, window_ms: float = EMBED_BATCH_WINDOW_MS,
+                 max_batch_size: int = EMBED_BATCH_MAX_SIZE):
+        self.embed_many = embed_many
+        self.window = window_ms / 1000
+        self.max_batch_size = max(1, max_batch_size)
+        self._pending = []  # (text, future, enqueued_at)
+        self._timer = None
+        self._stats = {"texts": 0, "batches": 0, "errors": 0}
+        self.batch_sizes = Histogram([1, 2, 4, 8, 16, 32, 64])
+        self.wait_ms = Histogram([1, 2, 5, 10, 20, 50, 100])
+
+    async def embed(self, text: str):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future, time.perf_counter()))
+        self._stats["texts"] += 1
+        if len(self._pending) >= self.max_batch_size or self.window <= 0:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            asyncio.ensure_future(self._run(batch))
+
+    async def _run(self, batch):
+        started = time.perf_counter()
+        self._stats["batches"] += 1
+        self.batch_sizes.observe(len(batch))
+        for _, _, enqueued_at in batch:
+            self.wait_ms.observe((started - enqueued_at) * 1000)
+        try:
+            vectors = await asyncio.to_thread(self.embed_many, [text for text, _, _ in batch])
+        except Exception as e:
+            self._stats["errors"] += 1
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future, _), vector in zip(batch, vectors):
+            # A caller may have timed out and cancelled its future meanwhile
+            if not future.done():
+                future.set_result(vector)
+
+    def stats(self):
+        stats = dict(self._stats)
+        stats["upstream_calls_saved"] = stats["texts"] - stats["batches"] - len(self._pending)
+        stats["window_ms"] = self.window * 1000
+        stats["max_batch_size"] = self.max_batch_size
+        stats["batch_size"] = self.batch_sizes.snapshot()
+        stats["wait_ms"] = self.wait_ms.snapshot()
+        return stats
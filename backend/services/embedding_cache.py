@@ -0,0 +1,188 @@
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+import unicodedata
+from array import array
+from collections import OrderedDict
+
+from langchain_core.embeddings import Embeddings
+
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "embedding_cache.sqlite3")
+EMBEDDING_CACHE_MEMORY_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MEMORY_ENTRIES", "4096"))
+
+
+def _normalize(text: str):
+    # Case is kept on purpose: it can change the embedding, whitespace can't
+    return " ".join(unicodedata.normalize("NFKC", text or "").split())
+
+
+def _model_name(embeddings):
+    for attr in ("model", "model_name"):
+        value = getattr(embeddings, attr, None)
+        if isinstance(value, str) and value:
+            return value
+    return embeddings.__class__.__name__
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Wraps any LangChain embeddings object with a two-level cache:
+    an in-memory LRU in front of a SQLite table on disk. The disk level
+    survives restarts and is shared by every worker on the machine.
+    """
+
+    def __init__(self, inner: Embeddings, path: str = EMBEDDING_CACHE_PATH,
+                 max_memory_entries: int = EMBEDDING_CACHE_MEMORY_ENTRIES):
+        self.inner = inner
+        self.model_name = _model_name(inner)
+        self.path = path
+        self.max_memory_entries = max_memory_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "upstream_seconds": 0.0}
+        if self.path:
+            try:
+                self._connection()
+            except sqlite3.Error as e:
+                print(f"Embedding cache unavailable, using memory only: {e}")
+
+    # --- Disk level ---
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # One connection per thread; WAL lets several workers read while one writes
+            conn = sqlite3.connect(self.path, timeout=10)
+            try:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS embeddings ("
+                    " key TEXT PRIMARY KEY, model TEXT, dim INTEGER, vector BLOB, created_at REAL)"
+                )
+            except sqlite3.Error as e:
+                # Read-only or locked: an existing table can still serve hits
+                print(f"Embedding cache setup failed: {e}")
+            self._local.conn = conn
+        return conn
+
+    def _disk_get(self, keys):
+        if not self.path or not keys:
+            return {}
+        found = {}
+        try:
+            conn = self._connection()
+            # Stay below SQLite's bound-parameter limit
+            for i in range(0, len(keys), 500):
+                batch = keys[i:i + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = conn.execute(f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch)
+                for key, blob in rows:
+                    vector = array("f")
+                    vector.frombytes(blob)
+                    found[key] = vector.tolist()
+        except sqlite3.Error as e:
+            # Unreadable cache: whatever is missing is embedded upstream
+            print(f"Embedding cache read failed: {e}")
+        return found
+
+    def _disk_put(self, items):
+        if not self.path or not items:
+            return
+        now = time.time()
+        try:
+            conn = self._connection()
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, model, dim, vector, created_at) VALUES (?, ?, ?, ?, ?)",
+                    [(key, self.model_name, len(vec), array("f", vec).tobytes(), now) for key, vec in items]
+                )
+        except sqlite3.Error as e:
+            # A locked or read-only cache must never break embedding
+            print(f"Embedding cache write failed: {e}")
+
+    # --- Memory level ---
+
+    def _memory_get(self, key):
+        with self._lock:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+            return vector
+
+    def _memory_put(self, key, vector):
+        with self._lock:
+            self._memory[key] = vector
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_memory_entries:
+                self._memory.popitem(last=False)
+
+    def _count(self, stat, amount=1):
+        with self._lock:
+            self._stats[stat] += amount
+
+    # --- Embeddings interface ---
+
+    def _key(self, kind: str, text: str):
+        raw = f"{self.model_name}\0{kind}\0{_normalize(text)}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _embed(self, kind, texts, compute):
+        keys = [self._key(kind, t) for t in texts]
+        results = [self._memory_get(k) for k in keys]
+        self._count("memory_hits", sum(1 for r in results if r is not None))
+
+        missing = [i for i, r in enumerate(results) if r is None]
+        if missing:
+            from_disk = self._disk_get(list({keys[i] for i in missing}))
+            for i in missing:
+                vector = from_disk.get(keys[i])
+                if vector is not None:
+                    results[i] = vector
+                    self._memory_put(keys[i], vector)
+            self._count("disk_hits", sum(1 for i in missing if results[i] is not None))
+
+        # Only texts found at neither level go upstream, in a single call
+        pending = OrderedDict()
+        for i, r in enumerate(results):
+            if r is None:
+                pending.setdefault(keys[i], []).append(i)
+        if pending:
+            started = time.perf_counter()
+            vectors = compute([texts[idx[0]] for idx in pending.values()])
+            self._count("upstream_seconds", time.perf_counter() - started)
+            self._count("misses", len(pending))
+            for (key, idx), vector in zip(pending.items(), vectors):
+                vector = list(vector)
+                self._memory_put(key, vector)
+                for i in idx:
+                    results[i] = vector
+            self._disk_put([(key, results[idx[0]]) for key, idx in pending.items()])
+        return results
+
+    def embed_documents(self, texts):
+        return self._embed("doc", list(texts), self.inner.embed_documents)
+
+    def embed_query(self, text):
+        return self._embed("query", [text], lambda batch: [self.inner.embed_query(batch[0])])[0]
+
+    def embed_queries(self, texts):
+        """
+        Query embeddings for several texts with a single upstream call for
+        the misses. Shares cache entries with embed_query; only valid for
+        models that embed queries and documents the same way (OpenAI does).
+        """
+        return self._embed("query", list(texts), self.inner.embed_documents)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._memory)
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = round((lookups - stats["misses"]) / lookups, 4) if lookups else 0.0
+        stats["upstream_seconds"] = round(stats["upstream_seconds"], 3)
+        stats["model"] = self.model_name
+        return stats
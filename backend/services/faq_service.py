@@ -0,0 +1,202 @@
+import os
+import re
+import json
+import math
+import glob
+import threading
+
+from services.lexical_index import tokenize
+
+FAQ_INDEX_PATH = os.getenv("FAQ_INDEX_PATH", "faq_index.json")
+# Comma-separated file names (inside the documents folder) that hold curated Q&A
+FAQ_SOURCES = [s.strip() for s in os.getenv("FAQ_SOURCES", "onlinefaq.pdf").split(",") if s.strip()]
+# Minimum match confidence (0-1) for answering straight from the FAQ
+FAQ_MIN_CONFIDENCE = float(os.getenv("FAQ_MIN_CONFIDENCE", "0.8"))
+# The best match must beat the runner-up by this much, or the question is ambiguous
+FAQ_MIN_MARGIN = float(os.getenv("FAQ_MIN_MARGIN", "0.1"))
+
+# "1. Online Registration", "d) DO I NEED TO REGISTER ...?" -- but not "i." / "ii." list items
+HEADING_RE = re.compile(r"^\s*(?:(\d{1,2})\.|([a-h])\))\s+(\S.*)$")
+PAGE_HEADER_RE = re.compile(r"^\s*\d+\s*\|\s*(?:\w\s){3,}.*$")
+# Lines that start a new list item or note; anything else is a wrapped continuation
+LINE_START_RE = re.compile(r"^(?:[ivx]+\.|\d+\.|[a-z]\)|•|-|NB:|Note)", re.IGNORECASE)
+# Symbol-font bullets come out of pypdf as private-use characters
+PDF_BULLET_RE = re.compile(r"^[\uf000-\uf8ff]\s*")
+SUFFIXES = ("ations", "ation", "ions", "ion", "ing", "ies", "ed", "es", "s")
+
+
+def _stem(token: str):
+    # Just enough stemming that "correct" matches "correction" and "letters" matches "letter"
+    if "/" in token or "_" in token or any(c.isdigit() for c in token):
+        return token
+    for suffix in SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= 3:
+            return token[:-len(suffix)]
+    return token
+
+
+def faq_terms(text: str):
+    return {_stem(t) for t in tokenize(text)}
+
+
+def extract_faq_entries(text: str, source: str = ""):
+    """
+    Splits a numbered/lettered FAQ document into question/answer entries.
+    Each heading becomes a question; its answer is the text up to the next
+    heading, or the whole sub-section when the heading only introduces
+    lettered sub-items.
+    """
+    headings = []  # (level, title, first_line, parent_title)
+    lines = [l.rstrip() for l in text.splitlines() if not PAGE_HEADER_RE.match(l)]
+    parent = ""
+    for i, line in enumerate(lines):
+        match = HEADING_RE.match(line)
+        if not match:
+            continue
+        level = 1 if match.group(1) else 2
+        title = " ".join(match.group(3).split())
+        if level == 1:
+            parent = title
+        headings.append((level, title, i, parent if level == 2 else ""))
+
+    entries = []
+    for n, (level, title, start, parent_title) in enumerate(headings):
+        next_start = headings[n + 1][2] if n + 1 < len(headings) else len(lines)
+        body = lines[start + 1:next_start]
+        has_children = n + 1 < len(headings) and headings[n + 1][0] > level
+        if has_children or not "".join(body).strip():
+            # Section intro: answer with all of its sub-items
+            end = next((h[2] for h in headings[n + 1:] if h[0] <= level), len(lines))
+            body = lines[start + 1:end]
+        answer = _unwrap(body)
+        if not answer:
+            continue
+        entries.append({
+            "question": title,
+            "context": parent_title,
+            "answer": answer,
+            "source": source,
+        })
+    return entries
+
+
+def _unwrap(lines):
+    # PDF text comes hard-wrapped; rejoin sentences but keep list items on their own lines
+    out = []
+    for line in (PDF_BULLET_RE.sub("• ", l.strip()) for l in lines):
+        if not line:
+            continue
+        if out and not LINE_START_RE.match(line):
+            out[-1] = f"{out[-1]} {line}"
+        else:
+            out.append(line)
+    return "\n".join(out)
+
+
+def build_faq_index(data_path: str, index_path: str = FAQ_INDEX_PATH):
+    """Extracts the FAQ sources under `data_path` and writes the Q&A index."""
+    from pypdf import PdfReader
+
+    entries = []
+    for name in FAQ_SOURCES:
+        for path in glob.glob(os.path.join(data_path, "**", name), recursive=True):
+            if path.lower().endswith(".pdf"):
+                text = "\n".join(page.extract_text() or "" for page in PdfReader(path).pages)
+            else:
+                with open(path, encoding="utf-8", errors="ignore") as f:
+                    text = f.read()
+            entries.extend(extract_faq_entries(text, source=path))
+
+    if index_path:
+        # Workers load the index while ingest (or another worker) rewrites it, so
+        # write a temp file and rename it into place: readers see the old or new one whole
+        from services.index_files import export_lock
+        with export_lock(index_path):
+            tmp_path = f"{index_path}.tmp-{os.getpid()}"
+            try:
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump({"entries": entries}, f, ensure_ascii=False, indent=1)
+                os.replace(tmp_path, index_path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+    return FAQIndex(entries)
+
+
+class FAQIndex:
+    """
+    Matches questions against the FAQ headings.
+
+    Confidence is an IDF-weighted F1 between the question's terms and the
+    FAQ heading's terms: high only when the question is mostly about the
+    heading and the heading is mostly covered by the question.
+    """
+
+    def __init__(self, entries):
+        self.entries = entries
+        self._terms = [faq_terms(e["question"]) for e in entries]
+        self._context_terms = [faq_terms(e.get("context", "")) for e in entries]
+        doc_freq = {}
+        for terms in self._terms:
+            for t in terms:
+                doc_freq[t] = doc_freq.get(t, 0) + 1
+        n = max(len(entries), 1)
+        self._idf = {t: math.log(1 + n / df) for t, df in doc_freq.items()}
+        # Words that never appear in a heading still count against precision
+        self._default_idf = math.log(1 + n)
+        self._lock = threading.Lock()
+        self._stats = {"fast_path": 0, "fall_through": 0}
+
+    @classmethod
+    def load(cls, path: str = FAQ_INDEX_PATH):
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f)["entries"])
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _weight(self, terms):
+        return sum(self._idf.get(t, self._default_idf) for t in terms)
+
+    def score(self, question: str):
+        """Returns [(confidence, entry)] for every entry, best first."""
+        query = faq_terms(question)
+        if not query:
+            return []
+        scored = []
+        for entry, terms, context in zip(self.entries, self._terms, self._context_terms):
+            shared = query & terms
+            if not shared:
+                continue
+            # Words from the parent section ("procedures for corrections") don't count as noise
+            precision = self._weight(shared) / self._weight(query - (context - terms))
+            recall = self._weight(shared) / self._weight(terms)
+            scored.append((2 * precision * recall / (precision + recall), entry))
+        scored.sort(key=lambda s: s[0], reverse=True)
+        return scored
+
+    def match(self, question: str, min_confidence: float = None, min_margin: float = None):
+        """Returns (entry, confidence) for a confident match, or None to fall through."""
+        min_confidence = FAQ_MIN_CONFIDENCE if min_confidence is None else min_confidence
+        min_margin = FAQ_MIN_MARGIN if min_margin is None else min_margin
+        scored = self.score(question)
+        best = scored[0] if scored else None
+        runner_up = scored[1][0] if len(scored) > 1 else 0.0
+        hit = best is not None and best[0] >= min_confidence and best[0] - runner_up >= min_margin
+        with self._lock:
+            self._stats["fast_path" if hit else "fall_through"] += 1
+        return (best[1], round(best[0], 3)) if hit else None
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        total = stats["fast_path"] + stats["fall_through"]
+        stats["fast_path_share"] = round(stats["fast_path"] / total, 4) if total else 0.0
+        stats["entries"] = len(self.entries)
+        stats["min_confidence"] = FAQ_MIN_CONFIDENCE
+        return stats
+
+
+def format_answer(entry):
+    return f"🔹 **{entry['question']}**\n\n{entry['answer']}"
@@ -0,0 +1,45 @@
+import os
+import shutil
+import contextlib
+
+try:
+    import fcntl
+except ImportError:  # Windows dev machines: exports there come from one process anyway
+    fcntl = None
+
+
+def replace_dir(path: str, write):
+    """
+    Calls write(tmp_dir) to produce a complete index in a fresh directory,
+    then renames it over `path`. Workers that already memory-mapped the old
+    files keep reading them (the inodes live on until unmapped), and no
+    reader ever sees a half-written file.
+    """
+    path = os.path.normpath(path)
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    old_path = f"{path}.old-{os.getpid()}"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    try:
+        write(tmp_path)
+    except BaseException:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        raise
+    # A directory can only be renamed over an empty one, so move the old export aside first
+    if os.path.isdir(path):
+        os.replace(path, old_path)
+    os.replace(tmp_path, path)
+    shutil.rmtree(old_path, ignore_errors=True)
+
+
+@contextlib.contextmanager
+def export_lock(path: str):
+    """Exclusive lock next to an index directory, so only one process (re)writes it at a time."""
+    path = os.path.normpath(path)
+    parent = os.path.dirname(path)
+    if parent:
+        os.makedirs(parent, exist_ok=True)
+    with open(f"{path}.lock", "a") as f:
+        if fcntl:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        yield
@@ -0,0 +1,130 @@
+import os
+import json
+import hashlib
+
+INGEST_MANIFEST_PATH = os.getenv("INGEST_MANIFEST_PATH", "ingest_manifest.json")
+SOURCE_EXTENSIONS = (".pdf", ".txt")
+
+
+def file_sha256(path: str):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def scan_sources(data_path: str, extensions=SOURCE_EXTENSIONS):
+    """Every ingestible file under data_path, as sorted paths relative to it."""
+    found = []
+    for root, _, files in os.walk(data_path):
+        for name in files:
+            if name.lower().endswith(extensions):
+                found.append(os.path.relpath(os.path.join(root, name), data_path).replace(os.sep, "/"))
+    return sorted(found)
+
+
+class IngestManifest:
+    """
+    Records, per vector collection, each source file's content hash and the
+    IDs of the chunks it produced, so a re-run only touches what changed.
+
+    On disk: {"collections": {name: {relative_path: {"sha256": ..., "chunk_ids": [...],
+    "pages_done": n, "chunks_numbered": n, "complete": bool, "deduped_against": [...]}}}}.
+    A file that was only partly ingested when a run stopped is resumed from
+    `pages_done`, numbering new chunks from `chunks_numbered`.
+    `deduped_against` lists the files that hold the only stored copy of
+    chunks this file dropped as near-duplicates.
+    """
+
+    def __init__(self, data=None, path: str = INGEST_MANIFEST_PATH):
+        self.data = data or {"collections": {}}
+        self.path = path
+
+    @classmethod
+    def load(cls, path: str = INGEST_MANIFEST_PATH):
+        if not os.path.exists(path):
+            return cls(path=path)
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f), path)
+
+    def save(self):
+        # Write-then-rename so an interrupted run never leaves half a manifest
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.data, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def files(self, collection: str):
+        return self.data["collections"].setdefault(collection, {})
+
+    def has_collection(self, collection: str):
+        return collection in self.data["collections"]
+
+    def diff(self, collection: str, hashes):
+        """
+        Compares current {path: sha256} against the manifest. Returns a dict
+        of sorted path lists: added, changed, resumed, removed, unchanged.
+        """
+        known = self.files(collection)
+        changes = {"added": [], "changed": [], "resumed": [], "removed": [], "unchanged": []}
+        for path, sha in hashes.items():
+            if path not in known:
+                changes["added"].append(path)
+            elif known[path]["sha256"] != sha:
+                changes["changed"].append(path)
+            elif not known[path].get("complete", True):
+                changes["resumed"].append(path)
+            else:
+                changes["unchanged"].append(path)
+        changes["removed"] = [path for path in known if path not in hashes]
+        return {key: sorted(paths) for key, paths in changes.items()}
+
+    def dependents(self, collection: str, paths):
+        """
+        Files (outside `paths`) that must be re-ingested because a passage they
+        dropped as a duplicate is stored only under one of `paths`, directly or
+        through another dependent. Sorted.
+        """
+        known = self.files(collection)
+        gone, found = set(paths), set()
+        while True:
+            more = {path for path, entry in known.items()
+                    if path not in gone and gone.intersection(entry.get("deduped_against", ()))}
+            if not more:
+                return sorted(found)
+            found |= more
+            gone |= more
+
+    def deduped_against(self, collection: str, path: str):
+        return set(self.files(collection).get(path, {}).get("deduped_against", ()))
+
+    def chunk_ids(self, collection: str, paths):
+        known = self.files(collection)
+        return [chunk_id for path in paths for chunk_id in known.get(path, {}).get("chunk_ids", [])]
+
+    def progress(self, collection: str, path: str):
+        """(pages_done, next chunk number) for a partly ingested file, else (0, 0)."""
+        entry = self.files(collection).get(path)
+        if not entry or entry.get("complete", True):
+            return 0, 0
+        return entry.get("pages_done", 0), entry.get("chunks_numbered", len(entry["chunk_ids"]))
+
+    def record(self, collection: str, path: str, sha: str, chunk_ids, pages_done: int = None, complete: bool = True,
+               chunks_numbered: int = None, deduped_against=None):
+        entry = {"sha256": sha, "chunk_ids": list(chunk_ids), "complete": complete}
+        if deduped_against:
+            entry["deduped_against"] = sorted(deduped_against)
+        if pages_done is not None:
+            entry["pages_done"] = pages_done
+        if chunks_numbered is not None:
+            entry["chunks_numbered"] = chunks_numbered
+        self.files(collection)[path] = entry
+
+    def forget(self, collection: str, path: str):
+        self.files(collection).pop(path, None)
+
+
+def chunk_id(sha: str, n: int):
+    # Deterministic: the same file content always yields the same IDs
+    return f"{sha[:16]}-{n:05d}"
@@ -0,0 +1,175 @@
+import os
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from services.ingest_manifest import chunk_id
+
+# Parser processes (1 = parse in this process)
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Pages parsed per task; bounds the memory one task can hold
+INGEST_PAGES_PER_TASK = int(os.getenv("INGEST_PAGES_PER_TASK", "16"))
+# Chunks embedded and written per batch
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "64"))
+# Parse tasks allowed ahead of the writer; when it's full the parsers wait (backpressure)
+INGEST_MAX_PENDING = int(os.getenv("INGEST_MAX_PENDING", str(INGEST_WORKERS * 2)))
+
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 200
+
+_splitter = None
+
+
+def _split_text(text: str):
+    global _splitter
+    if _splitter is None:
+        # AI can't read a whole book at once. We cut it into smaller pieces.
+        from langchain_text_splitters import RecursiveCharacterTextSplitter
+        _splitter = RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+    return _splitter.split_text(text)
+
+
+def page_count(path: str):
+    if not path.lower().endswith(".pdf"):
+        return 1
+    from pypdf import PdfReader
+    return len(PdfReader(path).pages)
+
+
+def parse_pages(path: str, start: int, end: int):
+    """
+    Runs in a worker process: extracts pages [start, end) of one file and
+    splits each page into chunks. Returns [(text, metadata)].
+    """
+    chunks = []
+    if path.lower().endswith(".pdf"):
+        from pypdf import PdfReader
+        reader = PdfReader(path)
+        for page in range(start, min(end, len(reader.pages))):
+            text = reader.pages[page].extract_text() or ""
+            metadata = {"source": path, "page": page}
+            chunks.extend((chunk, metadata) for chunk in _split_text(text))
+    else:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            chunks.extend((chunk, {"source": path}) for chunk in _split_text(f.read()))
+    return chunks
+
+
+class _InlineExecutor:
+    # Same interface as the process pool, for INGEST_WORKERS=1 and tests
+    def submit(self, fn, *args):
+        future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class IngestFile:
+    """A source file to ingest, possibly resuming from a checkpoint."""
+
+    def __init__(self, path: str, key: str, sha: str, pages_done: int = 0, chunks_done: int = 0):
+        self.path = path          # on disk
+        self.key = key            # manifest key (relative path)
+        self.sha = sha
+        self.pages_done = pages_done
+        self.chunks_done = chunks_done
+
+
+def _tasks(files, pages_per_task):
+    # Generated lazily so page counts are read only as parsing reaches each file
+    for file in files:
+        pages = page_count(file.path)
+        if file.pages_done >= pages:
+            yield file, file.pages_done, pages, True
+        for start in range(file.pages_done, pages, pages_per_task):
+            end = min(start + pages_per_task, pages)
+            yield file, start, end, end == pages
+
+
+def run_pipeline(files, write_batch, checkpoint, workers: int = INGEST_WORKERS,
+                 batch_size: int = INGEST_BATCH_SIZE, pages_per_task: int = INGEST_PAGES_PER_TASK,
+                 max_pending: int = INGEST_MAX_PENDING, dedupe=None):
+    """
+    Streams files through parse -> split -> embed/write.
+
+    Page ranges are parsed in a process pool, at most `max_pending` tasks
+    ahead of the writer. Chunks are handed to `write_batch([(id, text,
+    metadata)])` roughly `batch_size` at a time, always at task boundaries,
+    and after each write `checkpoint(file, new_ids, pages_done, complete,
+    chunks_numbered)` is called for every file the batch touched;
+    `chunks_numbered` is where a resumed run must continue numbering. Results are consumed in
+    submission order, so chunk IDs are deterministic. With a `dedupe`
+    (ChunkDeduplicator), near-duplicate chunks are dropped before they are
+    embedded; they keep their place in the ID numbering so IDs stay stable.
+    Returns stats: files, pages, chunks, duplicates, seconds, pages_per_second, chunks_per_second.
+    """
+    started = time.perf_counter()
+    stats = {"files": 0, "pages": 0, "chunks": 0, "duplicates": 0}
+    tasks = _tasks(files, max(1, pages_per_task))
+    pending = deque()
+    buffer, progress = [], {}  # progress: key -> [file, new_ids, pages_done, complete, chunks_numbered]
+    next_chunk = {}
+
+    def flush():
+        if buffer:
+            write_batch(list(buffer))
+            stats["chunks"] += len(buffer)
+            buffer.clear()
+        for file, new_ids, pages_done, complete, chunks_numbered in progress.values():
+            checkpoint(file, new_ids, pages_done, complete, chunks_numbered)
+            if complete:
+                stats["files"] += 1
+        progress.clear()
+        elapsed = time.perf_counter() - started
+        print(f"  {stats['chunks']} chunks ({stats['duplicates']} duplicates dropped) from {stats['pages']} pages "
+              f"({stats['pages'] / elapsed:.1f} pages/s, {stats['chunks'] / elapsed:.1f} chunks/s)")
+
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else _InlineExecutor()
+    with executor:
+        def fill():
+            while len(pending) < max(1, max_pending):
+                task = next(tasks, None)
+                if task is None:
+                    return
+                file, start, end, complete = task
+                pending.append((task, executor.submit(parse_pages, file.path, start, end)))
+
+        fill()
+        while pending:
+            (file, start, end, complete), future = pending.popleft()
+            try:
+                chunks = future.result()
+            except Exception as e:
+                raise RuntimeError(f"Failed to parse {file.path} (pages {start}-{end}): {e}") from e
+            fill()
+
+            n = next_chunk.setdefault(file.key, file.chunks_done)
+            ids = [chunk_id(file.sha, n + i) for i in range(len(chunks))]
+            next_chunk[file.key] = n + len(chunks)
+            kept = [(i, text, metadata) for i, (text, metadata) in zip(ids, chunks)
+                    if dedupe is None or not dedupe.is_duplicate(text, file.key)]
+            stats["duplicates"] += len(chunks) - len(kept)
+            ids = [i for i, _, _ in kept]
+            buffer.extend(kept)
+            stats["pages"] += max(0, end - start)
+
+            entry = progress.setdefault(file.key, [file, [], start, False, 0])
+            entry[1].extend(ids)
+            # Dropped duplicates leave gaps in the IDs, so the count of kept IDs can't be the resume point
+            entry[2], entry[3], entry[4] = end, complete, next_chunk[file.key]
+
+            if len(buffer) >= batch_size or not pending:
+                flush()
+
+    stats["seconds"] = round(time.perf_counter() - started, 3)
+    stats["pages_per_second"] = round(stats["pages"] / stats["seconds"], 1) if stats["seconds"] else 0.0
+    stats["chunks_per_second"] = round(stats["chunks"] / stats["seconds"], 1) if stats["seconds"] else 0.0
+    return stats
@@ -0,0 +1,279 @@
+import os
+import json
+import time
+import socket
+import zlib
+import datetime
+import threading
+
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+
+try:
+    import fcntl
+except ImportError:  # Windows dev machines: the job_runs constraint still prevents double runs
+    fcntl = None
+
+# A leader that stops renewing for this long is replaced by another worker
+SCHEDULER_LEASE_SECONDS = float(os.getenv("SCHEDULER_LEASE_SECONDS", "60"))
+# How often every worker renews (leader) or tries to take (others) the lease
+SCHEDULER_RENEW_SECONDS = float(os.getenv("SCHEDULER_RENEW_SECONDS", "15"))
+# Lease file used when the database is SQLite (all workers on one host)
+SCHEDULER_LOCK_PATH = os.getenv("SCHEDULER_LOCK_PATH", "scheduler.lease")
+# A run still marked "running" after this long is assumed dead and may be retried
+SCHEDULER_STALE_SECONDS = float(os.getenv("SCHEDULER_STALE_SECONDS", "1800"))
+# A failed run is retried by the leader after this long (within the same slot)
+SCHEDULER_RETRY_SECONDS = float(os.getenv("SCHEDULER_RETRY_SECONDS", "300"))
+
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+ADVISORY_LOCK_KEY = zlib.crc32(b"nysc-smart-bot-scheduler")
+
+
+class FileLease:
+    """
+    Leadership lease in a small JSON file: {"owner", "expires_at"}. The
+    owner renews it; once it expires (the leader died or hung) any worker
+    may take it. Reads and writes happen under an exclusive flock.
+    """
+
+    kind = "file"
+
+    def __init__(self, path: str = SCHEDULER_LOCK_PATH, ttl: float = SCHEDULER_LEASE_SECONDS, owner: str = WORKER_ID):
+        self.path = path
+        self.ttl = ttl
+        self.owner = owner
+
+    def _update(self, change):
+        with open(self.path, "a+", encoding="utf-8") as f:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            f.seek(0)
+            try:
+                lease = json.loads(f.read() or "{}")
+            except ValueError:
+                lease = {}
+            new = change(lease)
+            if new is not None:
+                f.seek(0)
+                f.truncate()
+                json.dump(new, f)
+            return new is not None
+
+    def acquire(self, now: float = None):
+        """Takes or renews the lease; returns whether this worker holds it."""
+        now = now or time.time()
+
+        def take(lease):
+            if lease.get("owner") in (None, self.owner) or lease.get("expires_at", 0) <= now:
+                return {"owner": self.owner, "expires_at": now + self.ttl}
+            return None
+
+        return self._update(take)
+
+    def release(self):
+        self._update(lambda lease: {} if lease.get("owner") == self.owner else None)
+
+
+class AdvisoryLock:
+    """
+    Postgres session-level advisory lock on a dedicated connection. The
+    lock goes away with the connection, so a dead leader's lock is freed by
+    the server; renewing checks that the connection is still alive.
+    """
+
+    kind = "postgres"
+
+    def __init__(self, engine, key: int = ADVISORY_LOCK_KEY):
+        self.engine = engine
+        self.key = key
+        self.conn = None
+
+    def acquire(self, now: float = None):
+        try:
+            if self.conn is not None:
+                self.conn.execute(text("SELECT 1"))
+                return True
+            conn = self.engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+            if conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": self.key}).scalar():
+                self.conn = conn
+                return True
+            conn.close()
+            return False
+        except Exception as e:
+            print(f"Scheduler lock check failed: {e}")
+            self._drop()
+            return False
+
+    def _drop(self):
+        if self.conn is not None:
+            try:
+                self.conn.close()
+            except Exception:
+                pass
+            self.conn = None
+
+    def release(self):
+        if self.conn is not None:
+            try:
+                self.conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": self.key})
+            except Exception:
+                pass
+        self._drop()
+
+
+def leader_lock_for(engine):
+    return AdvisoryLock(engine) if engine.dialect.name == "postgresql" else FileLease()
+
+
+def slot_start(every_seconds: float, now: float = None):
+    """Start of the schedule interval containing `now`, as a naive local datetime."""
+    now = now or time.time()
+    return datetime.datetime.fromtimestamp(now - now % every_seconds)
+
+
+def claim_run(db, job: str, slot: str, worker: str = WORKER_ID, stale_seconds: float = SCHEDULER_STALE_SECONDS):
+    """
+    Marks job/slot as running by this worker. Returns the JobRun, or None
+    if that slot already succeeded or is running elsewhere. Failed runs and
+    runs that went stale are taken over.
+    """
+    import models
+
+    now = datetime.datetime.now()
+    run = models.JobRun(job=job, slot=slot, status="running", worker=worker, attempts=1, started_at=now)
+    db.add(run)
+    try:
+        db.commit()
+        return run
+    except IntegrityError:
+        db.rollback()
+    stale_before = now - datetime.timedelta(seconds=stale_seconds)
+    updated = db.query(models.JobRun).filter(
+        models.JobRun.job == job, models.JobRun.slot == slot,
+        (models.JobRun.status == "failed") |
+        ((models.JobRun.status == "running") & (models.JobRun.started_at < stale_before))
+    ).update({"status": "running", "worker": worker, "started_at": now, "finished_at": None,
+              "error": None, "attempts": models.JobRun.attempts + 1}, synchronize_session=False)
+    db.commit()
+    if not updated:
+        return None
+    return db.query(models.JobRun).filter(models.JobRun.job == job, models.JobRun.slot == slot).first()
+
+
+def finish_run(db, run, error: str = None):
+    run.finished_at = datetime.datetime.now()
+    run.duration_ms = round((run.finished_at - run.started_at).total_seconds() * 1000, 1)
+    run.status = "failed" if error else "succeeded"
+    run.error = error[:500] if error else None
+    db.commit()
+
+
+class LeaderScheduler:
+    """
+    Runs interval jobs in exactly one process. Every worker ticks every
+    `renew_seconds`: the one holding the leader lock renews it and starts
+    any job whose current slot (interval) has no run yet; the others only
+    try to take the lock, so they step in within a lease if the leader dies.
+    Runs are recorded in job_runs, which also keeps a new leader from
+    repeating a slot the old one finished.
+    """
+
+    def __init__(self, lock, session_factory=None, renew_seconds: float = SCHEDULER_RENEW_SECONDS,
+                 retry_seconds: float = SCHEDULER_RETRY_SECONDS):
+        if session_factory is None:
+            from database import SessionLocal
+            session_factory = SessionLocal
+        self.lock = lock
+        self.session_factory = session_factory
+        self.renew_seconds = renew_seconds
+        self.retry_seconds = retry_seconds
+        self.jobs = {}
+        self.is_leader = False
+        self._running = set()
+        self._guard = threading.Lock()
+        self._scheduler = None
+        self._stats = {"ticks": 0, "leader_changes": 0, "runs": 0, "failures": 0, "skipped": 0}
+
+    def add_job(self, name: str, func, every_seconds: float):
+        self.jobs[name] = {"func": func, "every": every_seconds, "last": None, "retry_at": 0}
+
+    def tick(self, now: float = None):
+        """Renews/takes leadership and returns the names of the jobs submitted."""
+        self._stats["ticks"] += 1
+        leader = self.lock.acquire(now)
+        if leader != self.is_leader:
+            self.is_leader = leader
+            self._stats["leader_changes"] += 1
+            print(f"Scheduler: {WORKER_ID} {'is now' if leader else 'is no longer'} the leader ({self.lock.kind} lock).")
+        if not leader:
+            return []
+        now = now or time.time()
+        started = []
+        for name, job in self.jobs.items():
+            slot = slot_start(job["every"], now).isoformat(timespec="seconds")
+            with self._guard:
+                if name in self._running or job["last"] == slot or now < job["retry_at"]:
+                    continue
+                self._running.add(name)
+            self._submit(name, slot, now)
+            started.append(name)
+        return started
+
+    def _submit(self, name, slot, now):
+        if self._scheduler is not None:
+            # Jobs run off the tick thread so a long fetch never delays lease renewal
+            self._scheduler.add_job(self.run, args=[name, slot, now], id=f"run-{name}", replace_existing=True)
+        else:
+            self.run(name, slot, now)
+
+    def run(self, name: str, slot: str, now: float = None):
+        job = self.jobs[name]
+        db = self.session_factory()
+        try:
+            run = claim_run(db, name, slot)
+            if run is None:
+                # Already done (or running) in this slot, possibly by a previous leader
+                self._stats["skipped"] += 1
+                job["last"] = slot
+                return
+            error = None
+            try:
+                job["func"]()
+            except Exception as e:
+                error = str(e) or type(e).__name__
+                print(f"Scheduled job {name} failed: {error}")
+            finish_run(db, run, error)
+            self._stats["runs"] += 1
+            if error:
+                # claim_run takes over failed runs, so the slot is tried again after a pause
+                job["retry_at"] = (now or time.time()) + self.retry_seconds
+                self._stats["failures"] += 1
+            else:
+                job["last"] = slot
+                job["retry_at"] = 0
+        except Exception as e:
+            print(f"Scheduler could not record {name}: {e}")
+        finally:
+            db.close()
+            with self._guard:
+                self._running.discard(name)
+
+    def start(self):
+        from apscheduler.schedulers.background import BackgroundScheduler
+        self._scheduler = BackgroundScheduler()
+        self._scheduler.add_job(self.tick, "interval", seconds=self.renew_seconds, id="leader-tick",
+                                next_run_time=datetime.datetime.now(), max_instances=1, coalesce=True)
+        self._scheduler.start()
+
+    def shutdown(self):
+        if self._scheduler is not None:
+            self._scheduler.shutdown(wait=False)
+            self._scheduler = None
+        if self.is_leader:
+            self.lock.release()
+            self.is_leader = False
+
+    def stats(self):
+        return dict(self._stats, worker=WORKER_ID, leader=self.is_leader, lock=self.lock.kind,
+                    jobs={name: {"every_seconds": job["every"], "last_slot": job["last"]}
+                          for name, job in self.jobs.items()})
@@ -0,0 +1,172 @@
+import os
+import re
+import json
+import math
+from collections import Counter
+
+import numpy as np
+
+from services.index_files import replace_dir
+
+LEXICAL_INDEX_PATH = os.getenv("LEXICAL_INDEX_PATH", "lexical_index")
+
+# Tokens keep internal slashes so state codes like "LA/24A/1234" stay intact
+TOKEN_RE = re.compile(r"[a-z0-9]+(?:/[a-z0-9]+)*")
+STOPWORDS = {
+    "a", "an", "the", "is", "are", "was", "were", "be", "of", "to", "in", "on", "for",
+    "and", "or", "at", "by", "with", "as", "it", "its", "this", "that", "i", "my", "me",
+    "do", "does", "how", "what", "when", "where", "can", "will", "shall", "from",
+}
+
+
+def tokenize(text: str):
+    """
+    Lowercased word tokens plus a few extras that help exact-term questions:
+    the parts of slash codes ("la/24a" -> "la", "24a") and word+number
+    bigrams ("form 4" -> "form_4", "section 12" -> "section_12").
+    """
+    words = TOKEN_RE.findall((text or "").lower())
+    tokens = []
+    for i, word in enumerate(words):
+        if word not in STOPWORDS:
+            tokens.append(word)
+        if "/" in word:
+            tokens.extend(part for part in word.split("/") if part)
+        if i and any(c.isdigit() for c in word) and not any(c.isdigit() for c in words[i - 1]):
+            tokens.append(f"{words[i - 1]}_{word}")
+    return tokens
+
+
+class LexicalIndex:
+    """
+    BM25 inverted index over text chunks.
+
+    Postings are stored as flat numpy arrays (doc ids and term frequencies,
+    grouped by term) so the saved index can be memory-mapped at startup
+    instead of being rebuilt or copied into Python objects.
+    """
+
+    k1 = 1.5
+    b = 0.75
+
+    def __init__(self, terms, postings_docs, postings_tf, doc_lengths, documents):
+        self.terms = terms                  # term -> [offset, count]
+        self.postings_docs = postings_docs  # uint32, doc ids grouped by term
+        self.postings_tf = postings_tf      # uint16, matching term frequencies
+        self.doc_lengths = doc_lengths      # uint32, tokens per doc
+        self.documents = documents          # [(text, metadata)]
+        self.avg_doc_length = float(doc_lengths.mean()) if len(doc_lengths) else 0.0
+
+    def __len__(self):
+        return len(self.documents)
+
+    @classmethod
+    def build(cls, documents):
+        """`documents` is a list of (text, metadata) pairs."""
+        per_term = {}
+        doc_lengths = []
+        for doc_id, (text, _) in enumerate(documents):
+            counts = Counter(tokenize(text))
+            doc_lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                per_term.setdefault(term, []).append((doc_id, min(tf, 65535)))
+
+        terms, docs, tfs = {}, [], []
+        for term in sorted(per_term):
+            postings = per_term[term]
+            terms[term] = [len(docs), len(postings)]
+            docs.extend(d for d, _ in postings)
+            tfs.extend(tf for _, tf in postings)
+
+        return cls(
+            terms,
+            np.asarray(docs, dtype=np.uint32),
+            np.asarray(tfs, dtype=np.uint16),
+            np.asarray(doc_lengths, dtype=np.uint32),
+            list(documents),
+        )
+
+    def save(self, path: str = LEXICAL_INDEX_PATH):
+        """Writes the index to a fresh directory and swaps it in, so live mmaps are never rewritten."""
+        replace_dir(path, self._write)
+
+    def _write(self, path: str):
+        np.save(os.path.join(path, "postings_docs.npy"), self.postings_docs)
+        np.save(os.path.join(path, "postings_tf.npy"), self.postings_tf)
+        np.save(os.path.join(path, "doc_lengths.npy"), self.doc_lengths)
+        with open(os.path.join(path, "terms.json"), "w", encoding="utf-8") as f:
+            json.dump(self.terms, f, separators=(",", ":"))
+        with open(os.path.join(path, "documents.jsonl"), "w", encoding="utf-8") as f:
+            for text, metadata in self.documents:
+                f.write(json.dumps({"text": text, "metadata": metadata or {}}) + "\n")
+
+    @classmethod
+    def load(cls, path: str = LEXICAL_INDEX_PATH):
+        """Loads a saved index with its postings memory-mapped read-only."""
+        def array(name):
+            return np.load(os.path.join(path, name), mmap_mode="r")
+
+        with open(os.path.join(path, "terms.json"), encoding="utf-8") as f:
+            terms = json.load(f)
+        documents = []
+        with open(os.path.join(path, "documents.jsonl"), encoding="utf-8") as f:
+            for line in f:
+                row = json.loads(line)
+                documents.append((row["text"], row["metadata"]))
+        return cls(terms, array("postings_docs.npy"), array("postings_tf.npy"), array("doc_lengths.npy"), documents)
+
+    @staticmethod
+    def exists(path: str = LEXICAL_INDEX_PATH):
+        return os.path.exists(os.path.join(path, "terms.json"))
+
+    def search(self, query: str, k: int = 3):
+        """Returns up to k (doc_id, score) pairs, best first."""
+        n_docs = len(self.documents)
+        if not n_docs:
+            return []
+        scores = np.zeros(n_docs, dtype=np.float32)
+        for term in set(tokenize(query)):
+            entry = self.terms.get(term)
+            if not entry:
+                continue
+            offset, count = entry
+            doc_ids = self.postings_docs[offset:offset + count]
+            tf = self.postings_tf[offset:offset + count].astype(np.float32)
+            idf = math.log(1 + (n_docs - count + 0.5) / (count + 0.5))
+            norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_ids] / self.avg_doc_length)
+            scores[doc_ids] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+        matched = np.flatnonzero(scores)
+        if not len(matched):
+            return []
+        top = matched[np.argsort(-scores[matched], kind="stable")[:k]]
+        return [(int(i), float(scores[i])) for i in top]
+
+
+def load_chroma_documents(db_path: str, collection_name: str = "langchain", with_ids: bool = False):
+    """Every chunk stored in a Chroma collection, as (text, metadata) or (id, text, metadata)."""
+    import chromadb
+
+    client = chromadb.PersistentClient(path=db_path)
+    # "langchain" is the collection name LangChain's Chroma wrapper uses by default
+    data = client.get_collection(collection_name).get(include=["documents", "metadatas"])
+    metadatas = data["metadatas"] or [{}] * len(data["documents"])
+    if with_ids:
+        return list(zip(data["ids"], data["documents"], metadatas))
+    return list(zip(data["documents"], metadatas))
+
+
+def build_from_chroma(db_path: str, index_path: str = LEXICAL_INDEX_PATH, collection_name: str = "langchain"):
+    """
+    (Re)builds the lexical index from every chunk stored in the Chroma
+    collection, so both retrievers always see the same corpus.
+    """
+    documents = []
+    try:
+        documents = load_chroma_documents(db_path, collection_name)
+    except Exception as e:
+        print(f"Lexical index: no Chroma collection to index ({e})")
+    index = LexicalIndex.build(documents)
+    if index_path:
+        index.save(index_path)
+    return index
@@ -0,0 +1,223 @@
+import os
+import time
+import asyncio
+from collections import deque
+
+import numpy as np
+
+# Give up on a provider call after this many seconds and fail over
+LLM_REQUEST_TIMEOUT = float(os.getenv("LLM_REQUEST_TIMEOUT", "30"))
+# Consecutive failures that open a provider's circuit, and how long it stays open
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "3"))
+LLM_BREAKER_COOLDOWN = float(os.getenv("LLM_BREAKER_COOLDOWN", "30"))
+# Calls remembered per provider for the rolling latency / error rate
+LLM_STATS_WINDOW = int(os.getenv("LLM_STATS_WINDOW", "50"))
+# Hedging: if the first provider hasn't answered by its p95 latency, ask the next one too
+LLM_HEDGE = os.getenv("LLM_HEDGE", "false").lower() == "true"
+LLM_HEDGE_MIN_DELAY = float(os.getenv("LLM_HEDGE_MIN_DELAY", "2"))
+# Hedge deadline used until a provider has enough history for a p95
+LLM_HEDGE_DEFAULT_DELAY = float(os.getenv("LLM_HEDGE_DEFAULT_DELAY", "8"))
+MIN_SAMPLES_FOR_P95 = 5
+
+
+class ProviderUnavailable(Exception):
+    pass
+
+
+class Provider:
+    """A chat model plus its rolling health: latencies, errors and circuit state."""
+
+    def __init__(self, name: str, llm, window: int = LLM_STATS_WINDOW):
+        self.name = name
+        self.llm = llm
+        self.latencies = deque(maxlen=window)  # seconds, successful calls only
+        self.outcomes = deque(maxlen=window)   # True = ok, False = error
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.totals = {"calls": 0, "errors": 0, "hedged": 0, "hedge_wins": 0, "breaker_trips": 0}
+
+    @property
+    def model_name(self):
+        return getattr(self.llm, "model_name", None) or getattr(self.llm, "model", None)
+
+    def available(self, now=None):
+        """Closed circuit, or open long enough that one trial call is allowed (half-open)."""
+        if self.opened_at is None:
+            return True
+        return (now or time.monotonic()) - self.opened_at >= LLM_BREAKER_COOLDOWN
+
+    def error_rate(self):
+        return self.outcomes.count(False) / len(self.outcomes) if self.outcomes else 0.0
+
+    def latency(self, percentile: float):
+        if not self.latencies:
+            return None
+        return float(np.percentile(np.fromiter(self.latencies, dtype=np.float64), percentile))
+
+    def hedge_delay(self):
+        p95 = self.latency(95) if len(self.latencies) >= MIN_SAMPLES_FOR_P95 else None
+        return max(LLM_HEDGE_MIN_DELAY, p95 if p95 is not None else LLM_HEDGE_DEFAULT_DELAY)
+
+    def record_success(self, seconds: float):
+        self.totals["calls"] += 1
+        self.latencies.append(seconds)
+        self.outcomes.append(True)
+        self.consecutive_failures = 0
+        if self.opened_at is not None:
+            print(f"LLM router: {self.name} recovered, closing circuit.")
+            self.opened_at = None
+
+    def record_failure(self, error: Exception):
+        self.totals["calls"] += 1
+        self.totals["errors"] += 1
+        self.outcomes.append(False)
+        self.consecutive_failures += 1
+        if self.opened_at is not None or self.consecutive_failures >= LLM_BREAKER_FAILURES:
+            # A failed half-open trial re-opens the circuit for another cooldown
+            if self.opened_at is None:
+                self.totals["breaker_trips"] += 1
+            self.opened_at = time.monotonic()
+            print(f"LLM router: circuit open for {self.name} ({type(error).__name__}: {error})")
+
+    def stats(self):
+        p50, p95 = self.latency(50), self.latency(95)
+        return dict(
+            self.totals,
+            model=self.model_name,
+            state="closed" if self.opened_at is None else ("half-open" if self.available() else "open"),
+            error_rate=round(self.error_rate(), 4),
+            p50_ms=round(p50 * 1000, 1) if p50 is not None else None,
+            p95_ms=round(p95 * 1000, 1) if p95 is not None else None,
+        )
+
+
+class LLMRouter:
+    """
+    Routes chat calls across providers (e.g. OpenAI, Gemini).
+
+    Providers are tried healthiest first: closed circuits before half-open
+    ones, then lowest rolling error rate, then lowest median latency, with
+    ties going to the configured order. A provider with no latency yet ranks
+    after measured ones rather than as the fastest. A failing or timed-out call fails
+    over to the next provider. With hedging on, a second provider is asked
+    in parallel once the first has run past its p95 latency, and whichever
+    answers first wins.
+    """
+
+    def __init__(self, providers, hedge: bool = LLM_HEDGE, timeout: float = LLM_REQUEST_TIMEOUT):
+        self.providers = [p if isinstance(p, Provider) else Provider(*p) for p in providers]
+        self.hedge = hedge
+        self.timeout = timeout
+
+    @property
+    def model_name(self):
+        # Used to pick the context budget; the provider we'd try first
+        ranked = self.ranked()
+        return ranked[0].model_name if ranked else None
+
+    def ranked(self):
+        now = time.monotonic()
+        candidates = [p for p in self.providers if p.available(now)]
+        order = {id(p): i for i, p in enumerate(self.providers)}
+        return sorted(candidates, key=lambda p: (
+            p.opened_at is not None,
+            round(p.error_rate(), 1),
+            p.latency(50) is None,
+            p.latency(50) or 0.0,
+            order[id(p)],
+        ))
+
+    async def _call(self, provider: Provider, messages, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = await asyncio.wait_for(provider.llm.ainvoke(messages, **kwargs), self.timeout)
+        except asyncio.CancelledError:
+            # Lost a hedge race: not the provider's fault
+            raise
+        except Exception as e:
+            provider.record_failure(e)
+            raise
+        provider.record_success(time.perf_counter() - started)
+        return response
+
+    async def ainvoke(self, messages, **kwargs):
+        ranked = self.ranked()
+        if not ranked:
+            raise ProviderUnavailable("All LLM providers are failing; circuits open.")
+
+        last_error = None
+        pending = {}  # task -> provider
+        queue = list(ranked)
+        try:
+            while queue or pending:
+                if queue and not pending:
+                    provider = queue.pop(0)
+                    pending[asyncio.ensure_future(self._call(provider, messages, **kwargs))] = provider
+
+                hedge_after = None
+                if self.hedge and queue and len(pending) == 1:
+                    hedge_after = next(iter(pending.values())).hedge_delay()
+                done, _ = await asyncio.wait(pending, timeout=hedge_after, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    # Primary is slower than usual: hedge with the next provider
+                    primary = next(iter(pending.values()))
+                    provider = queue.pop(0)
+                    primary.totals["hedged"] += 1
+                    print(f"LLM router: {primary.name} past {hedge_after:.1f}s, hedging with {provider.name}")
+                    pending[asyncio.ensure_future(self._call(provider, messages, **kwargs))] = provider
+                    continue
+
+                for task in done:
+                    provider = pending.pop(task)
+                    if task.exception() is None:
+                        if pending:
+                            provider.totals["hedge_wins"] += 1
+                        return task.result()
+                    last_error = task.exception()
+                    print(f"LLM router: {provider.name} failed ({type(last_error).__name__}), failing over.")
+        finally:
+            for task in pending:
+                task.cancel()
+        raise last_error
+
+    async def astream(self, messages, **kwargs):
+        """
+        Streams from the healthiest provider. If it fails before the first
+        chunk, the next provider is tried; once tokens are flowing there is
+        no failover (the caller has already shown them).
+        """
+        ranked = self.ranked()
+        if not ranked:
+            raise ProviderUnavailable("All LLM providers are failing; circuits open.")
+
+        last_error = None
+        for provider in ranked:
+            started = time.perf_counter()
+            streamed = False
+            try:
+                stream = provider.llm.astream(messages, **kwargs).__aiter__()
+                chunk = await asyncio.wait_for(stream.__anext__(), self.timeout)
+                streamed = True
+                yield chunk
+                async for chunk in stream:
+                    yield chunk
+            except StopAsyncIteration:
+                pass
+            except Exception as e:
+                provider.record_failure(e)
+                if streamed:
+                    raise
+                last_error = e
+                print(f"LLM router: {provider.name} stream failed ({type(e).__name__}), failing over.")
+                continue
+            provider.record_success(time.perf_counter() - started)
+            return
+        raise last_error
+
+    def stats(self):
+        return {
+            "hedging": self.hedge,
+            "providers": {p.name: p.stats() for p in self.providers},
+            "order": [p.name for p in self.ranked()],
+        }
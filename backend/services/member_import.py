@@ -0,0 +1,233 @@
+import io
+import os
+import re
+import csv
+import json
+import time
+import secrets
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from sqlalchemy import insert, func
+from sqlalchemy.exc import IntegrityError
+
+from services.password_hasher import hash_with_rounds
+
+# Rows validated, hashed and inserted per transaction; bounds memory for any file size
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "500"))
+# Processes hashing temporary passwords
+IMPORT_HASH_WORKERS = int(os.getenv("IMPORT_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Cost for temporary passwords. They are long and random, so a lower cost is safe,
+# and the first login rehashes them at BCRYPT_ROUNDS anyway
+IMPORT_BCRYPT_ROUNDS = int(os.getenv("IMPORT_BCRYPT_ROUNDS", "10"))
+# Per-row errors listed in the response; the rest are only counted
+IMPORT_MAX_ERRORS = int(os.getenv("IMPORT_MAX_ERRORS", "1000"))
+
+FIELDS = ("email", "name", "state_code", "state", "lga", "ppa", "cds_group")
+REQUIRED = ("email", "name")
+MAX_FIELD_LENGTH = 200
+EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+# e.g. LA/24A/1234
+STATE_CODE_RE = re.compile(r"^[A-Z]{2}/\d{2}[A-C]/\d{3,5}$")
+
+
+def detect_format(filename: str = "", content_type: str = ""):
+    """"csv" or "ndjson" from the upload's name or type, else None."""
+    name = (filename or "").lower()
+    content_type = (content_type or "").lower()
+    if name.endswith((".ndjson", ".jsonl")) or "ndjson" in content_type or "jsonl" in content_type:
+        return "ndjson"
+    if name.endswith(".csv") or "csv" in content_type:
+        return "csv"
+    return None
+
+
+def iter_rows(stream, fmt: str):
+    """Yields (line, row dict or None, parse error or None) from a binary stream, one line at a time."""
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", errors="replace", newline="")
+    try:
+        if fmt == "csv":
+            reader = csv.DictReader(text)
+            reader.fieldnames = [(name or "").strip().lower() for name in reader.fieldnames or []]
+            for row in reader:
+                yield reader.line_num, row, None
+            return
+        for line, raw in enumerate(text, start=1):
+            if not raw.strip():
+                continue
+            try:
+                row = json.loads(raw)
+            except ValueError as e:
+                yield line, None, f"Invalid JSON: {e}"
+                continue
+            if not isinstance(row, dict):
+                yield line, None, "Expected a JSON object"
+                continue
+            yield line, {str(k).strip().lower(): v for k, v in row.items()}, None
+    finally:
+        # Leave the upload open for its owner
+        text.detach()
+
+
+def validate_row(row: dict):
+    """Returns (clean row, None) or (None, error message)."""
+    clean = {}
+    for field in FIELDS:
+        value = row.get(field)
+        value = "" if value is None else str(value).strip()
+        if len(value) > MAX_FIELD_LENGTH:
+            return None, f"{field} is longer than {MAX_FIELD_LENGTH} characters"
+        clean[field] = value or None
+    for field in REQUIRED:
+        if not clean[field]:
+            return None, f"{field} is required"
+    clean["email"] = clean["email"].lower()
+    if not EMAIL_RE.match(clean["email"]):
+        return None, "email is not a valid address"
+    if clean["state_code"]:
+        clean["state_code"] = clean["state_code"].upper()
+        if not STATE_CODE_RE.match(clean["state_code"]):
+            return None, "state_code must look like LA/24A/1234"
+    return clean, None
+
+
+def _chunks(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class ImportReport:
+    def __init__(self, max_errors: int = IMPORT_MAX_ERRORS):
+        self.max_errors = max_errors
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+        self.credentials = []
+
+    def error(self, line, email, message):
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"line": line, "email": email, "error": message})
+
+    def as_dict(self, seconds: float):
+        return {
+            "created": self.created,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+            "seconds": round(seconds, 2),
+            # Temporary passwords for the official to hand out. Only their hashes are
+            # stored, so this is the only copy; users must change them at first login
+            "credentials": self.credentials,
+        }
+
+
+def report_csv(report: dict):
+    """The import report as a CSV download: one row per account created (with its password) or row rejected."""
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(["line", "email", "temporary_password", "error"])
+    for credential in report["credentials"]:
+        writer.writerow([credential["line"], credential["email"], credential["temporary_password"], ""])
+    for error in report["errors"]:
+        writer.writerow([error["line"], error["email"] or "", "", error["error"]])
+    return out.getvalue()
+
+
+def _insert_chunk(db, rows, report):
+    import models
+
+    try:
+        db.execute(insert(models.User), [row for _, row in rows])
+        db.commit()
+        return [row for _, row in rows]
+    except IntegrityError:
+        # Someone registered one of these emails meanwhile: insert row by row to find it
+        db.rollback()
+    inserted = []
+    for line, row in rows:
+        try:
+            with db.begin_nested():
+                db.execute(insert(models.User), [row])
+            inserted.append(row)
+        except IntegrityError:
+            report.error(line, row["email"], "email is already registered")
+    db.commit()
+    return inserted
+
+
+def import_members(stream, fmt: str, session_factory=None, chunk_size: int = IMPORT_CHUNK_SIZE,
+                   workers: int = IMPORT_HASH_WORKERS, rounds: int = IMPORT_BCRYPT_ROUNDS,
+                   max_errors: int = IMPORT_MAX_ERRORS):
+    """
+    Imports corps members from a CSV or NDJSON stream. Rows are read,
+    validated, given a hashed temporary password (in a process pool) and
+    inserted `chunk_size` at a time, each chunk in one bulk transaction.
+    Invalid rows and emails already registered (or repeated in the file)
+    are reported per row and skipped. Returns the report dict.
+    """
+    import models
+
+    if session_factory is None:
+        from database import SessionLocal
+        session_factory = SessionLocal
+    started = time.perf_counter()
+    report = ImportReport(max_errors)
+    seen = set()
+
+    # spawn, not fork: the API process has live threads and DB connections
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) if workers > 1 else None
+    try:
+        for chunk in _chunks(iter_rows(stream, fmt), max(1, chunk_size)):
+            valid = []
+            for line, raw, error in chunk:
+                row = None
+                if error is None:
+                    row, error = validate_row(raw)
+                if error is not None:
+                    report.error(line, (raw or {}).get("email"), error)
+                elif row["email"] in seen:
+                    report.error(line, row["email"], "email appears earlier in the file")
+                else:
+                    seen.add(row["email"])
+                    valid.append((line, row))
+
+            db = session_factory()
+            try:
+                # One lookup per chunk for emails that already have accounts, whatever their stored casing
+                emails = [row["email"] for _, row in valid]
+                stored_email = func.lower(models.User.email)
+                existing = {email for (email,) in db.query(stored_email).filter(stored_email.in_(emails))}
+                for line, row in valid:
+                    if row["email"] in existing:
+                        report.error(line, row["email"], "email is already registered")
+                valid = [(line, row) for line, row in valid if row["email"] not in existing]
+                if not valid:
+                    continue
+
+                passwords = [secrets.token_urlsafe(12) for _ in valid]
+                if pool is not None:
+                    hashes = list(pool.map(hash_with_rounds, passwords, [rounds] * len(passwords),
+                                           chunksize=max(1, len(passwords) // (workers * 4))))
+                else:
+                    hashes = [hash_with_rounds(p, rounds) for p in passwords]
+                for (line, row), hashed in zip(valid, hashes):
+                    row.update(hashed_password=hashed, role="Corps Member", must_change_password=True)
+                password_of = {row["email"]: (line, password) for (line, row), password in zip(valid, passwords)}
+
+                for row in _insert_chunk(db, valid, report):
+                    line, password = password_of[row["email"]]
+                    report.created += 1
+                    report.credentials.append({"line": line, "email": row["email"], "temporary_password": password})
+            finally:
+                db.close()
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return report.as_dict(time.perf_counter() - started)
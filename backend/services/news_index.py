@@ -0,0 +1,172 @@
+import os
+import time
+import asyncio
+import datetime
+
+import numpy as np
+
+from services import ai_service, retrieval
+
+# Local news must be at least this relevant (0-1) to count as an answer source
+NEWS_MIN_RELEVANCE = float(os.getenv("NEWS_MIN_RELEVANCE", "0.75"))
+# How many relevant local items are enough to skip the live web search
+NEWS_MIN_RESULTS = int(os.getenv("NEWS_MIN_RESULTS", "1"))
+# The newest relevant item must be this recent, or local news is considered stale
+NEWS_FRESH_DAYS = float(os.getenv("NEWS_FRESH_DAYS", "7"))
+# Older items are ignored entirely; newer ones are ranked higher (half-life in days)
+NEWS_MAX_AGE_DAYS = float(os.getenv("NEWS_MAX_AGE_DAYS", "60"))
+NEWS_HALF_LIFE_DAYS = float(os.getenv("NEWS_HALF_LIFE_DAYS", "14"))
+
+# News.date is written as "2025-01-31" by the fetch job and "Jan 31, 10:00 AM" by admins
+DATE_FORMATS = ("%Y-%m-%d", "%b %d, %I:%M %p")
+
+_stats = {"indexed": 0, "local_answers": 0, "live_searches": 0}
+
+
+def parse_news_date(value: str, now: datetime.datetime = None):
+    """Epoch seconds for a News.date string, or 0 (too old to use) if unreadable."""
+    now = now or datetime.datetime.now()
+    for fmt in DATE_FORMATS:
+        try:
+            parsed = datetime.datetime.strptime(value or "", fmt)
+        except ValueError:
+            continue
+        if "%Y" not in fmt:
+            # Admin dates carry no year: take the most recent one that isn't in the future
+            parsed = parsed.replace(year=now.year)
+            if parsed > now + datetime.timedelta(days=1):
+                parsed = parsed.replace(year=now.year - 1)
+        return parsed.timestamp()
+    return 0.0
+
+
+def recency_weight(published_at: float, now: float = None):
+    age_days = max(0.0, ((now or time.time()) - published_at) / 86400)
+    return 0.5 ** (age_days / NEWS_HALF_LIFE_DAYS)
+
+
+class NewsIndex:
+    """
+    News items embedded into their own vector collection. Search results
+    are ranked by relevance times a recency decay, so last week's camp
+    announcement outranks last year's.
+    """
+
+    def __init__(self, store):
+        self.store = store
+
+    def add(self, items):
+        """Upserts news items (dicts with id, title, content, url, date, type)."""
+        items = [i for i in items if i.get("title")]
+        if not items:
+            return 0
+        self.store.add_texts(
+            [f"{i['title']}\n{i.get('content') or ''}" for i in items],
+            metadatas=[{
+                "news_id": i["id"],
+                "title": i["title"],
+                "url": i.get("url") or "",
+                "type": i.get("type") or "",
+                "published_at": i.get("published_at") or parse_news_date(i.get("date")),
+            } for i in items],
+            ids=[f"news-{i['id']}" for i in items],
+        )
+        _stats["indexed"] += len(items)
+        return len(items)
+
+    def known_ids(self):
+        return {int(i.split("-", 1)[1]) for i in self.store.get(include=[])["ids"]}
+
+    def search(self, query_embedding, k: int = 3, now: float = None):
+        """Returns [(result_dict, relevance)] above the relevance floor, best (recency-weighted) first."""
+        now = now or time.time()
+        collection = self.store._collection
+        count = collection.count()
+        if not count:
+            return []
+        raw = collection.query(query_embeddings=[list(query_embedding)], n_results=min(k * 3, count),
+                               include=["documents", "metadatas", "embeddings"])
+        # Cosine computed here: the collection's distance metric depends on how it was created
+        query = np.asarray(query_embedding, dtype=np.float32)
+        vectors = np.asarray(raw["embeddings"][0], dtype=np.float32)
+        relevances = vectors @ query / (np.linalg.norm(vectors, axis=1) * np.linalg.norm(query) + 1e-12)
+        results = []
+        for text, metadata, relevance in zip(raw["documents"][0], raw["metadatas"][0], relevances.tolist()):
+            published_at = metadata.get("published_at") or 0.0
+            if relevance < NEWS_MIN_RELEVANCE or now - published_at > NEWS_MAX_AGE_DAYS * 86400:
+                continue
+            results.append(({
+                "title": metadata.get("title", ""),
+                "url": metadata.get("url") or None,
+                "content": text,
+                "score": round(relevance * recency_weight(published_at, now), 4),
+                "published_at": published_at,
+                "local": True,
+            }, relevance))
+        results.sort(key=lambda r: r[0]["score"], reverse=True)
+        return results[:k]
+
+
+def news_item(news, content: str = None):
+    """Plain dict for a News row (usable after its session closes); `content` overrides the summary."""
+    return {"id": news.id, "title": news.title, "content": content or news.content,
+            "url": news.url, "date": news.date, "type": news.type}
+
+
+def index_news(items):
+    """Embeds freshly stored news items (see news_item). Safe to call when AI is disabled."""
+    if not items:
+        return 0
+    news_index = ai_service.get_news_index()
+    if news_index is None:
+        return 0
+    try:
+        return news_index.add(items)
+    except Exception as e:
+        print(f"News indexing failed: {e}")
+        return 0
+
+
+def sync_from_db(db):
+    """Indexes any News rows the collection doesn't have yet (first start, missed writes)."""
+    import models
+
+    news_index = ai_service.get_news_index()
+    if news_index is None:
+        return 0
+    known = news_index.known_ids()
+    missing = [news_item(n) for n in db.query(models.News).all() if n.id not in known]
+    return index_news(missing)
+
+
+async def search_local_news(question: str, query_embedding=None, k: int = 2):
+    """
+    Local news results good enough to answer from, or None when the live
+    web search should run (no index, too few relevant items, or stale).
+    """
+    if retrieval.RETRIEVAL_MODE == "lexical":
+        # No query embeddings in this mode; the live search covers news
+        return None
+    news_index = ai_service.get_news_index()
+    if news_index is None:
+        return None
+    try:
+        if query_embedding is None:
+            query_embedding = await asyncio.to_thread(ai_service.get_embedding_function().embed_query, question)
+        results = await asyncio.to_thread(news_index.search, query_embedding, k)
+    except Exception as e:
+        print(f"Local news search failed: {e}")
+        return None
+    newest = max((r["published_at"] for r, _ in results), default=0.0)
+    if len(results) < NEWS_MIN_RESULTS or time.time() - newest > NEWS_FRESH_DAYS * 86400:
+        return None
+    return [r for r, _ in results]
+
+
+def record_answer_source(local: bool):
+    _stats["local_answers" if local else "live_searches"] += 1
+
+
+def stats():
+    answered = _stats["local_answers"] + _stats["live_searches"]
+    return dict(_stats, share_without_live_search=round(_stats["local_answers"] / answered, 4) if answered else 0.0)
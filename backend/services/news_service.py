@@ -1,72 +1,198 @@
 import os
+import re
+import hashlib
 from datetime import datetime
-from tavily import TavilyClient
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, parse_qsl, urlencode
 from sqlalchemy.orm import Session
 from database import SessionLocal
 import models
+from services.answer_cache import answer_cache
+from services.response_cache import response_cache, NEWS_CACHE_KEY
+from services.ai_service import get_tavily
+from services.news_index import index_news, news_item, sync_from_db
+
+# Searches run on every fetch, separated by ";"; results are merged and deduped
+NEWS_QUERIES = [q.strip() for q in os.getenv(
+    "NEWS_QUERIES",
+    "NYSC Nigeria latest official news updates;NYSC mobilization timetable orientation camp"
+).split(";") if q.strip()]
+NEWS_RESULTS_PER_QUERY = int(os.getenv("NEWS_RESULTS_PER_QUERY", "5"))
+NEWS_DOMAINS = ["nysc.gov.ng", "punchng.com", "vanguardngr.com", "dailypost.ng", "thecable.ng"]
+
+TRACKING_PARAMS = ("utm_", "fbclid", "gclid", "amp")
+WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def normalize_url(url: str):
+    """Scheme-, www-, fragment- and tracking-insensitive form of a URL, or "" without one."""
+    if not url:
+        return ""
+    parts = urlsplit(url.strip().lower())
+    host = parts.netloc.removeprefix("www.")
+    path = parts.path.rstrip("/").removesuffix("/amp")
+    query = urlencode(sorted((k, v) for k, v in parse_qsl(parts.query) if not k.startswith(TRACKING_PARAMS)))
+    return f"{host}{path}?{query}" if query else f"{host}{path}"
+
+
+def normalize_title(title: str):
+    return " ".join(WORD_RE.findall((title or "").lower()))
+
+
+def _digest(value: str):
+    return hashlib.sha1(value.encode("utf-8")).hexdigest()
+
+
+def title_key(title: str):
+    return _digest(normalize_title(title))
+
+
+def fingerprint(url: str, title: str):
+    """Unique key of a fetched article: its normalized URL, or its title when there is none."""
+    normalized = normalize_url(url)
+    return _digest(f"url:{normalized}") if normalized else _digest(f"title:{normalize_title(title)}")
+
+
+def classify(title: str):
+    # Determine type based on keywords
+    lower_title = title.lower()
+    if "mobilization" in lower_title or "timetable" in lower_title:
+        return "Mobilization"
+    elif "camp" in lower_title or "orientation" in lower_title:
+        return "Guide"
+    elif "official" in lower_title or "director" in lower_title:
+        return "Official"
+    return "General"
+
+
+def _insert(db: Session):
+    if db.bind.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(models.News)
+
+
+def store_news(db: Session, results):
+    """
+    Stores new items from a batch of search results ({title, url, content}).
+    Duplicates (same normalized URL or title, within the batch or already
+    stored) are skipped with one lookup and one bulk insert. Returns
+    [(id, row values, full content)] for the inserted items; the caller commits.
+    """
+    rows, contents, seen = [], {}, set()
+    for result in results:
+        title = (result.get("title") or "").strip()
+        if not title:
+            continue
+        keys = (fingerprint(result.get("url"), title), title_key(title))
+        if keys[0] in seen or keys[1] in seen:
+            continue
+        seen.update(keys)
+        content = result.get("content") or ""
+        rows.append({
+            "title": title,
+            "content": content[:200] + "...",  # Truncate for summary
+            "date": datetime.now().strftime("%Y-%m-%d"),
+            "type": classify(title),
+            "url": result.get("url"),
+            "fingerprint": keys[0],
+            "title_key": keys[1],
+        })
+        contents[keys[0]] = content
+    if not rows:
+        return []
+
+    fingerprints = [r["fingerprint"] for r in rows]
+    title_keys = [r["title_key"] for r in rows]
+    existing = db.query(models.News.fingerprint, models.News.title_key).filter(
+        models.News.fingerprint.in_(fingerprints) | models.News.title_key.in_(title_keys)
+    ).all()
+    known = {key for pair in existing for key in pair if key}
+    rows = [r for r in rows if r["fingerprint"] not in known and r["title_key"] not in known]
+    if not rows:
+        return []
+
+    # ON CONFLICT DO NOTHING covers a concurrent run inserting the same article
+    statement = _insert(db).values(rows).on_conflict_do_nothing(index_elements=["fingerprint"]).returning(
+        models.News.id, models.News.fingerprint)
+    inserted = dict((fp, news_id) for news_id, fp in db.execute(statement).all())
+    return [(inserted[r["fingerprint"]], r, contents[r["fingerprint"]]) for r in rows if r["fingerprint"] in inserted]
+
+
+def backfill_keys(db: Session):
+    """Fills in dedupe keys for rows stored before they existed (or posted by admins)."""
+    rows = db.query(models.News).filter(models.News.title_key.is_(None)).all()
+    if not rows:
+        return 0
+    taken = {fp for (fp,) in db.query(models.News.fingerprint).filter(models.News.fingerprint.isnot(None))}
+    for row in rows:
+        row.title_key = title_key(row.title)
+        if row.url:
+            # Admin posts without a URL keep no fingerprint, so repeats are still allowed
+            key = fingerprint(row.url, row.title)
+            if key not in taken:
+                row.fingerprint = key
+                taken.add(key)
+    return len(rows)
+
+
+def search_news(tavily, queries=None):
+    """Runs every query in parallel and merges the results; a failed query is skipped, but not all of them."""
+    queries = queries or NEWS_QUERIES
+
+    def search(query):
+        try:
+            response = tavily.search(
+                query=query,
+                search_depth="advanced",
+                max_results=NEWS_RESULTS_PER_QUERY,
+                include_domains=NEWS_DOMAINS
+            )
+            return response.get("results", [])
+        except Exception as e:
+            print(f"News search failed for '{query}': {e}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=max(1, len(queries))) as pool:
+        responses = list(pool.map(search, queries))
+    if responses and all(results is None for results in responses):
+        raise RuntimeError(f"All {len(responses)} news searches failed")
+    return [result for results in responses if results for result in results]
 
-# Initialize Tavily
-tavily = None
-try:
-    if os.getenv("TAVILY_API_KEY"):
-        tavily = TavilyClient(api_key=os.getenv("TAVILY_API_KEY"))
-except Exception:
-    pass
 
 def fetch_and_store_news():
     """
     Fetches latest NYSC news using Tavily and stores unique items in the database.
-    This is intended to be run as a background job.
+    This is intended to be run as a background job; it raises on failure
+    so the scheduler records the run as failed and retries it. Without a
+    Tavily key there is nothing to retry, so it returns instead.
     """
     print(f"[{datetime.now()}] Starting News Fetch Job...")
-    
+
+    tavily = get_tavily()
     if not tavily:
         print("Tavily API Key not found. Skipping news fetch.")
         return
 
+    results = search_news(tavily)
+    db = SessionLocal()
     try:
-        # Search for latest news
-        response = tavily.search(
-            query="NYSC Nigeria latest official news updates", 
-            search_depth="advanced", 
-            max_results=5,
-            include_domains=["nysc.gov.ng", "punchng.com", "vanguardngr.com", "dailypost.ng", "thecable.ng"]
-        )
-        
-        db = SessionLocal()
-        count = 0
-        
-        for result in response.get("results", []):
-            title = result.get("title")
-            url = result.get("url")
-            content = result.get("content", "")[:200] + "..." # Truncate for summary
-            
-            # Check for duplicates
-            existing = db.query(models.News).filter(models.News.title == title).first()
-            if not existing:
-                # Determine type based on keywords
-                news_type = "General"
-                lower_title = title.lower()
-                if "mobilization" in lower_title or "timetable" in lower_title:
-                    news_type = "Mobilization"
-                elif "camp" in lower_title or "orientation" in lower_title:
-                    news_type = "Guide"
-                elif "official" in lower_title or "director" in lower_title:
-                    news_type = "Official"
-
-                new_news = models.News(
-                    title=title,
-                    content=content,
-                    date=datetime.now().strftime("%Y-%m-%d"),
-                    type=news_type,
-                    url=url
-                )
-                db.add(new_news)
-                count += 1
-        
+        backfill_keys(db)
+        added = store_news(db, results)
         db.commit()
-        print(f"[{datetime.now()}] News Fetch Complete. Added {count} new items.")
-        db.close()
-        
+        # Embed the new items (full text, not the stored summary) plus anything missed before
+        index_news([news_item(models.News(id=news_id, **row), content) for news_id, row, content in added])
+        sync_from_db(db)
+        print(f"[{datetime.now()}] News Fetch Complete. {len(results)} results from {len(NEWS_QUERIES)} queries, "
+              f"added {len(added)} new items.")
+        if added:
+            # Fresh announcements may contradict answers we already cached
+            answer_cache.invalidate("news fetch")
+            response_cache.invalidate(NEWS_CACHE_KEY, reason="news fetch")
     except Exception as e:
+        db.rollback()
         print(f"Error fetching news: {e}")
+        raise
+    finally:
+        db.close()
@@ -0,0 +1,111 @@
+import os
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+
+# bcrypt cost factor for new hashes (each +1 doubles the work); stored hashes
+# with another cost are rehashed on the next successful login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# Hashes computed at once; bcrypt releases the GIL, so this is the CPU share auth can take
+BCRYPT_WORKERS = int(os.getenv("BCRYPT_WORKERS", str(max(1, (os.cpu_count() or 1) // 2))))
+# Requests allowed to wait for a worker; beyond this they are shed with a 503
+BCRYPT_MAX_QUEUE = int(os.getenv("BCRYPT_MAX_QUEUE", "32"))
+
+
+class HasherBusy(Exception):
+    """Raised instead of queueing when too many hash requests are already waiting."""
+
+
+def hash_rounds(hashed: str):
+    """Cost factor of a stored bcrypt hash ("$2b$12$..."), or None if unreadable."""
+    try:
+        return int(hashed.split("$")[2])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+
+def _to_bytes(value):
+    return value.encode("utf-8") if isinstance(value, str) else value
+
+
+def hash_with_rounds(password: str, rounds: int):
+    # Module-level so process pools can pickle it (see services/member_import.py)
+    return bcrypt.hashpw(_to_bytes(password), bcrypt.gensalt(rounds=rounds)).decode("utf-8")
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt on a small dedicated pool so a login burst can't take over
+    the web server's threads, and sheds requests once the queue is full.
+    """
+
+    def __init__(self, rounds: int = BCRYPT_ROUNDS, workers: int = BCRYPT_WORKERS, max_queue: int = BCRYPT_MAX_QUEUE):
+        self.rounds = rounds
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._slots = threading.BoundedSemaphore(workers + max_queue)
+        self._stats = {"hashes": 0, "verifies": 0, "rehashes": 0, "shed": 0, "busy_seconds": 0.0}
+        self._lock = threading.Lock()
+
+    def _submit(self, kind, fn, *args):
+        """Queues fn on the pool and returns its future; the queue slot is freed when it finishes."""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._stats["shed"] += 1
+            raise HasherBusy(f"{self.workers + self.max_queue} password checks already in progress")
+
+        def timed():
+            started = time.perf_counter()
+            try:
+                return fn(*args)
+            finally:
+                with self._lock:
+                    self._stats[kind] += 1
+                    self._stats["busy_seconds"] += time.perf_counter() - started
+
+        try:
+            future = self._executor.submit(timed)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def _run(self, kind, fn, *args):
+        return self._submit(kind, fn, *args).result()
+
+    def hash(self, password):
+        salt = bcrypt.gensalt(rounds=self.rounds)
+        return self._run("hashes", bcrypt.hashpw, _to_bytes(password), salt).decode("utf-8")
+
+    def verify(self, password, hashed):
+        return self._run("verifies", bcrypt.checkpw, _to_bytes(password), _to_bytes(hashed))
+
+    # Async routes await these, so a request waiting for bcrypt holds no server thread
+    async def hash_async(self, password):
+        salt = bcrypt.gensalt(rounds=self.rounds)
+        future = self._submit("hashes", bcrypt.hashpw, _to_bytes(password), salt)
+        return (await asyncio.wrap_future(future)).decode("utf-8")
+
+    async def verify_async(self, password, hashed):
+        future = self._submit("verifies", bcrypt.checkpw, _to_bytes(password), _to_bytes(hashed))
+        return await asyncio.wrap_future(future)
+
+    def needs_rehash(self, hashed):
+        return hash_rounds(hashed) != self.rounds
+
+    def record_rehash(self):
+        with self._lock:
+            self._stats["rehashes"] += 1
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, busy_seconds=round(self._stats["busy_seconds"], 3), rounds=self.rounds,
+                        workers=self.workers, max_queue=self.max_queue)
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,108 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+
+# Resolved users are reused for this long; profile and role changes in this
+# worker invalidate at once, other workers see them within the TTL
+AUTH_CACHE_TTL_SECONDS = float(os.getenv("AUTH_CACHE_TTL_SECONDS", "60"))
+AUTH_CACHE_MAX_ENTRIES = int(os.getenv("AUTH_CACHE_MAX_ENTRIES", "1024"))
+# Role claims signed into a token (AUTH_ROLE_CLAIMS) are trusted for this long,
+# then the user is looked up again; this bounds how stale another worker can be
+AUTH_CLAIMS_TTL_SECONDS = float(os.getenv("AUTH_CLAIMS_TTL_SECONDS", "300"))
+
+
+class Principal:
+    """The parts of a user that authorization checks need (id, email, role, state)."""
+
+    __slots__ = ("id", "email", "role", "state")
+
+    def __init__(self, id, email, role, state=None):
+        self.id = id
+        self.email = email
+        self.role = role
+        self.state = state
+
+    @classmethod
+    def from_user(cls, user):
+        return cls(user.id, user.email, user.role, user.state)
+
+
+class PrincipalCache:
+    """
+    Bounded LRU of resolved users keyed by token subject (email). Entries
+    are column snapshots, so no SQLAlchemy session is shared between requests.
+    """
+
+    def __init__(self, ttl_seconds: float = AUTH_CACHE_TTL_SECONDS, max_entries: int = AUTH_CACHE_MAX_ENTRIES,
+                 claims_ttl_seconds: float = AUTH_CLAIMS_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.claims_ttl_seconds = claims_ttl_seconds
+        self._entries = OrderedDict()  # subject -> (snapshot, created_at)
+        self._revoked = {}  # subject -> time of the last invalidation, oldest first, for claim-carrying tokens
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "claim_hits": 0, "evictions": 0, "invalidations": 0}
+
+    @property
+    def enabled(self):
+        return self.ttl_seconds > 0 and self.max_entries > 0
+
+    def get(self, subject: str):
+        """The cached column snapshot for subject, or None."""
+        with self._lock:
+            entry = self._entries.get(subject)
+            if entry is not None and time.monotonic() - entry[1] < self.ttl_seconds:
+                self._entries.move_to_end(subject)
+                self._stats["hits"] += 1
+                return entry[0]
+            if entry is not None:
+                del self._entries[subject]
+            self._stats["misses"] += 1
+            return None
+
+    def put(self, subject: str, snapshot: dict):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[subject] = (snapshot, time.monotonic())
+            self._entries.move_to_end(subject)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def invalidate(self, subject: str):
+        now = time.time()
+        with self._lock:
+            self._entries.pop(subject, None)
+            self._revoked.pop(subject, None)
+            self._revoked[subject] = now
+            # Claims issued before an older revocation have expired by now, so it can go
+            for old_subject, revoked in list(self._revoked.items()):
+                if now - revoked < self.claims_ttl_seconds:
+                    break
+                del self._revoked[old_subject]
+            self._stats["invalidations"] += 1
+
+    def claims_expires_at(self, issued_at: float):
+        return issued_at + self.claims_ttl_seconds
+
+    def claims_valid(self, subject: str, issued_at: float, expires_at: float):
+        """False for expired claims and for claims issued before the subject's profile last changed in this worker."""
+        if not issued_at or not expires_at or time.time() >= expires_at:
+            return False
+        revoked = self._revoked.get(subject)
+        return revoked is None or issued_at > revoked
+
+    def record_claim_hit(self):
+        self._stats["claim_hits"] += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"] + self._stats["claim_hits"]
+            served = self._stats["hits"] + self._stats["claim_hits"]
+            return dict(self._stats, entries=len(self._entries), revoked=len(self._revoked), ttl_seconds=self.ttl_seconds,
+                        hit_rate=round(served / lookups, 4) if lookups else 0.0)
+
+
+principal_cache = PrincipalCache()
@@ -0,0 +1,82 @@
+import os
+import json
+import time
+import hashlib
+import threading
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+# Writes in this worker invalidate at once; other workers pick them up within the TTL
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "60"))
+# Cache-Control max-age sent to browsers; after it they revalidate with If-None-Match
+RESPONSE_CACHE_MAX_AGE = int(os.getenv("RESPONSE_CACHE_MAX_AGE", "30"))
+
+NEWS_CACHE_KEY = "news"
+RESOURCES_CACHE_KEY = "resources"
+
+
+class ResponseCache:
+    """
+    In-process cache of serialized list responses with content-hash ETags.
+    A matching If-None-Match gets a bodyless 304. Since the ETag is a hash
+    of the body, every worker hands out the same tag for the same data.
+    """
+
+    def __init__(self, ttl_seconds: float = RESPONSE_CACHE_TTL_SECONDS, max_age: int = RESPONSE_CACHE_MAX_AGE):
+        self.ttl_seconds = ttl_seconds
+        self.max_age = max_age
+        self._entries = {}  # key -> (body, etag, created_at)
+        self._lock = threading.Lock()
+        self._build_locks = {}
+        self._generations = {}  # bumped by invalidate, so a build that raced a write isn't stored
+        self._stats = {"hits": 0, "misses": 0, "not_modified": 0, "invalidations": 0}
+
+    def _fresh(self, key):
+        entry = self._entries.get(key)
+        if entry is not None and time.monotonic() - entry[2] < self.ttl_seconds:
+            return entry
+        return None
+
+    def get(self, key: str, build):
+        """(body, etag) for key, calling build() for the data on a miss (once, however many callers wait)."""
+        entry = self._fresh(key)
+        if entry is None:
+            with self._lock:
+                build_lock = self._build_locks.setdefault(key, threading.Lock())
+            with build_lock:
+                entry = self._fresh(key)
+                if entry is None:
+                    generation = self._generations.get(key, 0)
+                    body = json.dumps(jsonable_encoder(build()), separators=(",", ":")).encode("utf-8")
+                    entry = (body, f'"{hashlib.sha1(body).hexdigest()}"', time.monotonic())
+                    with self._lock:
+                        if self._generations.get(key, 0) == generation:
+                            self._entries[key] = entry
+                    self._stats["misses"] += 1
+                    return entry[:2]
+        self._stats["hits"] += 1
+        return entry[:2]
+
+    def respond(self, request: Request, key: str, build):
+        body, etag = self.get(key, build)
+        headers = {"ETag": etag, "Cache-Control": f"public, max-age={self.max_age}, must-revalidate"}
+        if etag in request.headers.get("if-none-match", ""):
+            self._stats["not_modified"] += 1
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    def invalidate(self, *keys, reason: str = ""):
+        """Drops the given keys (all entries without any)."""
+        with self._lock:
+            for key in keys or set(self._entries) | set(self._generations):
+                self._entries.pop(key, None)
+                self._generations[key] = self._generations.get(key, 0) + 1
+            self._stats["invalidations"] += 1
+        print(f"Response cache invalidated ({reason}): {', '.join(keys) or 'all'}.")
+
+    def stats(self):
+        return dict(self._stats, entries=len(self._entries), ttl_seconds=self.ttl_seconds, max_age=self.max_age)
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,130 @@
+import os
+import asyncio
+import hashlib
+
+from services import ai_service
+from services.vector_index import VECTOR_STORE
+
+# hybrid = BM25 + vector fused by reciprocal rank, vector = embeddings only,
+# lexical = BM25 only (no embedding calls at all)
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "hybrid").lower()
+# A vector search slower than this is abandoned and lexical results are used
+VECTOR_SEARCH_TIMEOUT = float(os.getenv("VECTOR_SEARCH_TIMEOUT", "3"))
+# Standard RRF damping constant; higher values flatten the rank weights
+RRF_K = int(os.getenv("RRF_K", "60"))
+# How many candidates each retriever contributes before fusion
+RETRIEVAL_CANDIDATES = int(os.getenv("RETRIEVAL_CANDIDATES", "10"))
+
+_stats = {"hybrid": 0, "vector": 0, "lexical": 0, "vector_fallbacks": 0}
+
+
+def _doc_key(text: str):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def reciprocal_rank_fusion(*rankings, k: int = RRF_K):
+    """
+    Fuses ranked lists of (key, item) pairs. Each list adds 1 / (k + rank)
+    to an item's score; returns items ordered by the fused score.
+    """
+    scores, items = {}, {}
+    for ranking in rankings:
+        for rank, (key, item) in enumerate(ranking, start=1):
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+            items.setdefault(key, item)
+    return [items[key] for key in sorted(scores, key=scores.get, reverse=True)]
+
+
+def lexical_search(question: str, k: int):
+    from langchain_core.documents import Document
+
+    index = ai_service.get_lexical_index()
+    if index is None:
+        return []
+    results = []
+    for doc_id, score in index.search(question, k):
+        text, metadata = index.documents[doc_id]
+        results.append(Document(page_content=text, metadata=dict(metadata or {}, bm25_score=round(score, 3))))
+    return results
+
+
+def index_search(index, question: str, query_embedding, k: int):
+    from langchain_core.documents import Document
+
+    if query_embedding is None:
+        embedding_function = ai_service.get_embedding_function()
+        if embedding_function is None:
+            return None
+        query_embedding = embedding_function.embed_query(question)
+    results = []
+    for doc_id, score in index.search(query_embedding, k):
+        text, metadata = index.documents[doc_id]
+        results.append(Document(page_content=text, metadata=dict(metadata or {}, cosine=round(score, 4))))
+    return results
+
+
+async def vector_search(question: str, query_embedding, k: int):
+    if VECTOR_STORE == "mmap":
+        index = ai_service.get_vector_index()
+        if index is not None and len(index):
+            search = asyncio.to_thread(index_search, index, question, query_embedding, k)
+            return await asyncio.wait_for(search, timeout=VECTOR_SEARCH_TIMEOUT)
+    # The first call builds the Chroma client, which does disk I/O
+    vector_db = await asyncio.to_thread(ai_service.get_vector_db)
+    if vector_db is None:
+        return None
+    if query_embedding is not None:
+        # Reuse the embedding computed for the answer cache lookup
+        search = asyncio.to_thread(vector_db.similarity_search_by_vector, query_embedding, k=k)
+    else:
+        search = asyncio.to_thread(vector_db.similarity_search, question, k=k)
+    return await asyncio.wait_for(search, timeout=VECTOR_SEARCH_TIMEOUT)
+
+
+async def retrieve(question: str, query_embedding=None, k: int = 3, mode: str = None):
+    """
+    Returns up to k Documents for the question. In hybrid mode the vector
+    and BM25 rankings are fused with RRF; if the vector search fails or is
+    too slow, the lexical ranking is used on its own.
+    """
+    mode = mode or RETRIEVAL_MODE
+    candidates = max(k, RETRIEVAL_CANDIDATES)
+
+    if mode == "lexical":
+        _stats["lexical"] += 1
+        return await asyncio.to_thread(lexical_search, question, k)
+
+    lexical_task = None
+    if mode == "hybrid":
+        lexical_task = asyncio.ensure_future(asyncio.to_thread(lexical_search, question, candidates))
+
+    try:
+        vector_docs = await vector_search(question, query_embedding, candidates if lexical_task else k)
+    except Exception as e:
+        print(f"Vector search unavailable ({type(e).__name__}: {e}); using lexical results.")
+        vector_docs = None
+    if vector_docs is None:
+        _stats["vector_fallbacks"] += 1
+
+    if lexical_task is None:
+        if vector_docs is not None:
+            _stats["vector"] += 1
+            return vector_docs
+        # vector mode with a broken vector store still beats an empty context
+        return await asyncio.to_thread(lexical_search, question, k)
+
+    lexical_docs = await lexical_task
+    if not vector_docs:
+        _stats["lexical"] += 1
+        return lexical_docs[:k]
+
+    _stats["hybrid"] += 1
+    fused = reciprocal_rank_fusion(
+        [(_doc_key(d.page_content), d) for d in vector_docs],
+        [(_doc_key(d.page_content), d) for d in lexical_docs],
+    )
+    return fused[:k]
+
+
+def stats():
+    return dict(_stats, mode=RETRIEVAL_MODE, vector_store=VECTOR_STORE)
@@ -0,0 +1,63 @@
+import time
+import threading
+from contextlib import contextmanager
+
+# Reference point for the whole report: the first import of this module,
+# which main.py does before anything else.
+_process_started = time.perf_counter()
+_lock = threading.Lock()
+_entries = []
+_ready_at = None
+
+
+@contextmanager
+def timed(component: str, phase: str = "init"):
+    """Records how long the wrapped block took under `component`."""
+    started = time.perf_counter()
+    error = None
+    try:
+        yield
+    except Exception as e:
+        error = str(e)
+        raise
+    finally:
+        record(component, time.perf_counter() - started, phase, error)
+
+
+def record(component: str, seconds: float, phase: str = "init", error: str = None):
+    with _lock:
+        _entries.append({
+            "component": component,
+            "phase": phase,
+            "seconds": round(seconds, 4),
+            "at_seconds": round(time.perf_counter() - _process_started, 4),
+            "error": error,
+        })
+
+
+def mark_ready():
+    """Call once the app can serve requests."""
+    global _ready_at
+    _ready_at = time.perf_counter() - _process_started
+
+
+def report():
+    with _lock:
+        entries = sorted(_entries, key=lambda e: e["seconds"], reverse=True)
+    by_phase = {}
+    for entry in entries:
+        by_phase[entry["phase"]] = round(by_phase.get(entry["phase"], 0.0) + entry["seconds"], 4)
+    return {
+        "ready_seconds": round(_ready_at, 4) if _ready_at is not None else None,
+        "uptime_seconds": round(time.perf_counter() - _process_started, 1),
+        "totals_by_phase": by_phase,
+        "components": entries,
+    }
+
+
+def print_report():
+    data = report()
+    print(f"Startup timing (ready after {data['ready_seconds']}s):")
+    for entry in data["components"]:
+        status = f" ERROR: {entry['error']}" if entry["error"] else ""
+        print(f"  {entry['phase']:<7} {entry['component']:<24} {entry['seconds']:>8.3f}s{status}")
@@ -0,0 +1,225 @@
+import os
+import time
+import random
+import asyncio
+from collections import OrderedDict
+
+import httpx
+
+# Telegram allows ~30 msg/s overall and ~1 msg/s per chat.
+TELEGRAM_API_BASE = os.getenv("TELEGRAM_API_BASE", "https://api.telegram.org")
+TELEGRAM_GLOBAL_RATE = float(os.getenv("TELEGRAM_GLOBAL_RATE", "30"))
+TELEGRAM_PER_CHAT_RATE = float(os.getenv("TELEGRAM_PER_CHAT_RATE", "1"))
+TELEGRAM_MAX_RETRIES = int(os.getenv("TELEGRAM_MAX_RETRIES", "5"))
+TELEGRAM_MAX_MESSAGE_LENGTH = 4096
+
+
+class TokenBucket:
+    """Async token bucket: `rate` tokens per second, bursting up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def block_for(self, seconds: float):
+        """Stop handing out tokens for a while (used for Telegram's retry_after)."""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+    async def acquire(self):
+        """Waits for a token. Returns how long the caller had to wait."""
+        waited = 0.0
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    delay = self.blocked_until - now
+                else:
+                    self._refill(now)
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return waited
+                    delay = (1 - self.tokens) / self.rate
+                waited += delay
+                await asyncio.sleep(delay)
+
+
+def split_message(text: str, limit: int = TELEGRAM_MAX_MESSAGE_LENGTH):
+    """
+    Splits text into ordered parts no longer than `limit`, preferring
+    paragraph, then line, then word boundaries.
+    """
+    parts = []
+    text = text or ""
+    while len(text) > limit:
+        window = text[:limit]
+        cut = -1
+        for separator in ("\n\n", "\n", " "):
+            cut = window.rfind(separator)
+            if cut > limit // 2:
+                break
+        if cut <= 0:
+            cut = limit
+        parts.append(text[:cut].rstrip())
+        text = text[cut:].lstrip()
+    if text or not parts:
+        parts.append(text)
+    return parts
+
+
+class TelegramSendError(Exception):
+    pass
+
+
+class TelegramRetryLater(Exception):
+    """A part hit a 429, 5xx or network error; `parts` should be sent again after `delay` seconds."""
+
+    def __init__(self, delay: float, parts, attempt: int, error: str):
+        super().__init__(f"retry in {delay:.1f}s after {error}")
+        self.delay = delay
+        self.parts = parts
+        self.attempt = attempt
+
+
+class TelegramSender:
+    """
+    Outbound sendMessage client that respects Telegram's limits.
+
+    Every part waits on a global and a per-chat token bucket. A 429 blocks
+    both the chat and the global bucket for `retry_after`; 5xx and network
+    errors back off exponentially. Long answers are split and sent as
+    ordered parts. `send_parts` makes one pass and raises TelegramRetryLater
+    so a caller with a queue can retry without holding a worker;
+    `send_message` waits and retries in place.
+    """
+
+    def __init__(self, token, api_base=TELEGRAM_API_BASE, global_rate=TELEGRAM_GLOBAL_RATE,
+                 per_chat_rate=TELEGRAM_PER_CHAT_RATE, max_retries=TELEGRAM_MAX_RETRIES,
+                 backoff_seconds=0.5, transport=None):
+        self.token = token
+        self.api_base = api_base.rstrip("/")
+        self.per_chat_rate = per_chat_rate
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.transport = transport
+        self.client = None
+        self.global_bucket = TokenBucket(global_rate)
+        self._chat_buckets = OrderedDict()
+        self._stats = {
+            "sent": 0,
+            "parts_sent": 0,
+            "throttled": 0,
+            "rate_limited": 0,
+            "retried": 0,
+            "failed": 0,
+            "throttled_seconds": 0.0,
+        }
+
+    async def start(self):
+        if self.client is None:
+            self.client = httpx.AsyncClient(
+                transport=self.transport,
+                timeout=httpx.Timeout(15.0, connect=5.0),
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=10)
+            )
+
+    async def stop(self):
+        if self.client:
+            await self.client.aclose()
+            self.client = None
+
+    def _chat_bucket(self, chat_id):
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = self._chat_buckets[chat_id] = TokenBucket(self.per_chat_rate, capacity=1)
+            # Forget the least recently used chats so the map stays bounded
+            while len(self._chat_buckets) > 10000:
+                self._chat_buckets.popitem(last=False)
+        self._chat_buckets.move_to_end(chat_id)
+        return bucket
+
+    async def send_message(self, chat_id, text: str):
+        """Sends `text`, split into parts if needed. Raises TelegramSendError if a part can't be delivered."""
+        parts, attempt = split_message(text), 0
+        while True:
+            try:
+                await self.send_parts(chat_id, parts, attempt)
+                break
+            except TelegramRetryLater as retry:
+                parts, attempt = retry.parts, retry.attempt
+                await asyncio.sleep(retry.delay)
+        self._stats["sent"] += 1
+
+    async def send_parts(self, chat_id, parts, attempt: int = 0):
+        """
+        Sends `parts` in order, trying each once. `attempt` is how many times
+        the first part already failed. Raises TelegramRetryLater with the
+        unsent parts on a retryable error, TelegramSendError once retries
+        are used up or the error is permanent.
+        """
+        await self.start()
+        for i, part in enumerate(parts):
+            delay, error = await self._send_part(chat_id, part, attempt)
+            if error:
+                if delay is None or attempt >= self.max_retries:
+                    self._stats["failed"] += 1
+                    raise TelegramSendError(f"sendMessage to chat {chat_id} failed: {error}")
+                raise TelegramRetryLater(delay, parts[i:], attempt + 1, error)
+            attempt = 0
+
+    async def _send_part(self, chat_id, text, attempt):
+        """Returns (None, None) once sent, else (seconds to wait before a retry or None if pointless, error)."""
+        url = f"{self.api_base}/bot{self.token}/sendMessage"
+        chat_bucket = self._chat_bucket(chat_id)
+        waited = await chat_bucket.acquire() + await self.global_bucket.acquire()
+        if waited > 0:
+            self._stats["throttled"] += 1
+            self._stats["throttled_seconds"] += waited
+        if attempt:
+            self._stats["retried"] += 1
+
+        try:
+            response = await self.client.post(url, json={"chat_id": chat_id, "text": text})
+        except httpx.HTTPError as e:
+            return self._backoff(attempt), f"network error: {e}"
+
+        if response.status_code == 200:
+            self._stats["parts_sent"] += 1
+            return None, None
+
+        body = _json_or_empty(response)
+        error = f"{response.status_code}: {body.get('description', response.text[:200])}"
+        if response.status_code == 429:
+            self._stats["rate_limited"] += 1
+            retry_after = float((body.get("parameters") or {}).get("retry_after", 1))
+            # Telegram counts the bot as a whole too, so every chat waits out retry_after
+            chat_bucket.block_for(retry_after)
+            self.global_bucket.block_for(retry_after)
+            return retry_after, error
+        if response.status_code >= 500:
+            return self._backoff(attempt), error
+        # Other 4xx (bad chat id, bot blocked by user...) won't succeed on retry
+        return None, error
+
+    def _backoff(self, attempt):
+        return self.backoff_seconds * (2 ** attempt) * (0.5 + random.random() / 2)
+
+    def stats(self):
+        stats = dict(self._stats)
+        stats["throttled_seconds"] = round(stats["throttled_seconds"], 3)
+        stats["tracked_chats"] = len(self._chat_buckets)
+        return stats
+
+
+def _json_or_empty(response):
+    try:
+        return response.json()
+    except ValueError:
+        return {}
@@ -0,0 +1,177 @@
+import os
+import time
+import asyncio
+from collections import OrderedDict, deque
+
+from services.telegram_sender import TelegramSender, TelegramRetryLater, split_message, TELEGRAM_API_BASE
+
+TELEGRAM_WORKERS = int(os.getenv("TELEGRAM_WORKERS", "4"))
+# Per-worker queue bound; when a shard is full the webhook asks Telegram to retry later
+TELEGRAM_QUEUE_SIZE = int(os.getenv("TELEGRAM_QUEUE_SIZE", "100"))
+
+
+class TelegramDispatcher:
+    """
+    Accepts webhook updates, queues them and answers them on a fixed pool
+    of async workers. Updates are sharded by chat id, so each chat is
+    always handled by the same worker and replies stay in order.
+    Replies go out through a rate-limited TelegramSender that holds one
+    pooled keep-alive HTTP client. A reply that hits a 429 or a transient
+    error goes back on its worker's queue once the wait is over, so the
+    worker keeps answering other chats meanwhile; later replies to the same
+    chat are held behind it.
+    """
+
+    def __init__(self, answer_fn, token, workers=TELEGRAM_WORKERS, queue_size=TELEGRAM_QUEUE_SIZE,
+                 api_base=TELEGRAM_API_BASE, sender=None):
+        self.answer_fn = answer_fn
+        self.sender = sender or TelegramSender(token, api_base=api_base)
+        self.queues = [asyncio.Queue(maxsize=queue_size) for _ in range(workers)]
+        # Enqueue times per queue, oldest first, for the current-lag stat
+        self._enqueued_at = [deque() for _ in range(workers)]
+        self._tasks = []
+        self._timers = set()
+        # chat id -> {"parts", "attempt", "replies"} of replies waiting to be retried
+        self._retrying = {}
+        self._seen_updates = OrderedDict()
+        self._stats = {
+            "received": 0,
+            "duplicates": 0,
+            "started": 0,
+            "rejected": 0,
+            "processed": 0,
+            "failed": 0,
+            "deferred": 0,
+            "lag_seconds_total": 0.0,
+            "lag_seconds_max": 0.0,
+            "processing_seconds_total": 0.0,
+        }
+
+    @property
+    def running(self):
+        return bool(self._tasks)
+
+    async def start(self):
+        if self.running:
+            return
+        await self.sender.start()
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(len(self.queues))]
+
+    async def stop(self):
+        for timer in self._timers:
+            timer.cancel()
+        self._timers.clear()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await self.sender.stop()
+
+    def submit(self, update: dict):
+        """
+        Queues a webhook update. Returns False only when the update should
+        be redelivered by Telegram (its worker queue is full).
+        """
+        message = update.get("message") or {}
+        chat_id = (message.get("chat") or {}).get("id")
+        text = message.get("text", "")
+        if chat_id is None or not text:
+            return True
+
+        # Telegram redelivers on timeouts; don't answer the same update twice
+        update_id = update.get("update_id")
+        if update_id is not None:
+            if update_id in self._seen_updates:
+                self._stats["duplicates"] += 1
+                return True
+            self._seen_updates[update_id] = True
+            while len(self._seen_updates) > 10000:
+                self._seen_updates.popitem(last=False)
+
+        shard = hash(chat_id) % len(self.queues)
+        enqueued_at = time.monotonic()
+        try:
+            self.queues[shard].put_nowait((chat_id, text, enqueued_at))
+            self._enqueued_at[shard].append(enqueued_at)
+        except asyncio.QueueFull:
+            self._stats["rejected"] += 1
+            if update_id is not None:
+                self._seen_updates.pop(update_id, None)
+            return False
+        self._stats["received"] += 1
+        return True
+
+    async def _worker(self, shard):
+        queue = self.queues[shard]
+        while True:
+            chat_id, text, enqueued_at = await queue.get()
+            self._enqueued_at[shard].popleft()
+            started = time.monotonic()
+            lag = started - enqueued_at
+            self._stats["started"] += 1
+            self._stats["lag_seconds_total"] += lag
+            self._stats["lag_seconds_max"] = max(self._stats["lag_seconds_max"], lag)
+            replies = 1
+            try:
+                if text is None:
+                    # Replies put back by _retry_later; their parts are waiting here
+                    retry = self._retrying.pop(chat_id)
+                    replies = retry["replies"]
+                    await self._deliver(shard, chat_id, retry["parts"], retry["attempt"], replies)
+                else:
+                    reply = await self.answer_fn(text)
+                    if chat_id in self._retrying:
+                        # Sent after the reply that is waiting, so the chat sees them in order
+                        self._retrying[chat_id]["parts"].extend(split_message(reply))
+                        self._retrying[chat_id]["replies"] += 1
+                    else:
+                        await self._deliver(shard, chat_id, split_message(reply))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._stats["failed"] += replies
+                print(f"Telegram worker error for chat {chat_id}: {e}")
+            finally:
+                self._stats["processing_seconds_total"] += time.monotonic() - started
+                queue.task_done()
+
+    async def _deliver(self, shard, chat_id, parts, attempt=0, replies=1):
+        try:
+            await self.sender.send_parts(chat_id, parts, attempt)
+        except TelegramRetryLater as retry:
+            self._stats["deferred"] += 1
+            self._retrying[chat_id] = {"parts": retry.parts, "attempt": retry.attempt, "replies": replies}
+            self._retry_later(shard, chat_id, retry.delay)
+            return
+        self._stats["processed"] += replies
+
+    def _retry_later(self, shard, chat_id, delay):
+        def requeue():
+            self._timers.discard(timer)
+            enqueued_at = time.monotonic()
+            try:
+                self.queues[shard].put_nowait((chat_id, None, enqueued_at))
+                self._enqueued_at[shard].append(enqueued_at)
+            except asyncio.QueueFull:
+                self._retry_later(shard, chat_id, 1.0)
+
+        timer = asyncio.get_running_loop().call_later(delay, requeue)
+        self._timers.add(timer)
+
+    def stats(self):
+        stats = dict(self._stats)
+        done = stats["processed"] + stats["failed"]
+        stats["queue_depth"] = sum(q.qsize() for q in self.queues)
+        stats["queue_depth_per_worker"] = [q.qsize() for q in self.queues]
+        stats["workers"] = len(self._tasks)
+        lag_total = stats.pop("lag_seconds_total")
+        processing_total = stats.pop("processing_seconds_total")
+        stats["lag_seconds_avg"] = round(lag_total / stats["started"], 3) if stats["started"] else 0.0
+        stats["processing_seconds_avg"] = round(processing_total / done, 3) if done else 0.0
+        stats["lag_seconds_max"] = round(stats["lag_seconds_max"], 3)
+        # Age of the oldest update still waiting, i.e. current processing lag
+        now = time.monotonic()
+        waiting = [times[0] for times in self._enqueued_at if times]
+        stats["oldest_pending_seconds"] = round(now - min(waiting), 3) if waiting else 0.0
+        stats["sender"] = self.sender.stats()
+        return stats
@@ -0,0 +1,143 @@
+import os
+import json
+
+import numpy as np
+
+from services.index_files import replace_dir
+
+# mmap = search the exported in-process index (shared by all workers), chroma = query Chroma
+VECTOR_STORE = os.getenv("VECTOR_STORE", "mmap").lower()
+VECTOR_INDEX_PATH = os.getenv("VECTOR_INDEX_PATH", "vector_index")
+# Storage type for exported vectors: float32 (exact), float16 (half the size) or int8 (a quarter)
+VECTOR_INDEX_DTYPE = os.getenv("VECTOR_INDEX_DTYPE", "float32").lower()
+# Rows scored per block for float16/int8, bounding the temporary float32 copy
+SCORE_BLOCK_ROWS = 16384
+
+DTYPES = {"float32": np.float32, "float16": np.float16, "int8": np.int8}
+
+
+def _normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors[None, :]
+    return vectors / (np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-12)
+
+
+class VectorIndex:
+    """
+    Exact cosine-similarity index over a contiguous embedding matrix.
+
+    The matrix is saved as a plain .npy file and memory-mapped read-only,
+    so every worker on the machine shares the same page-cache copy. A
+    search is one matrix product (for a whole batch of queries) followed
+    by a partial sort.
+    """
+
+    def __init__(self, vectors, documents, scales=None, meta=None):
+        self.vectors = vectors    # (n, dim), unit rows; int8 rows are scaled by `scales`
+        self.scales = scales      # float32 per-row scale for int8, else None
+        self.documents = documents
+        self.meta = meta or {}
+
+    def __len__(self):
+        return len(self.documents)
+
+    @property
+    def dim(self):
+        return self.vectors.shape[1] if self.vectors.ndim == 2 else 0
+
+    @property
+    def nbytes(self):
+        return self.vectors.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+
+    @classmethod
+    def build(cls, vectors, documents, dtype: str = VECTOR_INDEX_DTYPE, meta=None):
+        if dtype not in DTYPES:
+            raise ValueError(f"Unknown vector dtype '{dtype}' (choose from {', '.join(DTYPES)})")
+        unit = _normalize(vectors) if len(documents) else np.zeros((0, 0), dtype=np.float32)
+        scales = None
+        if dtype == "int8":
+            # Symmetric per-row quantization: each row uses its full int8 range
+            scales = (np.abs(unit).max(axis=1) / 127.0).astype(np.float32)
+            scales[scales == 0] = 1.0
+            stored = np.round(unit / scales[:, None]).astype(np.int8)
+        else:
+            stored = unit.astype(DTYPES[dtype])
+        return cls(stored, list(documents), scales, dict(meta or {}, dtype=dtype))
+
+    def save(self, path: str = VECTOR_INDEX_PATH):
+        """Writes the index to a fresh directory and swaps it in, so live mmaps are never rewritten."""
+        replace_dir(path, self._write)
+
+    def _write(self, path: str):
+        np.save(os.path.join(path, "vectors.npy"), np.ascontiguousarray(self.vectors))
+        if self.scales is not None:
+            np.save(os.path.join(path, "scales.npy"), self.scales)
+        with open(os.path.join(path, "documents.jsonl"), "w", encoding="utf-8") as f:
+            for text, metadata in self.documents:
+                f.write(json.dumps({"text": text, "metadata": metadata or {}}) + "\n")
+        with open(os.path.join(path, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(dict(self.meta, count=len(self.documents), dim=self.dim), f)
+
+    @classmethod
+    def load(cls, path: str = VECTOR_INDEX_PATH):
+        """Loads an exported index with its vectors memory-mapped read-only."""
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        # An empty array can't be memory-mapped
+        vectors = np.load(os.path.join(path, "vectors.npy"), mmap_mode="r" if meta.get("count") else None)
+        scales_path = os.path.join(path, "scales.npy")
+        scales = np.load(scales_path) if os.path.exists(scales_path) else None
+        documents = []
+        with open(os.path.join(path, "documents.jsonl"), encoding="utf-8") as f:
+            for line in f:
+                row = json.loads(line)
+                documents.append((row["text"], row["metadata"]))
+        return cls(vectors, documents, scales, meta)
+
+    @staticmethod
+    def exists(path: str = VECTOR_INDEX_PATH):
+        return os.path.exists(os.path.join(path, "meta.json"))
+
+    def scores(self, query_vectors):
+        """Cosine similarities, shape (queries, n)."""
+        queries = _normalize(query_vectors)
+        if self.vectors.dtype == np.float32:
+            return queries @ self.vectors.T
+        out = np.empty((len(queries), len(self)), dtype=np.float32)
+        for start in range(0, len(self), SCORE_BLOCK_ROWS):
+            block = np.asarray(self.vectors[start:start + SCORE_BLOCK_ROWS], dtype=np.float32)
+            out[:, start:start + len(block)] = queries @ block.T
+        if self.scales is not None:
+            out *= self.scales
+        return out
+
+    def search_batch(self, query_vectors, k: int = 3):
+        """Returns, per query, up to k (doc_id, score) pairs, best first."""
+        if not len(self):
+            return [[] for _ in range(len(np.atleast_2d(query_vectors)))]
+        scores = self.scores(query_vectors)
+        k = min(k, len(self))
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        results = []
+        for row, candidates in zip(scores, top):
+            ordered = candidates[np.argsort(-row[candidates], kind="stable")]
+            results.append([(int(i), float(row[i])) for i in ordered])
+        return results
+
+    def search(self, query_vector, k: int = 3):
+        return self.search_batch(query_vector, k)[0]
+
+
+def export_from_chroma(db_path: str, collection_name: str = "langchain", path: str = VECTOR_INDEX_PATH,
+                       dtype: str = VECTOR_INDEX_DTYPE):
+    """Copies a Chroma collection's embeddings and chunks into a VectorIndex on disk."""
+    import chromadb
+
+    client = chromadb.PersistentClient(path=db_path)
+    data = client.get_collection(collection_name).get(include=["embeddings", "documents", "metadatas"])
+    documents = list(zip(data["documents"], data["metadatas"] or [{}] * len(data["documents"])))
+    index = VectorIndex.build(data["embeddings"], documents, dtype, meta={"collection": collection_name})
+    if path:
+        index.save(path)
+    return index
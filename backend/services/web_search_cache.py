@@ -0,0 +1,148 @@
+import os
+import time
+import asyncio
+from collections import OrderedDict
+
+from services.answer_cache import normalize_text
+
+WEB_SEARCH_TTL_SECONDS = int(os.getenv("WEB_SEARCH_TTL_SECONDS", "300"))
+# How long past the TTL a hot entry may still be served while it refreshes
+WEB_SEARCH_STALE_SECONDS = int(os.getenv("WEB_SEARCH_STALE_SECONDS", "900"))
+# Hits an entry needs before it counts as "hot" and gets stale-while-revalidate
+WEB_SEARCH_HOT_HITS = int(os.getenv("WEB_SEARCH_HOT_HITS", "3"))
+WEB_SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("WEB_SEARCH_CACHE_MAX_ENTRIES", "1024"))
+
+# Words that don't change what a news search returns
+STOPWORDS = {
+    "a", "an", "the", "is", "are", "was", "were", "be", "been", "do", "does", "did",
+    "i", "me", "my", "we", "our", "you", "your", "it", "its", "of", "to", "in", "on",
+    "for", "and", "or", "at", "by", "with", "about", "please", "can", "could", "will",
+    "would", "what", "whats", "yet", "now", "has", "have", "there", "any", "that", "this",
+}
+
+
+def normalize_query(query: str):
+    return " ".join(w for w in normalize_text(query).split() if w not in STOPWORDS)
+
+
+class _Entry:
+    __slots__ = ("result", "fetched_at", "hits")
+
+    def __init__(self, result):
+        self.result = result
+        self.fetched_at = time.monotonic()
+        self.hits = 0
+
+
+class WebSearchCache:
+    """
+    Short-TTL cache for web search results.
+
+    Concurrent misses for the same key share a single upstream call
+    (single-flight). Hot entries past their TTL are served stale while
+    one background refresh runs.
+    """
+
+    def __init__(self, ttl_seconds=WEB_SEARCH_TTL_SECONDS, stale_seconds=WEB_SEARCH_STALE_SECONDS,
+                 hot_hits=WEB_SEARCH_HOT_HITS, max_entries=WEB_SEARCH_CACHE_MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self.hot_hits = hot_hits
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._stats = {
+            "hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "upstream_calls": 0,
+            "background_refreshes": 0,
+            "errors": 0,
+        }
+
+    @staticmethod
+    def make_key(query, include_domains=None, **params):
+        domains = tuple(sorted(d.lower() for d in include_domains or []))
+        return (normalize_query(query), domains, tuple(sorted(params.items())))
+
+    def _store(self, key, result):
+        self._entries[key] = _Entry(result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _start_fetch(self, key, fetch, query, include_domains, params):
+        async def run():
+            self._stats["upstream_calls"] += 1
+            try:
+                result = await asyncio.to_thread(fetch, query=query, include_domains=include_domains, **params)
+            except Exception:
+                self._stats["errors"] += 1
+                raise
+            self._store(key, result)
+            return result
+
+        task = asyncio.ensure_future(run())
+        self._inflight[key] = task
+        task.add_done_callback(lambda t: self._inflight.pop(key, None))
+        # Mark the exception retrieved so an unawaited background refresh doesn't warn
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        return task
+
+    async def search(self, fetch, query: str, include_domains=None, **params):
+        """
+        Returns the search result for `query`, calling `fetch` (a blocking
+        function such as TavilyClient.search) only when needed.
+        """
+        key = self.make_key(query, include_domains, **params)
+        entry = self._entries.get(key)
+        now = time.monotonic()
+
+        if entry is not None:
+            age = now - entry.fetched_at
+            if age < self.ttl_seconds:
+                entry.hits += 1
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return entry.result
+            if age < self.ttl_seconds + self.stale_seconds and entry.hits >= self.hot_hits:
+                entry.hits += 1
+                self._stats["stale_hits"] += 1
+                if key not in self._inflight:
+                    self._stats["background_refreshes"] += 1
+                    self._start_fetch(key, fetch, query, include_domains, params)
+                return entry.result
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self._stats["coalesced"] += 1
+        else:
+            self._stats["misses"] += 1
+            task = self._start_fetch(key, fetch, query, include_domains, params)
+
+        try:
+            # Shield so one cancelled waiter doesn't cancel the call for everyone
+            return await asyncio.shield(task)
+        except Exception:
+            if entry is not None and now - entry.fetched_at < self.ttl_seconds + self.stale_seconds:
+                # Upstream failed: an old answer beats no answer
+                self._stats["stale_hits"] += 1
+                return entry.result
+            raise
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self):
+        stats = dict(self._stats)
+        stats["entries"] = len(self._entries)
+        stats["inflight"] = len(self._inflight)
+        lookups = stats["hits"] + stats["stale_hits"] + stats["misses"] + stats["coalesced"]
+        stats["hit_rate"] = round((lookups - stats["misses"]) / lookups, 4) if lookups else 0.0
+        stats["ttl_seconds"] = self.ttl_seconds
+        return stats
+
+
+# Shared instance used by the answer pipeline
+web_search_cache = WebSearchCache()
@@ -0,0 +1,35 @@
+import os
+import subprocess
+import sys
+
+from services import ai_service
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def test_importing_main_does_not_import_the_ai_sdks():
+    # A fresh interpreter: this one may already have them from other tests
+    code = ("import sys, main; print(sorted({m.split('.')[0] for m in sys.modules "
+            "if m.startswith(('langchain', 'chromadb', 'openai', 'tavily'))}))")
+    env = dict(os.environ, SECRET_KEY=os.getenv("SECRET_KEY", "test"))
+    result = subprocess.run([sys.executable, "-c", code], cwd=BACKEND_DIR, env=env,
+                            capture_output=True, text=True, check=True)
+    assert result.stdout.strip().splitlines()[-1] == "[]"
+
+
+def test_failed_factory_is_cached_as_unavailable(monkeypatch):
+    calls = []
+
+    def broken():
+        calls.append(1)
+        raise RuntimeError("no API key")
+
+    monkeypatch.setattr(ai_service, "_components", {})
+    monkeypatch.setitem(ai_service._FACTORIES, "tavily", broken)
+    assert ai_service.status()["tavily"] == "not loaded"
+
+    assert ai_service.get_tavily() is None
+    assert ai_service.get_tavily() is None
+    assert calls == [1]  # not retried on every request
+    assert ai_service.is_loaded("tavily")
+    assert ai_service.status()["tavily"] == "unavailable"
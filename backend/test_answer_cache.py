@@ -0,0 +1,66 @@
+from services.answer_cache import AnswerCache, SharedVersion, normalize_text
+
+def test_exact_match_ignores_case_and_punctuation():
+    cache = AnswerCache(ttl_seconds=60, max_entries=10)
+    cache.put("When is camp?", "Camp starts soon.", compute_seconds=2.0)
+
+    assert cache.get("  when is CAMP ") == "Camp starts soon."
+    assert normalize_text("LA/24A, Form 4!") == "la/24a form 4"
+    assert cache.stats()["saved_seconds"] == 2.0
+
+def test_semantic_match_uses_threshold():
+    cache = AnswerCache(ttl_seconds=60, max_entries=10, similarity_threshold=0.9)
+    cache.put("How do I get my call-up letter", "Print it from the portal.", embedding=[1.0, 0.0])
+
+    assert cache.get_similar([0.99, 0.05]) == "Print it from the portal."
+    assert cache.get_similar([0.0, 1.0]) is None
+    stats = cache.stats()
+    assert stats["semantic_hits"] == 1
+    assert stats["misses"] == 1
+
+def test_ttl_lru_and_invalidation():
+    cache = AnswerCache(ttl_seconds=0, max_entries=10)
+    cache.put("a", "A")
+    assert cache.get("a") is None
+
+    cache = AnswerCache(ttl_seconds=60, max_entries=2)
+    cache.put("a", "A")
+    cache.put("b", "B")
+    cache.get("a")
+    cache.put("c", "C")
+    assert cache.get("b") is None
+    assert cache.get("a") == "A"
+
+    cache.invalidate("test")
+    assert cache.get("a") is None
+
+def test_answers_computed_before_an_invalidation_are_not_stored():
+    cache = AnswerCache(ttl_seconds=60, max_entries=10)
+    generation = cache.generation
+    assert cache.get("When is camp?") is None
+    cache.invalidate("news fetch")  # lands while the answer is being generated
+    cache.put("When is camp?", "Old answer.", generation=generation)
+    assert cache.get("When is camp?") is None and cache.stats()["stale_puts"] == 1
+
+    cache.put("When is camp?", "New answer.", generation=cache.generation)
+    assert cache.get("When is camp?") == "New answer."
+
+def test_invalidation_in_one_worker_reaches_the_others(session_factory):
+    leader = AnswerCache(ttl_seconds=3600, shared=SharedVersion(session_factory=session_factory), sync_seconds=0)
+    worker = AnswerCache(ttl_seconds=3600, shared=SharedVersion(session_factory=session_factory), sync_seconds=0)
+    worker.sync()
+    worker.put("When is camp?", "Camp starts Monday.")
+
+    leader.invalidate("news fetch")  # the scheduler leader stored fresh news
+    leader.invalidate("news indexed")
+    assert worker.get("When is camp?") == "Camp starts Monday."  # until its next sync
+    generation = worker.generation
+    assert worker.sync_due()
+    worker.sync()
+    assert worker.get("When is camp?") is None and worker.generation != generation
+    assert worker.stats()["remote_invalidations"] == 1
+
+    # Its own invalidations don't bounce back
+    worker.put("When is camp?", "Camp starts Tuesday.")
+    leader.sync()
+    assert leader.stats()["remote_invalidations"] == 0
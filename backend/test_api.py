@@ -1,6 +1,7 @@
 from fastapi.testclient import TestClient
 from main import app
 import os
+import json
 
 client = TestClient(app)
 
@@ -64,6 +65,163 @@ def test_public_routes():
     assert response.status_code == 200
     assert isinstance(response.json(), list)
 
+def parse_sse(body: str):
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+def test_ask_stream_sends_tokens_then_sources_and_caches_the_answer(monkeypatch):
+    import main
+    from langchain_core.documents import Document
+    from services.answer_cache import AnswerCache
+
+    class FakeChunk:
+        def __init__(self, content):
+            self.content = content
+
+    class FakeLLM:
+        model_name = "gpt-4o-mini"
+        calls = 0
+
+        async def astream(self, messages):
+            FakeLLM.calls += 1
+            for part in ("Camp lasts ", "three weeks."):
+                yield FakeChunk(part)
+
+    async def no_faq(question):
+        return None
+
+    async def loaded(*names):
+        pass
+
+    async def fake_context(question, query_embedding=None, on_progress=None):
+        if on_progress:
+            on_progress({"stage": "retrieval", "status": "done", "results": 1, "ms": 1.0})
+        documents = [Document(page_content="Orientation camp lasts three weeks.", metadata={"source": "faq.pdf", "page": 2})]
+        web_results = [{"title": "Batch B camp opens", "url": "https://nysc.gov.ng/camp", "content": "Camp opens Monday."}]
+        return documents, web_results, {"retrieval": 1.0}
+
+    monkeypatch.setattr(main, "answer_from_faq", no_faq)
+    monkeypatch.setattr(main, "gather_context", fake_context)
+    monkeypatch.setattr(main, "answer_cache", AnswerCache(ttl_seconds=60))
+    monkeypatch.setattr(main.ai_service, "ensure_loaded", loaded)
+    monkeypatch.setattr(main.ai_service, "get_llm", FakeLLM)
+    monkeypatch.setattr(main.ai_service, "get_embedding_function", lambda: None)
+
+    response = client.post("/ask/stream", json={"question": "How long is camp?"})
+    assert response.status_code == 200 and response.headers["content-type"].startswith("text/event-stream")
+    events = parse_sse(response.text)
+    assert [data["text"] for name, data in events if name == "token"] == ["Camp lasts ", "three weeks."]
+    assert ("progress", {"stage": "retrieval", "status": "done", "results": 1, "ms": 1.0}) in events
+    name, done = events[-1]
+    assert name == "done" and done["cached"] is False
+    assert done["sources"] == [
+        {"type": "document", "source": "faq.pdf", "page": 2},
+        {"type": "web", "title": "Batch B camp opens", "url": "https://nysc.gov.ng/camp"},
+    ]
+
+    # The same question again is answered from the cache in one token event, without the LLM
+    events = parse_sse(client.post("/ask/stream", json={"question": "how long is camp"}).text)
+    assert [name for name, _ in events] == ["token", "done"]
+    assert events[0][1]["text"] == "Camp lasts three weeks."
+    assert events[1][1]["cached"] is True and events[1][1]["sources"] == []
+    assert FakeLLM.calls == 1
+
+def test_ask_stream_times_embedding_as_its_own_stage(monkeypatch):
+    import asyncio
+    import main
+    from services.answer_cache import AnswerCache
+
+    async def no_faq(question):
+        return None
+
+    async def slow_load(*names):
+        await asyncio.sleep(0.2)
+
+    async def fast_embedding(question):
+        await asyncio.sleep(0.01)
+        return None
+
+    class FakeLLM:
+        model_name = "gpt-4o-mini"
+
+    async def failing_context(question, query_embedding=None, on_progress=None):
+        raise RuntimeError("stop after embedding")
+
+    monkeypatch.setattr(main, "answer_from_faq", no_faq)
+    monkeypatch.setattr(main, "embed_question", fast_embedding)
+    monkeypatch.setattr(main, "gather_context", failing_context)
+    monkeypatch.setattr(main, "answer_cache", AnswerCache(ttl_seconds=60))
+    monkeypatch.setattr(main.ai_service, "ensure_loaded", slow_load)
+    monkeypatch.setattr(main.ai_service, "get_llm", FakeLLM)
+    monkeypatch.setattr(main.ai_service, "get_embedding_function", lambda: object())
+    monkeypatch.setattr(main.retrieval, "RETRIEVAL_MODE", "hybrid")
+
+    events = parse_sse(client.post("/ask/stream", json={"question": "How long is camp?"}).text)
+    embedding = [data["ms"] for name, data in events if name == "progress" and data.get("stage") == "embedding" and "ms" in data]
+    # The 200ms spent loading components before it is not part of the stage
+    assert len(embedding) == 1 and 5 <= embedding[0] < 150
+    assert events[-1][1]["timings"]["embedding"] == embedding[0]
+
+def test_concurrent_asks_overlap_and_respect_the_llm_cap(monkeypatch):
+    import asyncio
+    import httpx
+    import main
+    from services.answer_cache import AnswerCache
+
+    in_flight = {"context": 0, "llm": 0}
+    peak = {"context": 0, "llm": 0}
+
+    async def hold(stage, seconds):
+        in_flight[stage] += 1
+        peak[stage] = max(peak[stage], in_flight[stage])
+        await asyncio.sleep(seconds)
+        in_flight[stage] -= 1
+
+    class FakeReply:
+        def __init__(self, content):
+            self.content = content
+
+    class FakeLLM:
+        model_name = "gpt-4o-mini"
+
+        async def ainvoke(self, messages):
+            await hold("llm", 0.05)
+            return FakeReply(f"Answer to: {messages[-1].content}")
+
+    async def no_faq(question):
+        return None
+
+    async def loaded(*names):
+        pass
+
+    async def fake_context(question, query_embedding=None, on_progress=None):
+        await hold("context", 0.05)
+        return [], [], {}
+
+    monkeypatch.setattr(main, "answer_from_faq", no_faq)
+    monkeypatch.setattr(main, "gather_context", fake_context)
+    monkeypatch.setattr(main, "answer_cache", AnswerCache(ttl_seconds=60))
+    monkeypatch.setattr(main, "LLM_MAX_CONCURRENCY", 2)
+    monkeypatch.setattr(main.ai_service, "ensure_loaded", loaded)
+    monkeypatch.setattr(main.ai_service, "get_llm", FakeLLM)
+    monkeypatch.setattr(main.ai_service, "get_embedding_function", lambda: None)
+
+    async def ask_all(count):
+        # Created inside the loop the requests run on
+        monkeypatch.setattr(main, "llm_semaphore", asyncio.Semaphore(main.LLM_MAX_CONCURRENCY))
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+            return await asyncio.gather(*(ac.post("/ask", json={"question": f"Question {i}?"}) for i in range(count)))
+
+    responses = asyncio.run(ask_all(8))
+    assert [r.json()["answer"] for r in responses] == [f"Answer to: Question {i}?" for i in range(8)]
+    # Retrieval for every request ran at once; the LLM never saw more than the cap
+    assert peak["context"] == 8
+    assert peak["llm"] == 2
+
 if __name__ == "__main__":
     try:
         test_read_main()
@@ -0,0 +1,31 @@
+from services.chunk_dedupe import ChunkDeduplicator
+
+PASSAGE = ("Any corps member who absconds from his place of primary assignment shall "
+           "have his service extended by the number of days he was absent, and may be "
+           "remobilized with the next batch where the absence exceeds the prescribed period.")
+
+def test_near_duplicates_are_dropped():
+    dedupe = ChunkDeduplicator(threshold=0.8)
+    assert not dedupe.is_duplicate(PASSAGE)
+    assert dedupe.is_duplicate(PASSAGE)  # exact repeat
+    assert dedupe.is_duplicate("Bye-Laws, Section 4: " + PASSAGE)  # same passage, new header
+    assert not dedupe.is_duplicate("Orientation camp lasts three weeks and ends with the swearing-in ceremony.")
+    report = dedupe.report()
+    assert report["duplicates"] == 2 and report["reduction"] == 0.5
+
+def test_threshold_zero_keeps_everything():
+    dedupe = ChunkDeduplicator(threshold=0)
+    assert not dedupe.is_duplicate(PASSAGE)
+    assert not dedupe.is_duplicate(PASSAGE)
+
+def test_seeded_chunks_count_as_seen():
+    dedupe = ChunkDeduplicator(threshold=0.8)
+    dedupe.add(PASSAGE)
+    assert dedupe.is_duplicate(PASSAGE)
+
+def test_dropped_chunks_record_the_file_that_kept_them():
+    dedupe = ChunkDeduplicator(threshold=0.8)
+    dedupe.add(PASSAGE, "decree.pdf")
+    assert dedupe.is_duplicate("Bye-Laws, Section 4: " + PASSAGE, "byelaws.pdf")
+    assert dedupe.is_duplicate(PASSAGE, "decree.pdf")  # a repeat within one file is no dependency
+    assert dedupe.depends_on == {"byelaws.pdf": {"decree.pdf"}}
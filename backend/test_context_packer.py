@@ -0,0 +1,48 @@
+import importlib
+
+from langchain_core.documents import Document
+
+from services import context_packer
+
+SHARED = "Corps members who abscond from service will have their service extended. "
+
+def test_overlapping_chunks_are_trimmed():
+    first = "Remobilization applies to those who absconded. " + SHARED
+    second = SHARED + "Extension periods are decided by the state coordinator."
+    kept, removed = context_packer.remove_overlaps([(first, 1), (second, 2), ("Remobilization applies", 3)])
+
+    assert kept[0] == (first.strip(), 1)
+    assert kept[1] == ("Extension periods are decided by the state coordinator.", 2)
+    assert len(kept) == 2  # the contained passage is dropped
+    assert removed > len(SHARED) - 2
+
+def test_sources_stay_with_their_text_when_a_middle_passage_is_dropped():
+    documents = [
+        Document(page_content="Alpha: camp lasts three weeks. " + SHARED, metadata={"source": "A"}),
+        Document(page_content=SHARED.strip(), metadata={"source": "B"}),
+        Document(page_content="Gamma: allowance is paid monthly.", metadata={"source": "C"}),
+    ]
+    packed = context_packer.pack(documents, [], "gpt-3.5-turbo")
+
+    assert [d.metadata["source"] for d in packed.documents] == ["A", "C"]
+    assert packed.internal_text.split("\n\n")[1].startswith("Gamma")
+
+def test_pack_respects_budget_and_order(monkeypatch):
+    monkeypatch.setattr(context_packer, "CONTEXT_TOKEN_BUDGET", 100)
+    documents = [Document(page_content=f"Passage {i}. " + "word " * 60) for i in range(4)]
+    web = [{"content": "low score news", "score": 0.1}, {"content": "high score news", "score": 0.9}]
+
+    packed = context_packer.pack(documents, web, "gpt-3.5-turbo")
+
+    assert packed.tokens_out <= 100
+    assert packed.documents[0] is documents[0]
+    assert len(packed.documents) < len(documents)
+    assert packed.web_text.startswith("high score news")
+
+def test_blank_budget_setting_means_the_model_default(monkeypatch):
+    monkeypatch.setenv("CONTEXT_TOKEN_BUDGET", "")
+    assert importlib.reload(context_packer).CONTEXT_TOKEN_BUDGET is None
+    monkeypatch.setenv("CONTEXT_TOKEN_BUDGET", "900")
+    assert importlib.reload(context_packer).CONTEXT_TOKEN_BUDGET == 900
+    monkeypatch.delenv("CONTEXT_TOKEN_BUDGET")
+    importlib.reload(context_packer)
@@ -0,0 +1,21 @@
+import numpy as np
+
+from services.embedding_backends import HashingEmbeddings, collection_name
+
+def test_hashing_embeddings_are_local_and_normalized():
+    embeddings = HashingEmbeddings(dim=256)
+    first, second = embeddings.embed_documents(["Orientation camp lasts three weeks."] * 2)
+    assert first == second  # stable, so stored vectors stay valid across restarts
+    assert len(first) == 256
+    assert abs(np.linalg.norm(first) - 1.0) < 1e-5
+
+def test_hashing_embeddings_rank_related_text_higher():
+    embeddings = HashingEmbeddings()
+    query = np.array(embeddings.embed_query("how long is orientation camp"))
+    related = np.array(embeddings.embed_query("Orientation camp lasts three weeks."))
+    unrelated = np.array(embeddings.embed_query("Section 12 of the decree covers absconding."))
+    assert query @ related > query @ unrelated
+
+def test_each_backend_gets_its_own_collection():
+    assert collection_name("openai") == "langchain"
+    assert collection_name("hashing") == "langchain_hashing"
@@ -0,0 +1,51 @@
+import asyncio
+
+from services.embedding_batcher import EmbeddingBatcher
+
+
+def fake_embed_many(calls):
+    def embed_many(texts):
+        calls.append(list(texts))
+        return [[float(len(t))] for t in texts]
+    return embed_many
+
+
+def test_concurrent_queries_share_one_call():
+    calls = []
+    batcher = EmbeddingBatcher(fake_embed_many(calls), window_ms=20, max_batch_size=32)
+
+    async def scenario():
+        return await asyncio.gather(*(batcher.embed("q" * n) for n in range(1, 11)))
+
+    vectors = asyncio.run(scenario())
+
+    assert len(calls) == 1
+    assert vectors == [[float(n)] for n in range(1, 11)]  # each caller gets its own vector
+    stats = batcher.stats()
+    assert stats["upstream_calls_saved"] == 9
+    assert stats["batch_size"]["buckets"]["<=16"] == 1
+
+
+def test_max_batch_size_splits_batches():
+    calls = []
+    batcher = EmbeddingBatcher(fake_embed_many(calls), window_ms=1000, max_batch_size=4)
+
+    async def scenario():
+        return await asyncio.wait_for(asyncio.gather(*(batcher.embed(str(n)) for n in range(8))), 0.5)
+
+    asyncio.run(scenario())  # full batches go out without waiting for the window
+    assert [len(c) for c in calls] == [4, 4]
+
+
+def test_errors_reach_every_caller():
+    def broken(texts):
+        raise RuntimeError("upstream down")
+
+    batcher = EmbeddingBatcher(broken, window_ms=5)
+
+    async def scenario():
+        return await asyncio.gather(batcher.embed("a"), batcher.embed("b"), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert batcher.stats()["errors"] == 1
@@ -0,0 +1,95 @@
+import sqlite3
+
+from services.embedding_cache import CachedEmbeddings
+
+
+class FakeEmbeddings:
+    def __init__(self, model="fake-small"):
+        self.model = model
+        self.calls = []
+
+    def embed_documents(self, texts):
+        self.calls.append(list(texts))
+        return [[float(len(t)), 1.0] for t in texts]
+
+    def embed_query(self, text):
+        self.calls.append([text])
+        return [float(len(text)), 1.0]
+
+
+def test_memory_hit(tmp_path):
+    inner = FakeEmbeddings()
+    cache = CachedEmbeddings(inner, path=str(tmp_path / "cache.sqlite3"))
+    assert cache.embed_query("When is camp?") == [13.0, 1.0]
+    assert cache.embed_query("When is camp?") == [13.0, 1.0]
+    assert inner.calls == [["When is camp?"]]
+    assert cache.stats()["memory_hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_disk_hit_from_a_fresh_instance(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    CachedEmbeddings(FakeEmbeddings(), path=path).embed_documents(["alpha", "beta"])
+
+    inner = FakeEmbeddings()
+    restarted = CachedEmbeddings(inner, path=path)
+    assert restarted.embed_documents(["beta", "alpha", "gamma"]) == [[4.0, 1.0], [5.0, 1.0], [5.0, 1.0]]
+    assert inner.calls == [["gamma"]]  # only the miss goes upstream
+    assert restarted.stats()["disk_hits"] == 2
+
+
+def test_whitespace_and_unicode_forms_share_a_key(tmp_path):
+    inner = FakeEmbeddings()
+    cache = CachedEmbeddings(inner, path=str(tmp_path / "cache.sqlite3"))
+    cache.embed_query("  How do I   get my\ncall-up letter? ")
+    cache.embed_query("How do I get my call-up letter?")
+    cache.embed_query("How do I get my ｃａｌｌ-up letter?")  # full-width letters, NFKC-folded
+    assert len(inner.calls) == 1
+    # Case can change the embedding, so it is part of the key
+    cache.embed_query("HOW DO I GET MY CALL-UP LETTER?")
+    assert len(inner.calls) == 2
+
+
+def test_model_name_is_part_of_the_key(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    CachedEmbeddings(FakeEmbeddings("fake-small"), path=path).embed_query("When is camp?")
+
+    other = FakeEmbeddings("fake-large")
+    cache = CachedEmbeddings(other, path=path)
+    cache.embed_query("When is camp?")
+    assert other.calls == [["When is camp?"]]
+    assert cache.stats()["model"] == "fake-large"
+
+
+def test_read_only_cache_still_embeds(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    CachedEmbeddings(FakeEmbeddings(), path=path).embed_query("alpha")
+
+    inner = FakeEmbeddings()
+    cache = CachedEmbeddings(inner, path=path)
+    cache._connection().execute("PRAGMA query_only=ON")
+    assert cache.embed_query("alpha") == [5.0, 1.0]  # existing entries still hit
+    assert cache.embed_query("gamma") == [5.0, 1.0]  # new ones are embedded, just not stored
+    assert inner.calls == [["gamma"]]
+
+
+def test_locked_cache_still_embeds(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    inner = FakeEmbeddings()
+    cache = CachedEmbeddings(inner, path=path)
+    cache._connection().execute("PRAGMA busy_timeout=50")
+    writer = sqlite3.connect(path)
+    writer.execute("BEGIN EXCLUSIVE")
+    try:
+        assert cache.embed_documents(["alpha", "beta"]) == [[5.0, 1.0], [4.0, 1.0]]
+    finally:
+        writer.rollback()
+        writer.close()
+    assert inner.calls == [["alpha", "beta"]]
+
+
+def test_unopenable_cache_falls_back_to_memory(tmp_path):
+    inner = FakeEmbeddings()
+    cache = CachedEmbeddings(inner, path=str(tmp_path / "missing-dir" / "cache.sqlite3"))
+    assert cache.embed_query("alpha") == [5.0, 1.0]
+    assert cache.embed_query("alpha") == [5.0, 1.0]
+    assert inner.calls == [["alpha"]]
@@ -0,0 +1,57 @@
+from services.faq_service import FAQIndex, extract_faq_entries
+
+FAQ_TEXT = """
+1 | P C M s  N u g g e t s
+4. PROCEDURES FOR CORRECTIONS
+a) Correction of Course of Study
+i. Login to your dashboard and click on the link for Correction of Course of Study;
+ii. Click SEND REQUEST
+g) Correction of Date of Birth
+i. Get 19 or 20 digits WAEC verification pin from any First Bank branch
+ii. Click on Verify button
+5. HOW DO I COLLECT MY EXEMPTION CERTIFICATE?
+Collect it from your Institution.
+"""
+
+def test_extracts_headings_as_questions():
+    entries = extract_faq_entries(FAQ_TEXT)
+    questions = [e["question"] for e in entries]
+    assert questions == [
+        "PROCEDURES FOR CORRECTIONS",
+        "Correction of Course of Study",
+        "Correction of Date of Birth",
+        "HOW DO I COLLECT MY EXEMPTION CERTIFICATE?",
+    ]
+    assert "WAEC verification pin" in entries[2]["answer"]
+    assert "N u g g e t s" not in entries[0]["answer"]
+
+def test_confident_match_and_fall_through():
+    index = FAQIndex(extract_faq_entries(FAQ_TEXT))
+
+    entry, confidence = index.match("How do I correct my date of birth?")
+    assert entry["question"] == "Correction of Date of Birth"
+    assert confidence >= 0.8
+
+    assert index.match("When does orientation camp start?") is None
+    stats = index.stats()
+    assert stats["fast_path"] == 1
+    assert stats["fall_through"] == 1
+    assert stats["fast_path_share"] == 0.5
+
+def test_failed_rewrite_keeps_the_old_index(tmp_path, monkeypatch):
+    from services import faq_service
+    (tmp_path / "FAQ.txt").write_text(FAQ_TEXT)
+    monkeypatch.setattr(faq_service, "FAQ_SOURCES", ["FAQ.txt"])
+    index_path = str(tmp_path / "faq_index.json")
+    faq_service.build_faq_index(str(tmp_path), index_path)
+
+    def dump_half(obj, f, **kwargs):
+        f.write('{"entries": [')
+        raise OSError("disk full")
+    monkeypatch.setattr(faq_service.json, "dump", dump_half)
+    try:
+        faq_service.build_faq_index(str(tmp_path), index_path)
+    except OSError:
+        pass
+    assert len(FAQIndex.load(index_path)) == 4
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["FAQ.txt", "faq_index.json", "faq_index.json.lock"]
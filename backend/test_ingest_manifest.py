@@ -0,0 +1,45 @@
+from services.ingest_manifest import IngestManifest, scan_sources, file_sha256, chunk_id
+
+def test_manifest_diff_tracks_added_changed_removed(tmp_path):
+    docs = tmp_path / "docs"
+    (docs / "sub").mkdir(parents=True)
+    (docs / "a.txt").write_text("alpha")
+    (docs / "sub" / "b.pdf").write_bytes(b"%PDF beta")
+    (docs / "notes.md").write_text("ignored")
+
+    paths = scan_sources(str(docs))
+    assert paths == ["a.txt", "sub/b.pdf"]
+
+    manifest = IngestManifest(path=str(tmp_path / "manifest.json"))
+    hashes = {p: file_sha256(str(docs / p)) for p in paths}
+    assert manifest.diff("c", hashes)["added"] == paths
+    for p in paths:
+        manifest.record("c", p, hashes[p], [chunk_id(hashes[p], 0)])
+    manifest.save()
+
+    b_sha = hashes["sub/b.pdf"]
+    (docs / "a.txt").write_text("alpha, edited")
+    (docs / "sub" / "b.pdf").unlink()
+    (docs / "c.txt").write_text("gamma")
+    reloaded = IngestManifest.load(str(tmp_path / "manifest.json"))
+    hashes = {p: file_sha256(str(docs / p)) for p in scan_sources(str(docs))}
+    changes = reloaded.diff("c", hashes)
+
+    assert changes == {"added": ["c.txt"], "changed": ["a.txt"], "resumed": [], "removed": ["sub/b.pdf"], "unchanged": []}
+    assert reloaded.chunk_ids("c", ["sub/b.pdf"]) == [chunk_id(b_sha, 0)]
+    # Each collection (embedding backend) keeps its own record
+    assert not reloaded.has_collection("other")
+
+def test_dependents_follow_dropped_duplicates(tmp_path):
+    manifest = IngestManifest(path=str(tmp_path / "manifest.json"))
+    manifest.record("c", "decree.pdf", "s1", ["x"])
+    manifest.record("c", "byelaws.pdf", "s2", ["y"], deduped_against={"decree.pdf"})
+    manifest.record("c", "faq.txt", "s3", ["z"], deduped_against=["byelaws.pdf"])
+    manifest.record("c", "handbook.pdf", "s4", ["w"])
+    manifest.save()
+    reloaded = IngestManifest.load(str(tmp_path / "manifest.json"))
+
+    assert reloaded.deduped_against("c", "byelaws.pdf") == {"decree.pdf"}
+    # faq.txt depends on decree.pdf through byelaws.pdf, which is re-ingested too
+    assert reloaded.dependents("c", ["decree.pdf"]) == ["byelaws.pdf", "faq.txt"]
+    assert reloaded.dependents("c", ["handbook.pdf"]) == []
@@ -0,0 +1,93 @@
+import pytest
+
+from services import ingest_pipeline
+from services.chunk_dedupe import ChunkDeduplicator
+from services.ingest_manifest import IngestManifest, chunk_id
+from services.ingest_pipeline import IngestFile, run_pipeline
+
+PARAGRAPH = "Corps members serve for one year after orientation camp. " * 30
+
+
+def make_files(tmp_path, count=3):
+    files = []
+    for n in range(count):
+        path = tmp_path / f"doc{n}.txt"
+        path.write_text(f"Document {n}. " + PARAGRAPH)
+        files.append(IngestFile(str(path), path.name, f"{n:016x}"))
+    return files
+
+
+def test_pipeline_batches_and_checkpoints(tmp_path):
+    batches, checkpoints = [], []
+    stats = run_pipeline(make_files(tmp_path), batches.append,
+                         lambda file, ids, pages, complete, numbered: checkpoints.append((file.key, len(ids), complete)),
+                         workers=1, batch_size=4, max_pending=2)
+
+    ids = [chunk_id for batch in batches for chunk_id, _, _ in batch]
+    assert len(ids) == len(set(ids)) == stats["chunks"]
+    assert stats["files"] == 3 and stats["pages"] == 3
+    assert all(complete for _, _, complete in checkpoints)
+    assert sum(n for _, n, _ in checkpoints) == stats["chunks"]
+
+
+def test_interrupted_run_resumes_with_the_same_ids(tmp_path):
+    files = make_files(tmp_path)
+    full = []
+    run_pipeline(files, full.extend, lambda *a: None, workers=1, batch_size=1)
+
+    written, done = [], {}
+
+    def failing_write(batch):
+        if len(written) >= 2:
+            raise KeyboardInterrupt
+        written.extend(batch)
+
+    def checkpoint(file, ids, pages, complete, numbered):
+        done[file.key] = (pages, len(ids), complete)
+
+    with pytest.raises(KeyboardInterrupt):
+        run_pipeline(files, failing_write, checkpoint, workers=1, batch_size=1)
+
+    # Resume only what the checkpoints say is unfinished
+    remaining = [IngestFile(f.path, f.key, f.sha) for f in files if f.key not in done]
+    run_pipeline(remaining, written.extend, checkpoint, workers=1, batch_size=1)
+    assert [w[0] for w in written] == [f[0] for f in full]
+
+
+def test_resume_after_dedupe_does_not_reuse_chunk_ids(tmp_path, monkeypatch):
+    pages = [["Camp opens on Monday for all batches.", "Bring your call-up letter and ID."],
+             ["Camp opens on Monday for all batches.", "Allowance is paid monthly to members."],
+             ["Passing out parade follows the service year."]]
+    monkeypatch.setattr(ingest_pipeline, "page_count", lambda path: len(pages))
+    monkeypatch.setattr(ingest_pipeline, "parse_pages",
+                        lambda path, start, end: [(t, {"page": p}) for p in range(start, end) for t in pages[p]])
+    sha = "ab" * 8
+    manifest = IngestManifest(path=str(tmp_path / "manifest.json"))
+    written = []
+
+    def checkpoint(file, ids, pages_done, complete, numbered):
+        previous = manifest.chunk_ids("c", [file.key])
+        manifest.record("c", file.key, file.sha, previous + ids, pages_done, complete, numbered)
+
+    def failing_write(batch):
+        if len(written) >= 3:  # stop before the last page is written
+            raise KeyboardInterrupt
+        written.extend(batch)
+
+    with pytest.raises(KeyboardInterrupt):
+        run_pipeline([IngestFile("doc.pdf", "doc.pdf", sha)], failing_write, checkpoint,
+                     workers=1, batch_size=1, pages_per_task=1, dedupe=ChunkDeduplicator())
+    # The repeated "Camp opens" chunk was dropped, leaving a gap at ID 2
+    assert manifest.chunk_ids("c", ["doc.pdf"]) == [chunk_id(sha, 0), chunk_id(sha, 1), chunk_id(sha, 3)]
+
+    pages_done, numbered = manifest.progress("c", "doc.pdf")
+    assert (pages_done, numbered) == (2, 4)
+    dedupe = ChunkDeduplicator()
+    for _, text, _ in written:
+        dedupe.add(text)
+    run_pipeline([IngestFile("doc.pdf", "doc.pdf", sha, pages_done, numbered)], written.extend, checkpoint,
+                 workers=1, batch_size=1, pages_per_task=1, dedupe=dedupe)
+
+    ids = manifest.chunk_ids("c", ["doc.pdf"])
+    assert ids[-1] == chunk_id(sha, 4)
+    assert len(ids) == len(set(ids)) == len({i for i, _, _ in written}) == 4
@@ -0,0 +1,90 @@
+import datetime
+
+import models
+from services.job_scheduler import FileLease, LeaderScheduler, claim_run, finish_run
+
+HOUR = 3600
+
+
+def test_file_lease_fails_over_after_expiry(tmp_path):
+    path = str(tmp_path / "scheduler.lease")
+    a = FileLease(path, ttl=60, owner="a")
+    b = FileLease(path, ttl=60, owner="b")
+    assert a.acquire(now=1000)
+    assert not b.acquire(now=1030)
+    assert a.acquire(now=1050)  # renewed until 1110
+    assert not b.acquire(now=1100)
+    assert b.acquire(now=1111)  # a stopped renewing
+    assert not a.acquire(now=1112)
+    b.release()
+    assert a.acquire(now=1113)
+
+
+def test_claim_run_once_per_slot_and_retries_failures(session_factory):
+    db = session_factory()
+    run = claim_run(db, "fetch_news", "slot-1", worker="a")
+    assert run is not None
+    assert claim_run(db, "fetch_news", "slot-1", worker="b") is None
+    finish_run(db, run, error="Tavily down")
+    retry = claim_run(db, "fetch_news", "slot-1", worker="b")
+    assert retry.worker == "b" and retry.attempts == 2
+    finish_run(db, retry)
+    assert retry.status == "succeeded" and retry.duration_ms >= 0
+    assert claim_run(db, "fetch_news", "slot-1", worker="c") is None
+
+
+def test_claim_run_takes_over_stale_runs(session_factory):
+    db = session_factory()
+    run = claim_run(db, "fetch_news", "slot-1", worker="a")
+    run.started_at = datetime.datetime.now() - datetime.timedelta(hours=2)
+    db.commit()
+    assert claim_run(db, "fetch_news", "slot-1", worker="b", stale_seconds=HOUR).worker == "b"
+
+
+def test_only_the_leader_runs_jobs_and_slots_are_not_repeated(tmp_path, session_factory):
+    path = str(tmp_path / "scheduler.lease")
+    factory = session_factory
+    calls = []
+    workers = []
+    for owner in ("a", "b"):
+        scheduler = LeaderScheduler(FileLease(path, ttl=60, owner=owner), factory)
+        scheduler.add_job("fetch_news", lambda owner=owner: calls.append(owner), 4 * HOUR)
+        workers.append(scheduler)
+    a, b = workers
+
+    start = 1_700_000_000 - 1_700_000_000 % (4 * HOUR)
+    assert a.tick(now=start + 10) == ["fetch_news"]
+    assert b.tick(now=start + 20) == []
+    assert a.tick(now=start + 30) == []  # slot already done
+    assert calls == ["a"]
+
+    # a dies; b takes over within a lease but doesn't repeat a's slot
+    assert b.tick(now=start + 200) == ["fetch_news"]
+    assert calls == ["a"] and b.stats()["skipped"] == 1 and b.is_leader
+    b.tick(now=start + 4 * HOUR + 5)
+    assert calls == ["a", "b"]
+    assert factory().query(models.JobRun).filter(models.JobRun.status == "succeeded").count() == 2
+
+
+def test_failed_runs_are_recorded_and_retried_after_a_pause(tmp_path, session_factory):
+    factory = session_factory
+    outcomes = [RuntimeError("Tavily API Key not found"), None]
+
+    def job():
+        outcome = outcomes.pop(0)
+        if outcome:
+            raise outcome
+
+    scheduler = LeaderScheduler(FileLease(str(tmp_path / "scheduler.lease"), ttl=60, owner="a"), factory,
+                                retry_seconds=300)
+    scheduler.add_job("fetch_news", job, 4 * HOUR)
+    start = 1_700_000_000 - 1_700_000_000 % (4 * HOUR)
+    assert scheduler.tick(now=start + 10) == ["fetch_news"]
+    run = factory().query(models.JobRun).one()
+    assert run.status == "failed" and "Tavily" in run.error
+
+    assert scheduler.tick(now=start + 100) == []
+    assert scheduler.tick(now=start + 320) == ["fetch_news"]
+    run = factory().query(models.JobRun).one()
+    assert run.status == "succeeded" and run.attempts == 2
+    assert scheduler.tick(now=start + 700) == []
@@ -0,0 +1,101 @@
+import asyncio
+
+from services import llm_router
+from services.llm_router import LLMRouter, ProviderUnavailable
+
+
+class FakeChatModel:
+    """Answers after `delay` seconds, or raises if `fail` is set."""
+
+    def __init__(self, name, delay=0.0, fail=False):
+        self.model_name = name
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+
+    async def ainvoke(self, messages, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError(f"{self.model_name} is down")
+        return f"answer from {self.model_name}"
+
+    async def astream(self, messages, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError(f"{self.model_name} is down")
+        for word in ("answer", "from", self.model_name):
+            yield word
+
+
+def test_fails_over_and_demotes_failing_provider():
+    primary, backup = FakeChatModel("primary", fail=True), FakeChatModel("backup")
+    router = LLMRouter([("primary", primary), ("backup", backup)], hedge=False)
+
+    async def scenario():
+        for _ in range(3):
+            assert await router.ainvoke([]) == "answer from backup"
+
+    asyncio.run(scenario())
+    # One error is enough for the healthier backup to be tried first
+    assert primary.calls == 1
+    assert router.stats()["providers"]["primary"]["error_rate"] == 1.0
+    assert router.stats()["order"] == ["backup", "primary"]
+
+
+def test_breaker_opens_after_consecutive_failures(monkeypatch):
+    monkeypatch.setattr(llm_router, "LLM_BREAKER_FAILURES", 1)
+    router = LLMRouter([("only", FakeChatModel("only", fail=True))], hedge=False)
+
+    async def scenario():
+        try:
+            await router.ainvoke([])
+        except RuntimeError:
+            pass
+        try:
+            await router.ainvoke([])
+            return False
+        except ProviderUnavailable:
+            return True
+
+    assert asyncio.run(scenario())
+    assert router.stats()["providers"]["only"]["state"] == "open"
+
+
+def test_unmeasured_provider_does_not_jump_the_queue():
+    primary, backup = FakeChatModel("primary", delay=0.01), FakeChatModel("backup")
+    router = LLMRouter([("primary", primary), ("backup", backup)], hedge=False)
+
+    async def scenario():
+        for _ in range(3):
+            assert await router.ainvoke([]) == "answer from primary"
+
+    asyncio.run(scenario())
+    # The backup has no latency yet; that doesn't make it faster than the primary
+    assert backup.calls == 0
+    assert router.stats()["order"] == ["primary", "backup"]
+
+
+def test_hedged_request_wins(monkeypatch):
+    monkeypatch.setattr(llm_router, "LLM_HEDGE_MIN_DELAY", 0.05)
+    monkeypatch.setattr(llm_router, "LLM_HEDGE_DEFAULT_DELAY", 0.05)
+    slow, fast = FakeChatModel("slow", delay=1.0), FakeChatModel("fast")
+    router = LLMRouter([("slow", slow), ("fast", fast)], hedge=True)
+
+    answer = asyncio.run(router.ainvoke([]))
+
+    assert answer == "answer from fast"
+    stats = router.stats()["providers"]
+    assert stats["slow"]["hedged"] == 1
+    assert stats["fast"]["hedge_wins"] == 1
+    assert stats["slow"]["errors"] == 0  # losing the race is not a failure
+
+
+def test_stream_fails_over_before_first_chunk():
+    router = LLMRouter([("down", FakeChatModel("down", fail=True)), ("up", FakeChatModel("up"))], hedge=False)
+
+    async def collect():
+        return [chunk async for chunk in router.astream([])]
+
+    assert asyncio.run(collect()) == ["answer", "from", "up"]
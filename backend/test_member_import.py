@@ -0,0 +1,129 @@
+import io
+import csv
+import json
+
+import pytest
+
+from models import User
+from services.member_import import detect_format, import_members, validate_row, report_csv
+from services.password_hasher import hash_rounds, PasswordHasher
+
+
+@pytest.fixture
+def factory(session_factory):
+    db = session_factory()
+    db.add(User(email="taken@example.com", name="Existing", role="Corps Member", hashed_password="x"))
+    db.commit()
+    db.close()
+    return session_factory
+
+
+CSV = """﻿Email,Name,State_Code,State,LGA,PPA,CDS_Group
+ada@example.com,Ada Obi,la/24a/1234,Lagos,Ikeja,GTB,ICT
+bad-email,No Email,,,,,
+taken@example.com,Already Here,,,,,
+tunde@example.com,Tunde Bello,OY/24A/99,Oyo,,,
+ADA@example.com,Ada Again,,,,,
+chi@example.com,Chi Eze,,Enugu,,,
+"""
+
+
+def test_detect_format():
+    assert detect_format("batch.csv") == "csv"
+    assert detect_format("batch.jsonl") == "ndjson"
+    assert detect_format("upload", "application/x-ndjson") == "ndjson"
+    assert detect_format("batch.xlsx") is None
+
+
+def test_validate_row_normalizes_and_rejects():
+    row, error = validate_row({"email": " Ada@Example.com ", "name": "Ada", "state_code": "la/24a/1234"})
+    assert error is None and row["email"] == "ada@example.com" and row["state_code"] == "LA/24A/1234"
+    assert validate_row({"email": "ada@example.com"})[1] == "name is required"
+
+
+def test_csv_import_in_chunks_with_per_row_errors(factory):
+    report = import_members(io.BytesIO(CSV.encode("utf-8")), "csv", factory, chunk_size=2, workers=1, rounds=4)
+
+    assert report["created"] == 2 and report["failed"] == 4
+    assert sorted((e["line"], e["error"]) for e in report["errors"]) == [
+        (3, "email is not a valid address"),
+        (4, "email is already registered"),
+        (5, "state_code must look like LA/24A/1234"),
+        (6, "email appears earlier in the file"),
+    ]
+    db = factory()
+    ada = db.query(User).filter(User.email == "ada@example.com").first()
+    assert (ada.state_code, ada.lga, ada.ppa, ada.cds_group, ada.role) == ("LA/24A/1234", "Ikeja", "GTB", "ICT", "Corps Member")
+    password = report["credentials"][0]["temporary_password"]
+    assert hash_rounds(ada.hashed_password) == 4 and PasswordHasher(rounds=4, workers=1).verify(password, ada.hashed_password)
+    assert ada.must_change_password and report["credentials"][0]["line"] == 2
+
+    rows = list(csv.reader(io.StringIO(report_csv(report))))
+    assert rows[0] == ["line", "email", "temporary_password", "error"]
+    assert rows[1] == ["2", "ada@example.com", password, ""]
+    assert ["4", "taken@example.com", "", "email is already registered"] in rows
+
+
+def test_ndjson_import_reports_bad_lines(factory):
+    lines = [json.dumps({"email": "ngozi@example.com", "name": "Ngozi"}), "", "{not json", "[1, 2]",
+             json.dumps({"Email": "emeka@example.com", "Name": "Emeka", "cds_group": "Health"})]
+    report = import_members(io.BytesIO("\n".join(lines).encode("utf-8")), "ndjson", factory, workers=1, rounds=4)
+    assert report["created"] == 2
+    assert [e["line"] for e in report["errors"]] == [3, 4]
+    assert factory().query(User).filter(User.email == "emeka@example.com").first().cds_group == "Health"
+
+
+def test_process_pool_hashing_and_case_insensitive_emails(factory):
+    from routers.auth import _find_user
+
+    db = factory()
+    # Stored before emails were normalized
+    db.add(User(email="Legacy@Example.com", name="Legacy", role="Corps Member", hashed_password="x"))
+    db.commit()
+    rows = "email,name\n" + "".join(f"member{i}@example.com,Member {i}\n" for i in range(6)) + "legacy@example.com,Again\n"
+    report = import_members(io.BytesIO(rows.encode("utf-8")), "csv", factory, chunk_size=4, workers=2, rounds=4)
+
+    assert report["created"] == 6
+    assert [(e["line"], e["error"]) for e in report["errors"]] == [(8, "email is already registered")]
+    hashes = {u.email: u.hashed_password for u in db.query(User)}
+    hasher = PasswordHasher(rounds=4, workers=1)
+    assert all(hasher.verify(c["temporary_password"], hashes[c["email"]]) for c in report["credentials"])
+
+    # Sign-in finds imported and older accounts however the email is typed
+    assert _find_user(db, " Member3@EXAMPLE.com").email == "member3@example.com"
+    assert _find_user(db, "legacy@example.com").email == "Legacy@Example.com"
+
+
+def test_temporary_passwords_must_be_changed(monkeypatch):
+    import uuid
+    import asyncio
+    import httpx
+    from main import app
+    from database import SessionLocal
+    from services.password_hasher import password_hasher
+
+    monkeypatch.setattr(password_hasher, "rounds", 4)
+    email = f"imported-{uuid.uuid4().hex[:8]}@example.com"  # the app database outlives a test run
+    login = {"email": email, "password": "temp-pass-1"}
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            await client.post("/auth/signup", json=dict(login, name="Imported"))
+            db = SessionLocal()
+            db.query(User).filter(User.email == email).update({"must_change_password": True})
+            db.commit()
+            db.close()
+            first = (await client.post("/auth/login", json=login)).json()
+            headers = {"Authorization": f"Bearer {first['token']}"}
+            short = await client.post("/auth/change-password", headers=headers,
+                                      json={"current_password": "temp-pass-1", "new_password": "short"})
+            changed = await client.post("/auth/change-password", headers=headers,
+                                        json={"current_password": "temp-pass-1", "new_password": "my-own-secret"})
+            after = (await client.post("/auth/login", json={"email": email, "password": "my-own-secret"})).json()
+            return first, short.status_code, changed.status_code, after
+
+    first, short, changed, after = asyncio.run(scenario())
+    assert first["must_change_password"] is True
+    assert short == 400 and changed == 200
+    assert after["must_change_password"] is False
@@ -0,0 +1,72 @@
+import time
+import asyncio
+import datetime
+
+import math
+
+from services import ai_service, news_index, retrieval
+from services.news_index import NewsIndex, parse_news_date
+
+DAY = 86400
+
+
+class FakeCollection:
+    """Stands in for the Chroma collection; vectors are 2-d so cosine to [1, 0] is the first coordinate."""
+
+    def __init__(self, hits):
+        self.hits = hits
+
+    def count(self):
+        return len(self.hits)
+
+    def query(self, query_embeddings, n_results, include):
+        hits = self.hits[:n_results]
+        return {"documents": [[h[0] for h in hits]], "metadatas": [[h[1] for h in hits]],
+                "embeddings": [[h[2] for h in hits]]}
+
+
+class FakeStore:
+    def __init__(self, hits):
+        self._collection = FakeCollection(hits)
+
+
+def hit(title, relevance, age_days):
+    metadata = {"title": title, "url": "", "published_at": time.time() - age_days * DAY}
+    return title, metadata, [relevance, math.sqrt(1 - relevance ** 2)]
+
+
+def test_parse_news_date_handles_both_formats():
+    now = datetime.datetime(2026, 3, 1, 12, 0)
+    assert parse_news_date("2026-02-27", now) == datetime.datetime(2026, 2, 27).timestamp()
+    # Admin dates have no year; a date "after" today belongs to last year
+    assert parse_news_date("Dec 24, 10:00 AM", now) == datetime.datetime(2025, 12, 24, 10, 0).timestamp()
+    assert parse_news_date("Today, 10:00 AM", now) == 0.0
+
+
+def test_recent_news_outranks_older_and_weak_hits_are_dropped():
+    index = NewsIndex(FakeStore([
+        hit("Batch B camp postponed (last year)", 0.95, 40),
+        hit("Batch B camp resumes Monday", 0.90, 1),
+        hit("Unrelated sports story", 0.40, 0),
+        hit("Ancient circular", 0.99, 400),
+    ]))
+    titles = [r["title"] for r, _ in index.search([1.0, 0.0], k=3)]
+    assert titles == ["Batch B camp resumes Monday", "Batch B camp postponed (last year)"]
+
+
+def test_stale_local_news_falls_back_to_live_search(monkeypatch):
+    stores = {
+        "fresh": NewsIndex(FakeStore([hit("Camp resumes Monday", 0.9, 2)])),
+        "stale": NewsIndex(FakeStore([hit("Camp resumes Monday", 0.9, 30)])),
+    }
+    for name, expected in (("fresh", 1), ("stale", None)):
+        monkeypatch.setattr(ai_service, "get_news_index", lambda: stores[name])
+        found = asyncio.run(news_index.search_local_news("camp", query_embedding=[1.0, 0.0]))
+        assert (len(found) if found else None) == expected, name
+
+
+def test_lexical_mode_skips_the_news_vector_search(monkeypatch):
+    monkeypatch.setattr(retrieval, "RETRIEVAL_MODE", "lexical")
+    monkeypatch.setattr(ai_service, "get_news_index", lambda: NewsIndex(FakeStore([hit("Camp resumes Monday", 0.9, 2)])))
+    monkeypatch.setattr(ai_service, "get_embedding_function", lambda: 1 / 0)
+    assert asyncio.run(news_index.search_local_news("camp")) is None
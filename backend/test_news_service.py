@@ -0,0 +1,90 @@
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import sessionmaker
+
+import models
+from database import Base, add_missing_columns
+from services import news_service
+from services.news_service import normalize_url, store_news, backfill_keys, search_news
+
+
+def result(title, url, content="Body"):
+    return {"title": title, "url": url, "content": content}
+
+
+def test_normalize_url_ignores_scheme_www_tracking_and_slash():
+    base = normalize_url("https://punchng.com/nysc-batch-b/")
+    assert normalize_url("http://www.punchng.com/nysc-batch-b?utm_source=x#top") == base
+    assert normalize_url("https://punchng.com/nysc-batch-c/") != base
+
+
+def test_store_news_dedupes_batch_and_existing_rows(session_factory):
+    db = session_factory()
+    first = store_news(db, [
+        result("NYSC releases Batch B timetable", "https://punchng.com/timetable/"),
+        # Same article, tweaked headline and tracking parameters
+        result("NYSC releases 2026 Batch B timetable", "http://www.punchng.com/timetable?utm_medium=x"),
+        # Same headline syndicated elsewhere
+        result("NYSC Releases Batch B Timetable!", "https://thecable.ng/timetable"),
+        result("Orientation camp opens Monday", "https://dailypost.ng/camp"),
+    ])
+    db.commit()
+    assert [row["title"] for _, row, _ in first] == ["NYSC releases Batch B timetable", "Orientation camp opens Monday"]
+    assert first[1][1]["type"] == "Guide" and first[1][2] == "Body"
+
+    second = store_news(db, [
+        result("Orientation camp opens on Monday", "https://dailypost.ng/camp/"),
+        result("Allowance reviewed", "https://vanguardngr.com/allowance"),
+    ])
+    db.commit()
+    assert [row["title"] for _, row, _ in second] == ["Allowance reviewed"]
+    assert db.query(models.News).count() == 3
+
+
+def test_missing_columns_are_added_and_backfilled():
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE news (id INTEGER PRIMARY KEY, title VARCHAR, content VARCHAR, "
+                          "date VARCHAR, type VARCHAR, url VARCHAR)"))
+        conn.execute(text("INSERT INTO news (title, url) VALUES ('Old post', 'https://nysc.gov.ng/old')"))
+    Base.metadata.create_all(bind=engine)
+
+    assert add_missing_columns(bind=engine) == ["news.fingerprint", "news.title_key"]
+    assert {"ix_news_fingerprint", "ix_news_title_key"} <= {i["name"] for i in inspect(engine).get_indexes("news")}
+    assert add_missing_columns(bind=engine) == []
+
+    db = sessionmaker(bind=engine)()
+    assert backfill_keys(db) == 1
+    db.commit()
+    assert store_news(db, [result("Old post (updated)", "http://nysc.gov.ng/old/")]) == []
+
+
+def test_columns_added_meanwhile_by_another_worker_are_skipped(monkeypatch):
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE news (id INTEGER PRIMARY KEY, title VARCHAR, content VARCHAR, "
+                          "date VARCHAR, type VARCHAR, url VARCHAR)"))
+    Base.metadata.create_all(bind=engine)
+    # This worker inspects the table before another one migrates it
+    stale = inspect(engine)
+    stale.get_columns("news")
+    monkeypatch.setattr("database.inspect", lambda bind: stale)
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE news ADD COLUMN fingerprint VARCHAR"))
+
+    assert add_missing_columns(bind=engine) == ["news.title_key"]
+    assert {"fingerprint", "title_key"} <= {c["name"] for c in inspect(engine).get_columns("news")}
+
+
+def test_fetch_fails_loudly_so_the_scheduler_retries(monkeypatch):
+    # No key is a configuration state, not a failure worth retrying every few minutes
+    monkeypatch.setattr(news_service, "get_tavily", lambda: None)
+    monkeypatch.setattr(news_service, "SessionLocal", None)
+    assert news_service.fetch_and_store_news() is None
+
+    class DownTavily:
+        def search(self, **kwargs):
+            raise ConnectionError("Tavily down")
+
+    with pytest.raises(RuntimeError, match="All 2 news searches failed"):
+        search_news(DownTavily(), ["a", "b"])
@@ -0,0 +1,102 @@
+import threading
+
+import pytest
+
+from services.password_hasher import PasswordHasher, HasherBusy, hash_rounds
+
+
+def test_hash_verify_and_rehash_detection():
+    hasher = PasswordHasher(rounds=4, workers=1, max_queue=1)
+    hashed = hasher.hash("cm123")
+    assert hash_rounds(hashed) == 4
+    assert hasher.verify("cm123", hashed) and not hasher.verify("wrong", hashed)
+    assert not hasher.needs_rehash(hashed)
+    assert PasswordHasher(rounds=5, workers=1).needs_rehash(hashed)
+    assert hasher.stats()["verifies"] == 2
+
+
+def test_requests_beyond_the_queue_are_shed():
+    hasher = PasswordHasher(rounds=4, workers=1, max_queue=0)
+    release, started = threading.Event(), threading.Event()
+
+    def slow():
+        started.set()
+        release.wait(5)
+
+    worker = threading.Thread(target=hasher._run, args=("hashes", slow))
+    worker.start()
+    started.wait(5)
+    with pytest.raises(HasherBusy):
+        hasher.hash("cm123")
+    release.set()
+    worker.join()
+    assert hasher.stats()["shed"] == 1
+    assert hasher.verify("cm123", hasher.hash("cm123"))
+
+
+def test_login_rehashes_passwords_with_an_old_cost(monkeypatch):
+    from fastapi.testclient import TestClient
+    from main import app
+    from database import SessionLocal
+    from models import User
+    from services.password_hasher import password_hasher
+
+    client = TestClient(app)
+    email = "rehash@example.com"
+    monkeypatch.setattr(password_hasher, "rounds", 5)
+    response = client.post("/auth/signup", json={"email": email, "password": "pw123", "name": "Old Hash"})
+    assert response.status_code in (200, 400)
+
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.email == email).first()
+        user.hashed_password = PasswordHasher(rounds=5, workers=1).hash("pw123")
+        db.commit()
+
+        monkeypatch.setattr(password_hasher, "rounds", 4)
+        assert client.post("/auth/login", json={"email": email, "password": "pw123"}).status_code == 200
+        db.expire_all()
+        stored = db.query(User).filter(User.email == email).first().hashed_password
+        assert hash_rounds(stored) == 4 and password_hasher.verify("pw123", stored)
+    finally:
+        db.close()
+
+
+def test_sync_routes_respond_during_a_saturated_login_burst(monkeypatch):
+    import asyncio
+    import time
+    import httpx
+    import bcrypt
+    from main import app
+    from services import password_hasher as hasher_module
+    from services.password_hasher import password_hasher
+
+    monkeypatch.setattr(password_hasher, "rounds", 4)
+    email = "burst@example.com"
+
+    real_checkpw = bcrypt.checkpw
+
+    def slow_checkpw(password, hashed):
+        time.sleep(0.1)
+        return real_checkpw(password, hashed)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            await client.post("/auth/signup", json={"email": email, "password": "pw123", "name": "Burst"})
+            monkeypatch.setattr(hasher_module.bcrypt, "checkpw", slow_checkpw)
+            # More logins than the hasher admits plus the 40-thread server pool
+            logins = [asyncio.ensure_future(client.post("/auth/login", json={"email": email, "password": "pw123"}))
+                      for _ in range(60)]
+            await asyncio.sleep(0.3)
+            started = time.perf_counter()
+            other = await client.get("/api/resources")  # a plain sync route
+            elapsed = time.perf_counter() - started
+            still_hashing = sum(not t.done() for t in logins)
+            statuses = [r.status_code for r in await asyncio.gather(*logins)]
+            return other.status_code, elapsed, still_hashing, statuses
+
+    status, elapsed, still_hashing, statuses = asyncio.run(scenario())
+    assert status == 200 and elapsed < 1.0
+    assert still_hashing > 0
+    assert set(statuses) <= {200, 503} and 503 in statuses
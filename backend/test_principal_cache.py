@@ -0,0 +1,93 @@
+import time
+
+from sqlalchemy import event
+
+import auth
+from models import User
+from services.principal_cache import PrincipalCache
+
+
+def make_db(session_factory):
+    queries = []
+    event.listen(session_factory.kw["bind"], "before_cursor_execute", lambda *args: queries.append(args[2]))
+    db = session_factory()
+    db.add(User(email="cm@example.com", name="Ada", role="Corps Member", state="Lagos", hashed_password="x"))
+    db.commit()
+    queries.clear()
+    return db, queries
+
+
+def test_cache_expires_evicts_and_invalidates():
+    cache = PrincipalCache(ttl_seconds=60, max_entries=2)
+    cache.put("a", {"id": 1})
+    cache.put("b", {"id": 2})
+    assert cache.get("a") == {"id": 1}
+    cache.put("c", {"id": 3})  # evicts b, the least recently used
+    assert cache.get("b") is None
+    cache.invalidate("a")
+    assert cache.get("a") is None
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 2 and stats["evictions"] == 1 and stats["hit_rate"] == 0.3333
+
+    cache.ttl_seconds = 0.01
+    time.sleep(0.02)
+    assert cache.get("c") is None
+
+
+def test_get_current_user_hits_the_database_once(monkeypatch, session_factory):
+    monkeypatch.setattr(auth, "principal_cache", PrincipalCache())
+    db, queries = make_db(session_factory)
+    token = auth.create_access_token(data={"sub": "cm@example.com"})
+
+    first = auth.get_current_user(token, db)
+    second = auth.get_current_user(token, db)
+    assert first.name == second.name == "Ada" and first.role == "Corps Member"
+    assert len(queries) == 1
+
+    auth.invalidate_user("cm@example.com")
+    auth.get_current_user(token, db)
+    assert len(queries) == 2
+
+
+def test_role_claims_skip_the_lookup_until_the_profile_changes(monkeypatch, session_factory):
+    monkeypatch.setattr(auth, "principal_cache", PrincipalCache())
+    monkeypatch.setattr(auth, "AUTH_ROLE_CLAIMS", True)
+    db, queries = make_db(session_factory)
+    user = db.query(User).first()
+    queries.clear()
+    token = auth.create_access_token(data={"sub": user.email}, user=user)
+
+    principal = auth.get_current_principal(token, db)
+    assert (principal.id, principal.role, principal.state) == (user.id, "Corps Member", "Lagos")
+    assert queries == []
+
+    # After a role change the old token's claims are ignored and the user is looked up
+    user.role = "Official"
+    db.commit()
+    auth.invalidate_user(user.email)
+    queries.clear()
+    assert auth.get_current_principal(token, db).role == "Official"
+    assert len(queries) == 1
+    assert auth.principal_cache.stats()["claim_hits"] == 1
+
+
+def test_role_claims_expire_and_old_revocations_are_pruned(monkeypatch, session_factory):
+    monkeypatch.setattr(auth, "principal_cache", PrincipalCache(claims_ttl_seconds=60))
+    monkeypatch.setattr(auth, "AUTH_ROLE_CLAIMS", True)
+    db, queries = make_db(session_factory)
+    user = db.query(User).first()
+    queries.clear()
+    token = auth.create_access_token(data={"sub": user.email}, user=user)
+    auth.get_current_principal(token, db)
+    assert queries == []
+
+    # Past claims_exp the token still authenticates, but its role is looked up
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 61)
+    assert auth.get_current_principal(token, db).role == "Corps Member"
+    assert len(queries) == 1
+
+    auth.principal_cache.invalidate("a@example.com")
+    monkeypatch.setattr(time, "time", lambda: now + 200)
+    auth.principal_cache.invalidate("b@example.com")
+    assert auth.principal_cache.stats()["revoked"] == 1
@@ -0,0 +1,53 @@
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from services.response_cache import ResponseCache
+
+
+def make_client():
+    cache = ResponseCache(ttl_seconds=60, max_age=30)
+    data = {"items": [{"id": 1, "title": "Camp opens"}], "builds": 0}
+    app = FastAPI()
+
+    def build():
+        data["builds"] += 1
+        return data["items"]
+
+    @app.get("/items")
+    def items(request: Request):
+        return cache.respond(request, "items", build)
+
+    return TestClient(app), cache, data
+
+
+def test_etag_and_304_without_rebuilding():
+    client, cache, data = make_client()
+    first = client.get("/items")
+    assert first.status_code == 200 and first.json() == [{"id": 1, "title": "Camp opens"}]
+    assert "max-age=30" in first.headers["cache-control"]
+
+    etag = first.headers["etag"]
+    second = client.get("/items", headers={"If-None-Match": etag})
+    assert second.status_code == 304 and second.content == b"" and second.headers["etag"] == etag
+    assert data["builds"] == 1
+    assert cache.stats()["not_modified"] == 1
+
+
+def test_invalidate_rebuilds_with_a_new_etag():
+    client, cache, data = make_client()
+    etag = client.get("/items").headers["etag"]
+    data["items"].append({"id": 2, "title": "Allowance reviewed"})
+    assert client.get("/items", headers={"If-None-Match": etag}).status_code == 304
+
+    cache.invalidate("items", reason="test")
+    fresh = client.get("/items", headers={"If-None-Match": etag})
+    assert fresh.status_code == 200 and len(fresh.json()) == 2 and fresh.headers["etag"] != etag
+    assert data["builds"] == 2
+
+
+def test_same_data_gets_the_same_etag_after_expiry():
+    client, cache, data = make_client()
+    etag = client.get("/items").headers["etag"]
+    cache.invalidate(reason="test")
+    assert client.get("/items", headers={"If-None-Match": etag}).status_code == 304
+    assert data["builds"] == 2
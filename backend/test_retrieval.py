@@ -0,0 +1,46 @@
+from services.lexical_index import LexicalIndex, tokenize
+from services.retrieval import reciprocal_rank_fusion
+
+DOCS = [
+    ("Corps members must submit Form 4 to the LGI before travelling.", {"source": "bye-laws.pdf"}),
+    ("The state code LA/24A/1234 identifies a Lagos corps member from Batch A.", {"source": "faq.pdf"}),
+    ("Section 12 of the decree covers absconding and extension of service.", {"source": "decree.pdf"}),
+    ("Orientation camp lasts three weeks and ends with swearing-in.", {"source": "faq.pdf"}),
+]
+
+def test_tokenize_keeps_codes_and_numbered_terms():
+    tokens = tokenize("What is Form 4 for LA/24A?")
+    assert "form_4" in tokens
+    assert "la/24a" in tokens
+    assert "24a" in tokens
+
+def test_bm25_finds_exact_terms(tmp_path):
+    LexicalIndex.build(DOCS).save(str(tmp_path))
+    index = LexicalIndex.load(str(tmp_path))
+
+    assert index.search("form 4", k=1)[0][0] == 0
+    assert index.search("LA/24A", k=1)[0][0] == 1
+    assert index.search("section 12 decree", k=1)[0][0] == 2
+    assert index.search("zzz unknown", k=3) == []
+
+def test_rebuilt_index_does_not_disturb_a_loaded_one(tmp_path):
+    path = str(tmp_path / "lexical")
+    LexicalIndex.build(DOCS).save(path)
+    old = LexicalIndex.load(path)
+    LexicalIndex.build(DOCS[2:]).save(path)
+
+    assert old.search("form 4", k=1)[0][0] == 0
+    assert LexicalIndex.load(path).search("section 12 decree", k=1)[0][0] == 0
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["lexical"]
+
+def test_rrf_rewards_items_ranked_by_both():
+    vector = [("a", "A"), ("b", "B"), ("c", "C")]
+    lexical = [("b", "B"), ("d", "D"), ("c", "C")]
+    fused = reciprocal_rank_fusion(vector, lexical)
+    assert fused[0] == "B"
+    assert set(fused) == {"A", "B", "C", "D"}
+
+def test_retrieval_settings_are_read_from_dotenv(run_with_dotenv):
+    out = run_with_dotenv({"RETRIEVAL_MODE": "lexical", "RRF_K": "10"},
+                          "import main; from services import retrieval; print(retrieval.RETRIEVAL_MODE, retrieval.RRF_K)")
+    assert out.splitlines()[-1] == "lexical 10"
@@ -0,0 +1,100 @@
+import time
+import asyncio
+import httpx
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from services.telegram_sender import TelegramSender, TelegramSendError, TelegramRetryLater, split_message
+
+def make_fake_telegram(responses):
+    """Local fake Bot API: pops a canned (status, body) per call, records what it received."""
+    app = FastAPI()
+    app.state.received = []
+
+    @app.post("/botTEST/sendMessage")
+    async def send_message(request: Request):
+        app.state.received.append(await request.json())
+        status, body = responses.pop(0) if responses else (200, {"ok": True, "result": {}})
+        return JSONResponse(body, status_code=status)
+
+    return app
+
+def make_sender(app, **kwargs):
+    kwargs.setdefault("backoff_seconds", 0.01)
+    return TelegramSender("TEST", api_base="http://telegram.test", transport=httpx.ASGITransport(app=app), **kwargs)
+
+def test_split_message_keeps_order_and_limit():
+    text = "\n\n".join(f"Paragraph {i} " + "x" * 1500 for i in range(6))
+    parts = split_message(text)
+    assert all(len(p) <= 4096 for p in parts)
+    assert "".join(parts).replace("\n", "") == text.replace("\n", "")
+    assert split_message("") == [""]
+
+def test_long_answer_is_sent_as_ordered_parts():
+    app = make_fake_telegram([])
+    sender = make_sender(app, per_chat_rate=100)
+    text = " ".join(f"w{i}" for i in range(3000))
+
+    asyncio.run(sender.send_message(42, text))
+
+    received = [m["text"] for m in app.state.received]
+    assert len(received) > 1
+    assert " ".join(received) == text
+    assert sender.stats()["parts_sent"] == len(received)
+
+def test_honours_retry_after_and_retries_server_errors():
+    app = make_fake_telegram([
+        (429, {"ok": False, "error_code": 429, "description": "Too Many Requests: retry after 1", "parameters": {"retry_after": 1}}),
+        (502, {"ok": False, "description": "Bad Gateway"}),
+    ])
+    sender = make_sender(app, per_chat_rate=100)
+
+    started = time.monotonic()
+    asyncio.run(sender.send_message(7, "hello"))
+
+    assert time.monotonic() - started >= 1
+    assert len(app.state.received) == 3
+    stats = sender.stats()
+    assert stats["rate_limited"] == 1
+    assert stats["retried"] == 2
+    assert stats["sent"] == 1
+
+def test_rate_limit_pauses_every_chat():
+    app = make_fake_telegram([
+        (429, {"ok": False, "error_code": 429, "description": "Too Many Requests: retry after 1", "parameters": {"retry_after": 1}}),
+    ])
+    sender = make_sender(app, per_chat_rate=100)
+
+    async def run():
+        with pytest.raises(TelegramRetryLater) as retry:
+            await sender.send_parts(7, ["hello"])
+        started = time.monotonic()
+        await sender.send_message(8, "another chat")
+        return retry.value, time.monotonic() - started
+
+    retry, waited = asyncio.run(run())
+    assert retry.delay == 1 and retry.parts == ["hello"] and retry.attempt == 1
+    assert waited >= 0.9
+    assert [m["chat_id"] for m in app.state.received] == [7, 8]
+
+def test_permanent_error_is_counted_as_failed():
+    app = make_fake_telegram([(400, {"ok": False, "description": "Bad Request: chat not found"})])
+    sender = make_sender(app)
+
+    with pytest.raises(TelegramSendError):
+        asyncio.run(sender.send_message(1, "hello"))
+    assert len(app.state.received) == 1
+    assert sender.stats()["failed"] == 1
+
+def test_per_chat_rate_is_enforced():
+    app = make_fake_telegram([])
+    sender = make_sender(app, per_chat_rate=10)
+
+    async def run():
+        await asyncio.gather(*[sender.send_message(5, f"m{i}") for i in range(4)])
+
+    started = time.monotonic()
+    asyncio.run(run())
+    # First message uses the burst token, the next three wait ~0.1s each
+    assert time.monotonic() - started >= 0.25
+    assert sender.stats()["throttled"] == 3
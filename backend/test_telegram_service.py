@@ -0,0 +1,129 @@
+import asyncio
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from services.telegram_sender import TelegramSender
+from services.telegram_service import TelegramDispatcher
+
+
+class FakeSender:
+    def __init__(self):
+        self.sent = []
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    async def send_parts(self, chat_id, parts, attempt=0):
+        self.sent.extend((chat_id, part) for part in parts)
+
+    def stats(self):
+        return {"sent": len(self.sent)}
+
+
+def update(update_id, chat_id, text):
+    return {"update_id": update_id, "message": {"chat": {"id": chat_id}, "text": text}}
+
+
+def test_each_chat_is_answered_in_order():
+    async def answer(text):
+        # Later messages answer faster, so only the sharding keeps them in order
+        await asyncio.sleep(0.01 * (5 - int(text[-1])))
+        return f"re: {text}"
+
+    async def scenario():
+        sender = FakeSender()
+        dispatcher = TelegramDispatcher(answer, "TEST", workers=3, queue_size=10, sender=sender)
+        await dispatcher.start()
+        for i in range(5):
+            for chat_id in (1, 2):
+                assert dispatcher.submit(update(chat_id * 100 + i, chat_id, f"chat {chat_id} m{i}"))
+        await asyncio.gather(*(q.join() for q in dispatcher.queues))
+        await dispatcher.stop()
+        return sender.sent, dispatcher.stats()
+
+    sent, stats = asyncio.run(scenario())
+    for chat_id in (1, 2):
+        assert [text for c, text in sent if c == chat_id] == [f"re: chat {chat_id} m{i}" for i in range(5)]
+    assert stats["processed"] == 10 and stats["queue_depth"] == 0 and stats["oldest_pending_seconds"] == 0.0
+
+
+def test_redelivered_updates_are_answered_once():
+    async def scenario():
+        sender = FakeSender()
+        dispatcher = TelegramDispatcher(lambda text: asyncio.sleep(0, text), "TEST", workers=1, sender=sender)
+        await dispatcher.start()
+        for _ in range(3):
+            assert dispatcher.submit(update(7, 1, "When is camp?"))
+        await dispatcher.queues[0].join()
+        await dispatcher.stop()
+        return sender.sent, dispatcher.stats()
+
+    sent, stats = asyncio.run(scenario())
+    assert sent == [(1, "When is camp?")]
+    assert stats["duplicates"] == 2
+
+
+def test_webhook_returns_503_while_the_queue_is_full(monkeypatch):
+    import main
+
+    async def scenario():
+        release = asyncio.Event()
+
+        async def answer(text):
+            await release.wait()
+            return text
+
+        dispatcher = TelegramDispatcher(answer, "TEST", workers=1, queue_size=1, sender=FakeSender())
+        monkeypatch.setattr(main, "telegram_dispatcher", dispatcher)
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            statuses = [(await client.post("/telegram", json=update(i, 1, f"m{i}"))).status_code for i in range(4)]
+            waiting = dispatcher.stats()["oldest_pending_seconds"]
+            release.set()
+            await dispatcher.queues[0].join()
+            # The rejected update was forgotten, so Telegram's redelivery is accepted
+            retried = (await client.post("/telegram", json=update(3, 1, "m3"))).status_code
+            await dispatcher.queues[0].join()
+        await dispatcher.stop()
+        return statuses, waiting, retried, dispatcher.stats()
+
+    statuses, waiting, retried, stats = asyncio.run(scenario())
+    assert statuses[0] == 200 and statuses[-1] == 503
+    assert waiting > 0 and retried == 200
+    assert stats["rejected"] >= 1 and stats["processed"] == statuses.count(200) + 1
+
+
+def test_failed_send_is_retried_through_the_queue():
+    app = FastAPI()
+    received, responses = [], [(502, {"ok": False, "description": "Bad Gateway"})]
+
+    @app.post("/botTEST/sendMessage")
+    async def send_message(request: Request):
+        received.append((await request.json())["text"])
+        status, body = responses.pop(0) if responses else (200, {"ok": True, "result": {}})
+        return JSONResponse(body, status_code=status)
+
+    async def answer(text):
+        return f"re: {text}"
+
+    async def scenario():
+        sender = TelegramSender("TEST", api_base="http://telegram.test", per_chat_rate=100, backoff_seconds=0.2,
+                                transport=httpx.ASGITransport(app=app))
+        dispatcher = TelegramDispatcher(answer, "TEST", workers=1, sender=sender)
+        await dispatcher.start()
+        for update_id, (chat_id, text) in enumerate([(1, "a1"), (2, "b1"), (1, "a2")]):
+            assert dispatcher.submit(update(update_id, chat_id, text))
+        while dispatcher.stats()["processed"] < 3:
+            await asyncio.sleep(0.01)
+        await dispatcher.stop()
+        return dispatcher.stats()
+
+    stats = asyncio.run(scenario())
+    # The worker moved on to chat 2 during the backoff; chat 1's replies stayed in order
+    assert received == ["re: a1", "re: b1", "re: a1", "re: a2"]
+    assert stats["deferred"] == 1 and stats["failed"] == 0
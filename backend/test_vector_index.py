@@ -0,0 +1,64 @@
+import numpy as np
+
+from services.vector_index import VectorIndex
+
+rng = np.random.default_rng(42)
+VECTORS = rng.normal(size=(500, 64)).astype(np.float32)
+DOCS = [(f"chunk {i}", {"row": i}) for i in range(len(VECTORS))]
+QUERIES = VECTORS[:20] + 0.1 * rng.normal(size=(20, 64)).astype(np.float32)
+
+
+def exact_top(k):
+    unit = VECTORS / np.linalg.norm(VECTORS, axis=1, keepdims=True)
+    return [set(np.argsort(-(unit @ q))[:k]) for q in QUERIES]
+
+
+def test_saved_index_is_memory_mapped_and_exact(tmp_path):
+    VectorIndex.build(VECTORS, DOCS, "float32").save(str(tmp_path))
+    index = VectorIndex.load(str(tmp_path))
+
+    assert isinstance(index.vectors, np.memmap)
+    assert index.search(QUERIES[0], k=1)[0][0] == 0
+    assert [{d for d, _ in row} for row in index.search_batch(QUERIES, k=5)] == exact_top(5)
+
+
+def test_quantized_indexes_keep_recall(tmp_path):
+    truth = exact_top(10)
+    for dtype in ("float16", "int8"):
+        path = tmp_path / dtype
+        VectorIndex.build(VECTORS, DOCS, dtype).save(str(path))
+        index = VectorIndex.load(str(path))
+        found = [{d for d, _ in row} for row in index.search_batch(QUERIES, k=10)]
+        recall = np.mean([len(f & t) / 10 for f, t in zip(found, truth)])
+        assert recall >= 0.9, dtype
+        assert index.search(QUERIES[3], k=1)[0][0] == 3
+
+
+def test_empty_index(tmp_path):
+    VectorIndex.build([], [], "float32").save(str(tmp_path))
+    assert VectorIndex.load(str(tmp_path)).search(np.ones(8), k=3) == []
+
+
+def test_resaving_leaves_open_memory_maps_intact(tmp_path):
+    path = str(tmp_path / "index")
+    VectorIndex.build(VECTORS, DOCS, "float32").save(path)
+    old = VectorIndex.load(path)
+    before = np.array(old.vectors[:5])
+
+    VectorIndex.build(VECTORS[::-1], DOCS[::-1], "float16").save(path)
+
+    # The worker that mapped the first export still reads it unchanged
+    assert np.array_equal(old.vectors[:5], before)
+    new = VectorIndex.load(path)
+    assert new.meta["dtype"] == "float16" and new.documents[0] == DOCS[-1]
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["index"]
+
+
+def test_vector_settings_are_read_from_dotenv(run_with_dotenv):
+    code = ("import main; from services import vector_index as v; "
+            "print(v.VECTOR_STORE, v.VECTOR_INDEX_DTYPE, v.VECTOR_INDEX_PATH)")
+    settings = {"VECTOR_STORE": "chroma", "VECTOR_INDEX_DTYPE": "int8", "VECTOR_INDEX_PATH": "custom_vectors"}
+    assert run_with_dotenv(settings, code).splitlines()[-1] == "chroma int8 custom_vectors"
+    # The offline scripts load .env the same way
+    code = "import ingest, reembed; from services import vector_index as v; print(v.VECTOR_INDEX_PATH)"
+    assert run_with_dotenv(settings, code).splitlines()[-1] == "custom_vectors"
@@ -0,0 +1,58 @@
+import time
+import asyncio
+from services.web_search_cache import WebSearchCache
+
+def make_fetch(calls, delay=0.05):
+    def fetch(query, include_domains=None, **params):
+        calls.append(query)
+        time.sleep(delay)
+        return {"results": [{"content": f"news for {query}"}]}
+    return fetch
+
+def test_concurrent_misses_share_one_call():
+    calls = []
+    cache = WebSearchCache(ttl_seconds=60)
+    fetch = make_fetch(calls)
+
+    async def run():
+        return await asyncio.gather(*[
+            cache.search(fetch, q, include_domains=["nysc.gov.ng"])
+            for q in ["Is the Senate list out?", "is the senate list out", "Senate list out yet?"] * 10
+        ])
+
+    results = asyncio.run(run())
+    assert len(calls) == 1
+    assert all(r == results[0] for r in results)
+    assert cache.stats()["coalesced"] == 29
+
+def test_domains_are_part_of_the_key():
+    calls = []
+    cache = WebSearchCache(ttl_seconds=60)
+    fetch = make_fetch(calls, delay=0)
+
+    async def run():
+        await cache.search(fetch, "camp date", include_domains=["nysc.gov.ng"])
+        await cache.search(fetch, "camp date", include_domains=["punchng.com"])
+        await cache.search(fetch, "camp date", include_domains=["nysc.gov.ng"])
+
+    asyncio.run(run())
+    assert len(calls) == 2
+
+def test_hot_entry_served_stale_while_revalidating():
+    calls = []
+    cache = WebSearchCache(ttl_seconds=0.05, stale_seconds=60, hot_hits=1)
+    fetch = make_fetch(calls, delay=0)
+
+    async def run():
+        await cache.search(fetch, "camp date")
+        await cache.search(fetch, "camp date")  # makes it hot
+        await asyncio.sleep(0.1)
+        stale = await cache.search(fetch, "camp date")
+        await asyncio.sleep(0.05)  # let the background refresh finish
+        return stale
+
+    assert asyncio.run(run())["results"]
+    assert len(calls) == 2
+    stats = cache.stats()
+    assert stats["stale_hits"] == 1
+    assert stats["background_refreshes"] == 1